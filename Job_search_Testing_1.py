@@ -1,5 +1,6 @@
 import os
 import requests
+import http_client
 from crewai import Agent, Task
 from crewai.tools import BaseTool
 from typing import Dict, List
@@ -66,7 +67,7 @@ class JobSearchTool(BaseTool):
         }
         
         try:
-            response = requests.get("https://serpapi.com/search", params=params)
+            response = http_client.get("https://serpapi.com/search", params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -102,7 +103,7 @@ class JobSearchTool(BaseTool):
         }
         
         try:
-            response = requests.get("https://serpapi.com/search", params=params)
+            response = http_client.get("https://serpapi.com/search", params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -138,7 +139,7 @@ class JobSearchTool(BaseTool):
         }
         
         try:
-            response = requests.get("https://serpapi.com/search", params=params)
+            response = http_client.get("https://serpapi.com/search", params=params)
             response.raise_for_status()
             data = response.json()
             
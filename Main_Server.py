@@ -1,30 +1,152 @@
 import os
-from crewai import Agent, Task, Crew
+import contextvars
+import functools
+import hashlib
+import json
+import re
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from crewai import Agent, Task, Crew, LLM
+from crewai.llms.base_llm import call_stream_override
 from crewai.tools import BaseTool
-from crewai_tools import PDFSearchTool, DOCXSearchTool,SerperDevTool
+from crewai_tools import PDFSearchTool, DOCXSearchTool,SerperDevTool, RagTool
 import requests
 import time 
-import fitz
-from io import BytesIO
+import cancellation
+import http_client
+import job_description
+import github_enrichment
+import linkedin_snapshot
+import llm_gateway
+import prefetch
+import stage_cache
+import result_cache
+import role_requirements
+import run_budget
+import streaming
+import document_text
+import skills_taxonomy
 from dotenv import load_dotenv
 
 load_dotenv()
 
+DEFAULT_MODEL = os.getenv("MODEL") or os.getenv("OPENAI_MODEL_NAME", "gpt-4o-mini")
+STREAM_LLM = os.getenv("STREAM_LLM", "true").lower() == "true"
+MULTI_TARGET_WORKERS = int(os.getenv("MULTI_TARGET_WORKERS", "4"))
+# Uploaded resumes are parsed natively; RAG is only used when the caller opts
+# in with use_rag and the document is longer than this.
+RAG_MIN_CHARS = int(os.getenv("RAG_MIN_CHARS", "40000"))
+# Part of every stored result's crew variant; bump when prompts or crew
+# composition change so stale reports are not served from the result cache.
+RESULT_CACHE_VERSION = "5"
+# Longest a LinkedIn snapshot is waited for; a collection that fails or times
+# out counts against the Bright Data circuit breaker
+LINKEDIN_MAX_WAIT_SECONDS = float(os.getenv("LINKEDIN_MAX_WAIT_SECONDS", "600"))
+
+
+# Local stand-ins for load testing and development, see stubs.py
+STUB_LLM = os.getenv("STUB_LLM") == "1"
+STUB_FETCHERS = os.getenv("STUB_FETCHERS") == "1"
+
+
+# Both tiers default to DEFAULT_MODEL so a deployment on another provider
+# keeps every agent on it; set LLM_FAST_MODEL to route the fast tier elsewhere
+MODEL_TIERS = {
+    "fast": os.getenv("LLM_FAST_MODEL", DEFAULT_MODEL),
+    "premium": os.getenv("LLM_PREMIUM_MODEL", DEFAULT_MODEL),
+}
+# A call that exceeds its agent's budget fails over down this chain
+TIER_FALLBACKS = {"premium": "fast"}
+# Model tier and per-call latency budget (seconds) for each agent, plus the
+# agent's token, LLM-call and wall-time limits within one run (run_budget.py).
+# Tune from the latency log (python llm_gateway.py) and override without code
+# changes: LLM_ROUTES='{"skills_gap_analyzer": {"tier": "fast", "budget": 60}}'
+AGENT_ROUTES = {
+    "url_data_fetcher": {"tier": "fast", "budget": 60, "max_tokens": 60000, "max_calls": 15, "max_seconds": 240},
+    "file_processor": {"tier": "fast", "budget": 60, "max_tokens": 80000, "max_calls": 10, "max_seconds": 240},
+    "skills_gap_analyzer": {"tier": "premium", "budget": 90, "max_tokens": 60000, "max_calls": 8, "max_seconds": 300},
+    "experience_evaluator": {"tier": "premium", "budget": 90, "max_tokens": 60000, "max_calls": 8, "max_seconds": 300},
+    "job_search_agent": {"tier": "fast", "budget": 60, "max_tokens": 60000, "max_calls": 12, "max_seconds": 300},
+    "recruiter_feedback_specialist": {"tier": "premium", "budget": 180, "max_tokens": 100000, "max_calls": 6, "max_seconds": 600},
+    # One call per job title missing from the role knowledge base
+    "role_profiler": {"tier": "fast", "budget": 30, "max_tokens": 4000, "max_calls": 1, "max_seconds": 60},
+    # One call per distinct job description
+    "jd_parser": {"tier": "fast", "budget": 45, "max_tokens": 12000, "max_calls": 1, "max_seconds": 90},
+}
+for _agent, _route in json.loads(os.getenv("LLM_ROUTES", "{}")).items():
+    AGENT_ROUTES[_agent] = {**AGENT_ROUTES.get(_agent, {}), **_route}
+
+
+def _provider_llm(model):
+    if STUB_LLM:
+        from stubs import StubLLM
+        return StubLLM(model=f"stub/{model}", stream=STREAM_LLM)
+    return LLM(model=model, stream=STREAM_LLM)
+
+
+def make_llm(agent=None):
+    # Streaming lets the UI render tokens as they arrive; see streaming.py.
+    # Every agent's calls go through the shared gateway; see llm_gateway.py
+    route = AGENT_ROUTES.get(agent, {"tier": "premium", "budget": None})
+    tiers = [route["tier"]]
+    while tiers[-1] in TIER_FALLBACKS:
+        tiers.append(TIER_FALLBACKS[tiers[-1]])
+    models = list(dict.fromkeys(MODEL_TIERS[tier] for tier in tiers))
+    llms = [_provider_llm(model) for model in models]
+    return llm_gateway.wrap(llms[0], fallbacks=llms[1:], budget=route.get("budget"), agent=agent)
+
+
+def new_run_budget(targets=1, workers=1):
+    # A multi-target run makes a target-fit pass per target, so its token and
+    # call limits grow with the target count and its time limit with the
+    # number of rounds the workers need to get through them
+    rounds = -(-targets // workers)
+    return run_budget.RunBudget(
+        max_tokens=run_budget.MAX_TOKENS * targets,
+        max_calls=run_budget.MAX_CALLS * targets,
+        max_seconds=run_budget.MAX_SECONDS * rounds,
+        agent_limits={
+            agent: {name: route.get(f"max_{name}") for name in ("tokens", "calls", "seconds")}
+            for agent, route in AGENT_ROUTES.items()
+        },
+    )
+
+# Source -> error for fetch tools that failed during the current profile
+# stage; see run_profile_stages
+_source_failures = contextvars.ContextVar("source_failures", default=None)
+
+
+def reports_failures(source):
+    # Records a fetch tool's error result or exception against its source, so
+    # a stage built on a failed fetch is reported as degraded and not cached
+    def decorate(run):
+        @functools.wraps(run)
+        def wrapper(self, *args, **kwargs):
+            failures = _source_failures.get()
+            try:
+                result = run(self, *args, **kwargs)
+            except Exception as e:
+                if failures is not None:
+                    failures[source] = f"{type(e).__name__}: {e}"
+                raise
+            if failures is not None and isinstance(result, dict) and result.get("error"):
+                failures[source] = str(result["error"])
+            return result
+        return wrapper
+    return decorate
+
+
 class ResumeFetcherTool(BaseTool):
     name: str = "resume_fetcher"
     description: str = "Fetch resume text from a PDF URL or Google Drive link."
 
+    @reports_failures("resume_url")
     def _run(self, url: str) -> str:
+        cancellation.check()
         url = self._convert_drive_link(url)
-        r = requests.get(url)
+        r = http_client.get(url)
         r.raise_for_status()
-        pdf_bytes = BytesIO(r.content)
-
-        text = ""
-        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
-            for page in doc:
-                text += page.get_text()
-        return text
+        return document_text.extract_pdf_text(r.content)
 
     def _convert_drive_link(self, link):
         import re
@@ -39,16 +161,20 @@ class GithubFetcherTool(BaseTool):
     name: str = "github_fetcher"
     description: str = "Fetch public GitHub profile and repositories from a GitHub profile URL."
 
+    @reports_failures("github_url")
     def _run(self, github_url: str) -> dict:
+        cancellation.check()
         username = github_url.strip("/").split("/")[-1]
         headers = {}
         gh_token = os.getenv("GH_TOKEN")
         if gh_token:
             headers["Authorization"] = f"token {gh_token}"
 
-        profile = requests.get(f"https://api.github.com/users/{username}", headers=headers).json()
-        repos = requests.get(f"https://api.github.com/users/{username}/repos", headers=headers, params={"per_page": 100}).json()
+        profile = http_client.get(f"https://api.github.com/users/{username}", headers=headers).json()
+        repos_response = http_client.get(f"https://api.github.com/users/{username}/repos", headers=headers, params={"per_page": 100})
+        repos = repos_response.json()
 
+        repos = [r for r in repos if isinstance(r, dict)] if isinstance(repos, list) else []
         return {
             "profile": profile,
             "repos": [
@@ -58,16 +184,22 @@ class GithubFetcherTool(BaseTool):
                     "language": r.get("language"),
                     "stars": r.get("stargazers_count")
                 }
-                for r in repos if isinstance(r, dict)
-            ]
+                for r in repos
+            ],
+            **github_enrichment.enrich(repos, headers, remaining=repos_response.headers.get("X-RateLimit-Remaining"))
         }
 
 
 class LinkedInFetcherTool(BaseTool):
     name: str = "linkedin_data_fetcher"
     description: str = "Fetch public LinkedIn profile data."
+    # Bright Data snapshot being collected: set after the trigger, or passed
+    # in to finish a collection a prefetch started instead of triggering again
+    snapshot_id: str | None = None
 
+    @reports_failures("linkedin_url")
     def _run(self, linkedin_url: str) -> dict:
+        cancellation.check()
         trigger_url = "https://api.brightdata.com/datasets/v3/trigger"
         headers = {
             "Authorization": f"Bearer {os.getenv('Bright')}",
@@ -79,21 +211,29 @@ class LinkedInFetcherTool(BaseTool):
         }
         data = [{"url": linkedin_url}]
         print(linkedin_url)
-        response= requests.post(trigger_url, headers=headers, params=params, json=data).json()
-        if 'snapshot_id' not in response:
-            return {"error": "Could not trigger LinkedIn data collection"}
-        progress_url = f"https://api.brightdata.com/datasets/v3/progress/{response['snapshot_id']}"
-        snapshot_url = f"https://api.brightdata.com/datasets/v3/snapshot/{response['snapshot_id']}"
-        print(response['snapshot_id'])
-        time.sleep(30)
+        resumed = self.snapshot_id is not None
+        if not resumed:
+            response= http_client.post(trigger_url, headers=headers, params=params, json=data).json()
+            if 'snapshot_id' not in response:
+                return {"error": "Could not trigger LinkedIn data collection"}
+            self.snapshot_id = response['snapshot_id']
+        progress_url = f"https://api.brightdata.com/datasets/v3/progress/{self.snapshot_id}"
+        snapshot_url = f"https://api.brightdata.com/datasets/v3/snapshot/{self.snapshot_id}"
+        print(f"{'🔁 Resuming' if resumed else '🚀 Triggered'} LinkedIn snapshot {self.snapshot_id}")
+        breaker = http_client.breaker(trigger_url)
+        deadline = time.monotonic() + LINKEDIN_MAX_WAIT_SECONDS
+        # Polling sleeps end as soon as the run is cancelled
+        if not resumed:
+            cancellation.sleep(min(30, LINKEDIN_MAX_WAIT_SECONDS))
         max_attempts = 60  
         attempt = 0
+        ready = False
         
         print(f"⏳ Waiting for LinkedIn data collection to complete...")
         
-        while attempt < max_attempts:
+        while attempt < max_attempts and time.monotonic() < deadline:
             try:
-                response_2=requests.get(progress_url,headers=headers)
+                response_2=http_client.get(progress_url,headers=headers)
                 status_data = response_2.json()
                 print(status_data)
                 current_status = status_data.get('status', 'unknown')
@@ -102,431 +242,1112 @@ class LinkedInFetcherTool(BaseTool):
                 
                 if current_status == 'ready':
                     print("✅ Data collection completed!")
+                    ready = True
                     break
                 elif current_status == 'failed':
+                    breaker.record(False)
                     return {
                         "error": "LinkedIn data collection failed", 
                         "status": status_data,
                         "details": status_data.get('error', 'Unknown error')
                     }
                 elif current_status == 'error':
+                    breaker.record(False)
                     return {
                         "error": "LinkedIn data collection encountered an error", 
                         "status": status_data,
                         "details": status_data.get('error', 'Unknown error')
                     }
                 
-                time.sleep(30)
+                cancellation.sleep(30)
                 attempt += 1
                 
+            except http_client.CircuitOpen as e:
+                return {"error": str(e), "degraded": True}
             except requests.exceptions.RequestException as e:
                 print(f"❌ Status check failed: {str(e)}")
-                time.sleep(30)
+                cancellation.sleep(30)
                 attempt += 1
                 continue
         
-        if attempt >= max_attempts:
+        if not ready:
+            breaker.record(False)
             return {
                 "error": "Timeout waiting for LinkedIn data collection to complete",
-                "timeout_seconds": max_attempts * 2,
+                "timeout_seconds": LINKEDIN_MAX_WAIT_SECONDS,
                 "last_status": current_status if 'current_status' in locals() else 'unknown'
             }
         
-        snap_params = {"format": "json"}
-        snap_resp = requests.get(snapshot_url, headers=headers, params=snap_params).json()
-
-        return snap_resp
-
-
-
-url_data_fetcher = Agent(
-    role="Digital Profile Data Collector",
-    goal=(
-        "Efficiently gather comprehensive professional data from online sources"
-    "including resumes, GitHub repositories, and LinkedIn profiles to build a complete candidate profile"
-    ),
-    backstory=("You are an expert digital researcher with years of experience in talent acquisition technology. You specialize in extracting and organizing professional information from various online platforms."
-               "Your expertise lies in understanding the nuances of different data sources and ensuring comprehensive data collection for career analysis."),
-    tools=[ResumeFetcherTool(), GithubFetcherTool(), LinkedInFetcherTool()],
-    verbose=True,
-    allow_delegation=False
-)
-
-file_processor = Agent(
-    role="Document Analysis Specialist",
-    goal="Extract and analyze content from uploaded resume documents (PDF/DOCX) to understand candidate qualifications, skills, and experience",
-    backstory="You are a seasoned document processing expert with deep knowledge in parsing professional documents. You have extensive experience in extracting meaningful information from resumes, cover letters, and professional portfolios. Your analytical skills help identify key competencies, achievements, and career progression patterns.",
-    tools=[PDFSearchTool(), DOCXSearchTool()],
-    verbose=True,
-    allow_delegation=False
-)
-
-
-skills_gap_analyzer = Agent(
-    role="Technical Skills Gap Analyst",
-    goal=("Conduct comprehensive analysis of candidate profiles to identify missing technical skills, certifications, and competencies required for target positions"),
-    backstory=("You are a senior technical recruiter and career counselor with 10+ years of experience in talent assessment."
-               "You have deep knowledge of industry requirements across various tech roles and can quickly identify skill gaps. "
-               "Your expertise includes understanding emerging technologies, industry trends, and the evolving demands of modern workplaces."),
-    verbose=True,
-    allow_delegation=False
-)
-
-experience_evaluator = Agent(
-    role="Professional Experience Evaluator",
-    goal="Assess candidate's professional experience, career progression, and alignment with target job requirements to identify experience gaps and growth opportunities",
-    backstory=("You are an experienced career strategist and former hiring manager who has reviewed thousands of profiles."
-               " You understand career trajectories, industry standards, and what makes candidates stand out."
-               " Your analytical approach helps identify both strengths and areas for improvement in professional experience."),
-    verbose=True,
-    allow_delegation=False
-)
-job_search_agent = Agent(
-    role="Job Search Specialist",
-    goal=(
-        "Find relevant job opportunities across multiple platforms including LinkedIn, Indeed, and Glassdoor,internshala,Unstop "
-        "that match the candidate's profile, skills, and target requirements"
-    ),
-    backstory=(
-        "You are an expert job search specialist with deep knowledge of recruitment platforms and job market trends. "
-        "You have extensive experience in matching candidate profiles with relevant opportunities across various job boards. "
-        "Your expertise lies in crafting targeted search queries, identifying high-quality opportunities, and understanding "
-        "what makes a job posting attractive to specific candidate profiles."
-    ),
-    tools=[SerperDevTool()],
-    verbose=True,
-    allow_delegation=False
-)
-
-recruiter_feedback_specialist = Agent(
-    role="Senior Talent Acquisition Consultant",
-    goal=("Provide comprehensive, actionable feedback from a recruiter's perspective, "
-          "including hiring recommendations, interview preparation advice, and career development suggestions"),
-    backstory=("You are a senior executive recruiter with 15+ years of experience placing candidates in top-tier companies."
-               " You have worked across multiple industries and understand what hiring managers look for."
-               " Your feedback is direct, actionable, and focused on helping candidates improve their marketability and interview success rate."),
-    verbose=True,
-    allow_delegation=False
-)
-
-url_fetch_task = Task(
-    description="""
-    Fetch and compile comprehensive professional data from any of the provided online sources:
-    1. Extract complete resume text from the PDF URL if provided: {resume_url}
-    2. Gather GitHub profile information if URL provided: {github_url}
-    3. Collect LinkedIn profile data if URL provided: {linkedin_url}
-    
-    Target information: {target_input}
-    Input type: {input_type}
-    
+        # Stream the snapshot and keep only the profile fields the analysis uses
+        snap_params = {"format": "ndjson"}
+        snap_resp = http_client.get(snapshot_url, headers=headers, params=snap_params, stream=True)
+        stats = {}
+        try:
+            records = list(linkedin_snapshot.project_stream(
+                cancellation.iterate(snap_resp.iter_content(linkedin_snapshot.CHUNK_SIZE)), stats=stats
+            ))
+        finally:
+            snap_resp.close()
+        print(f"📉 LinkedIn snapshot: {stats.get('bytes_read', 0)} bytes streamed, "
+              f"{len(json.dumps(records))} chars kept")
+
+        errors = [linkedin_snapshot.record_error(record) for record in records]
+        profiles = [record for record, error in zip(records, errors) if not error]
+        if not profiles:
+            return {
+                "error": "LinkedIn data collection returned no profile",
+                "details": [error for error in errors if error] or "empty snapshot",
+            }
+        return profiles[0] if len(profiles) == 1 else profiles
+
+
+
+def make_url_data_fetcher(tools=None):
+    return Agent(
+        role="Digital Profile Data Collector",
+        goal=(
+            "Efficiently gather comprehensive professional data from online sources"
+        "including resumes, GitHub repositories, and LinkedIn profiles to build a complete candidate profile"
+        ),
+        backstory=("You are an expert digital researcher with years of experience in talent acquisition technology. You specialize in extracting and organizing professional information from various online platforms."
+                   "Your expertise lies in understanding the nuances of different data sources and ensuring comprehensive data collection for career analysis."),
+        tools=tools if tools is not None else [ResumeFetcherTool(), GithubFetcherTool(), LinkedInFetcherTool()],
+        llm=make_llm("url_data_fetcher"),
+        verbose=True,
+        allow_delegation=False
+    )
+
+def make_file_processor(tools=None):
+    return Agent(
+        role="Document Analysis Specialist",
+        goal="Extract and analyze content from uploaded resume documents (PDF/DOCX) to understand candidate qualifications, skills, and experience",
+        backstory="You are a seasoned document processing expert with deep knowledge in parsing professional documents. You have extensive experience in extracting meaningful information from resumes, cover letters, and professional portfolios. Your analytical skills help identify key competencies, achievements, and career progression patterns.",
+        tools=tools if tools is not None else [PDFSearchTool(), DOCXSearchTool()],
+        llm=make_llm("file_processor"),
+        verbose=True,
+        allow_delegation=False
+    )
+
+
+def make_skills_gap_analyzer():
+    return Agent(
+        role="Technical Skills Gap Analyst",
+        goal=("Conduct comprehensive analysis of candidate profiles to identify missing technical skills, certifications, and competencies required for target positions"),
+        backstory=("You are a senior technical recruiter and career counselor with 10+ years of experience in talent assessment."
+                   "You have deep knowledge of industry requirements across various tech roles and can quickly identify skill gaps. "
+                   "Your expertise includes understanding emerging technologies, industry trends, and the evolving demands of modern workplaces."),
+        llm=make_llm("skills_gap_analyzer"),
+        verbose=True,
+        allow_delegation=False
+    )
+
+def make_experience_evaluator():
+    return Agent(
+        role="Professional Experience Evaluator",
+        goal="Assess candidate's professional experience, career progression, and alignment with target job requirements to identify experience gaps and growth opportunities",
+        backstory=("You are an experienced career strategist and former hiring manager who has reviewed thousands of profiles."
+                   " You understand career trajectories, industry standards, and what makes candidates stand out."
+                   " Your analytical approach helps identify both strengths and areas for improvement in professional experience."),
+        llm=make_llm("experience_evaluator"),
+        verbose=True,
+        allow_delegation=False
+    )
+def make_job_search_agent(tools=None):
+    return Agent(
+        role="Job Search Specialist",
+        goal=(
+            "Find relevant job opportunities across multiple platforms including LinkedIn, Indeed, and Glassdoor,internshala,Unstop "
+            "that match the candidate's profile, skills, and target requirements"
+        ),
+        backstory=(
+            "You are an expert job search specialist with deep knowledge of recruitment platforms and job market trends. "
+            "You have extensive experience in matching candidate profiles with relevant opportunities across various job boards. "
+            "Your expertise lies in crafting targeted search queries, identifying high-quality opportunities, and understanding "
+            "what makes a job posting attractive to specific candidate profiles."
+        ),
+        tools=tools if tools is not None else [JOB_SEARCH_TOOL()],
+        llm=make_llm("job_search_agent"),
+        verbose=True,
+        allow_delegation=False
+    )
+
+def make_recruiter_feedback_specialist():
+    return Agent(
+        role="Senior Talent Acquisition Consultant",
+        goal=("Provide comprehensive, actionable feedback from a recruiter's perspective, "
+              "including hiring recommendations, interview preparation advice, and career development suggestions"),
+        backstory=("You are a senior executive recruiter with 15+ years of experience placing candidates in top-tier companies."
+                   " You have worked across multiple industries and understand what hiring managers look for."
+                   " Your feedback is direct, actionable, and focused on helping candidates improve their marketability and interview success rate."),
+        llm=make_llm("recruiter_feedback_specialist"),
+        verbose=True,
+        allow_delegation=False
+    )
+
+URL_SOURCE_STEPS = {
+    "resume_url": "Extract complete resume text from the PDF URL: {resume_url}",
+    "github_url": "Gather GitHub profile information from: {github_url}",
+    "linkedin_url": "Collect LinkedIn profile data from: {linkedin_url}",
+}
+# Used instead of the step above for a source fetched ahead of the run by
+# prefetch.py; its data is a kickoff input and the agent gets no tool for it
+PREFETCHED_SOURCE_STEP = "Use the data already collected from {{{source}}} (do not fetch it again):\n{{prefetched_{source}}}"
+
+URL_FETCH_TOOLS = {
+    "resume_url": ResumeFetcherTool,
+    "github_url": GithubFetcherTool,
+    "linkedin_url": LinkedInFetcherTool,
+}
+JOB_SEARCH_TOOL = SerperDevTool
+# Request host behind each URL source, for its provider's circuit breaker;
+# resume URLs use their own (Drive or other) host
+SOURCE_HOSTS = {"github_url": "api.github.com", "linkedin_url": "api.brightdata.com"}
+
+if STUB_FETCHERS:
+    from stubs import STUB_FETCH_TOOLS as URL_FETCH_TOOLS, StubJobSearchTool as JOB_SEARCH_TOOL
+
+
+def make_url_fetch_task(agent, sources=tuple(URL_SOURCE_STEPS), prefetched=()):
+    steps = "\n".join(
+        f"    {i}. " + (PREFETCHED_SOURCE_STEP.format(source=source) if source in prefetched else URL_SOURCE_STEPS[source])
+        for i, source in enumerate(sources, 1)
+    )
+    description = f"""
+    Fetch and compile comprehensive professional data from the provided online sources:
+{steps}
+    """
+    if len(sources) == len(URL_SOURCE_STEPS):
+        # Static crews receive every URL key, some of them possibly empty.
+        description += """
     Handle cases where URLs might be empty or invalid gracefully.
     **IMPORTANT**
     If one of them url is missing don't call tool for that missing one
-    """,
-    expected_output="A structured summary containing complete data from available sources: resume text, GitHub profile details with repository information, and LinkedIn professional data",
-    agent=url_data_fetcher
-)
+    """
+    return Task(
+        description=description,
+        expected_output="A structured summary containing complete data from available sources: resume text, GitHub profile details with repository information, and LinkedIn professional data",
+        agent=agent
+    )
 
 # Updated File Processing Task
-file_process_task = Task(
-    description="""
-    Process and analyze uploaded resume documents:
-    
-    **IMPORTANT: Check if uploaded_file_path is provided in the inputs**
-    
-    Uploaded file path: {uploaded_file_path}
-    Target information: {target_input}
-    Input type: {input_type}
-    
-    If uploaded_file_path is provided and not empty:
-    1. Determine file type (PDF or DOCX) based on file extension
-    2. Use appropriate tool to extract all text content from the file
-    3. Identify and parse key sections:
-       - Contact information (name, email, phone, location)
-       - Professional summary/objective
-       - Work experience (companies, roles, dates, responsibilities)
-       - Education (degrees, institutions, graduation dates)
-       - Technical skills and competencies
-       - Certifications and licenses
-       - Projects and achievements
-       - Languages and additional skills
-    4. Structure the information in a clear, organized format
-    5. Highlight relevant keywords and phrases
-    6. Note any gaps or areas that need clarification
-    
-    If no uploaded_file_path is provided or path is empty:
-    - Return: "No resume file uploaded. Please upload a PDF or DOCX resume file for analysis."
-    
-    Focus on extracting comprehensive information that will be used for skills gap analysis and career guidance.
-    """,
-    expected_output="""
-    If file is processed successfully:
-    - Complete structured analysis of the uploaded resume including:
-      * Candidate contact information
-      * Professional summary
-      * Detailed work experience with dates and responsibilities  
-      * Educational background
-      * Technical skills and tools
-      * Certifications and achievements
-      * Projects and portfolio items
-      * Key strengths and areas of expertise
-    
-    If no file is uploaded:
-    - Clear message indicating no file was provided for analysis
-    """,
-    agent=file_processor
-)
-
-skills_analysis_task = Task(
-    description="""
-    Conduct a thorough skills gap analysis based on the collected candidate data and target requirements:
-    
-    Target information: {target_input}
-    Input type: {input_type}
-    
-    Analysis approach based on input type:
-    - If Job Role/Title: Research industry standards and requirements for this specific role
-    - If Job Description: Extract specific requirements, skills, and qualifications from the provided JD
-    - If Keywords: Focus analysis around the provided keywords and skills
-    
-    1. Identify current technical skills, tools, and technologies from candidate data
-    2. Compare against target requirements
-    3. Highlight missing critical skills and certifications
-    4. Suggest specific learning paths and resources
-    5. Prioritize skills based on market demand and career impact
-    
-    Consider both hard technical skills and soft skills relevant to the position.
-    """,
-    expected_output="Detailed skills gap analysis report with prioritized recommendations for skill development and specific learning resources",
-    agent=skills_gap_analyzer
-)
-experience_analysis_task = Task(
-    description="""
-    Evaluate the candidate's professional experience and career progression against target requirements:
-    
-    Target information: {target_input}
-    Input type: {input_type}
-    
-    Analysis approach based on input type:
-    - If Job Role/Title: Compare experience against typical requirements for this role level
-    - If Job Description: Match experience against specific requirements mentioned in the JD
-    - If Keywords: Assess how well current experience aligns with the target keywords/skills
-    
-    1. Assess career trajectory and growth pattern
-    2. Identify experience gaps for target requirements
-    3. Evaluate project complexity and impact
-    4. Analyze leadership and collaboration experiences
-    5. Compare experience level against target expectations
-    
-    Provide insights on how to better position existing experience and what additional experience is needed.
-    """,
-    expected_output="Comprehensive experience evaluation with specific recommendations for strengthening professional background",
-    agent=experience_evaluator
-)
-
-job_search_task = Task(
-    description="""
-    Search for relevant job opportunities based on the candidate profile and target requirements:
-    
-    Target information: {target_input}
-    Input type: {input_type}
-    Candidate skills and experience: [This will be populated from previous tasks]
-    
-    Search Strategy:
-    1. Analyze the candidate's profile to identify key skills, experience level, and role preferences
-    2. Create targeted search queries based on:
-       - If Job Role/Title: Search for similar and related roles
-       - If Job Description: Extract key requirements and search for matching positions
-       - If Keywords: Use keywords to find relevant opportunities
-    
-    3. Search across multiple platforms:
-       - LinkedIn Jobs (primary platform for professional roles)
-       - Indeed (broad job market coverage)
-       - Glassdoor (company insights and salary data)
-    
-    4. Filter and rank results by:
-       - Relevance to candidate profile
-       - Match with target requirements
-       - Company reputation and growth potential
-       - Salary range alignment
-       - Location preferences
-    
-    5. Focus on finding:
-       - Direct matches for target role
-       - Adjacent opportunities that could be stepping stones
-       - Companies known for hiring similar profiles
-       - Remote/hybrid opportunities if applicable
-    
-    Return top 15-20 most relevant opportunities with direct application links.
-    """,
-    expected_output="""
-    Curated list of job opportunities containing:
-    - Job title and company name
-    - Location and employment type
-    - Salary range (if available)
-    - Key requirements and qualifications
-    - Match percentage with candidate profile
-    - Direct application links
-    - Platform source (LinkedIn, Indeed, Glassdoor)
-    - Posted date and application deadline
-    - Brief analysis of why this opportunity matches the candidate
-    """,
-    agent=job_search_agent
-)
-
-# Enhanced Recruiter Feedback Task with Job Opportunities Integration
-recruiter_feedback_task = Task(
-    description="""
-    Provide comprehensive recruiter-style feedback, generate customized materials, and present relevant job opportunities based on target requirements:
-    
-    Target information: {target_input}
-    Input type: {input_type}
-    
-    Feedback approach based on input type:
-    - If Job Role/Title: Provide feedback specific to landing this type of role
-    - If Job Description: Give detailed feedback on fit for this specific position
-    - If Keywords: Focus feedback on how to strengthen alignment with these keywords/skills
-    
-    COMPREHENSIVE ANALYSIS AREAS:
-    1. Overall candidate assessment and marketability for the target
-    2. Specific strengths that make the candidate attractive
-    3. Key weaknesses that could impact hiring decisions
-    4. Resume and profile optimization recommendations including:
-       - Missing keywords that should be incorporated
-       - Experience gaps that need to be addressed or repositioned
-       - Layout and formatting improvements for better ATS compatibility
-       - Section restructuring recommendations
-       - Quantification opportunities for achievements
-    5. Interview preparation advice specific to the target
-    6. Salary negotiation insights based on current profile
-    7. Career development roadmap with timeline
-    
-    ADDITIONAL DELIVERABLES:
-    8. Generate a customized cover letter template that:
-       - Do not generate email look like cover letter
-       - Generate Resume like format
-       - Addresses specific requirements from the target job/role
-       - Highlights relevant experience and skills from candidate profile
-       - Uses appropriate tone and language for the target industry/role
-       - Includes placeholders for company-specific customization
-       - Demonstrates clear value proposition
-    
-    9. Simulate realistic recruiter feedback scenarios:
-       - Initial resume screening feedback (pass/fail with reasons)
-       - Phone screening talking points and potential questions
-       - Interview panel recommendations
-       - Reference check considerations
-       - Negotiation positioning advice
-    
-    10. Actionable improvement checklist with priority levels:
-        - High Priority: Critical issues that could eliminate candidacy
-        - Medium Priority: Improvements that would strengthen positioning
-        - Low Priority: Nice-to-have enhancements for competitive edge
-    
-    11. **RELEVANT JOB OPPORTUNITIES SECTION:**
-        - Present job search results from the job_search_task
-        - Categorize opportunities by fit level (Perfect Match, Good Match, Growth Opportunity)
-        - Provide application strategy for each opportunity
-        - Include direct clickable application links
-        - Suggest customization points for each application
-        - Prioritize opportunities based on candidate's current profile strength
-    
-    FORMATTING REQUIREMENTS:
-    - Structure the response with clear sections and headers
-    - Use bullet points for actionable items
-    - Include specific examples and recommendations
-    - Provide timeline estimates for improvements
-    - **Format job opportunities as clickable links with clear call-to-action buttons**
-    - Be direct, honest, and constructive in feedback
-    - Focus on practical steps the candidate can implement immediately
-    
-    TONE: Professional yet approachable, direct but encouraging, focused on practical actionability rather than generic advice.
-    """,
-    expected_output="""
-    A comprehensive recruiter assessment report containing:
-    
-    1. EXECUTIVE SUMMARY
-       - Overall candidacy strength (1-10 scale)
-       - Primary value propositions
-       - Critical improvement areas
-    
-    2. DETAILED ANALYSIS
-       - Strengths assessment with specific examples
-       - Weakness identification with improvement strategies
-       - Market positioning analysis
-    
-    3. RESUME OPTIMIZATION GUIDE
-       - Keyword integration recommendations
-       - Layout and formatting improvements
-       - Content restructuring suggestions
-       - ATS optimization tips
-    
-    4. CUSTOMIZED COVER LETTER TEMPLATE
-       - In Resume format 
-       - Tailored to target role/job description
-       - Incorporates candidate's strongest selling points
-       - Includes company customization placeholders
-    
-    5. INTERVIEW PREPARATION STRATEGY
-       - Likely questions based on profile gaps
-       - Recommended talking points
-       - Story banking suggestions (STAR method examples)
-    
-    6. RECRUITER SIMULATION FEEDBACK
-       - Initial screening assessment
-       - Hiring manager perspective
-       - Negotiation positioning advice
-    
-    7. PRIORITIZED ACTION PLAN
-       - High/Medium/Low priority improvements
-       - Timeline recommendations
-       - Resource suggestions for skill development
-    
-    8. SALARY NEGOTIATION INSIGHTS
-       - Market positioning assessment
-       - Negotiation leverage points
-       - Compensation discussion strategy
-    
-    9. **🎯 RELEVANT JOB OPPORTUNITIES**
-       - **Perfect Match Jobs (90%+ fit)**: Direct application ready
-       - **Good Match Jobs (70-89% fit)**: Minor improvements needed
-       - **Growth Opportunities (50-69% fit)**: Stepping stone positions
-       
-       For each opportunity:
-       - **[APPLY NOW]** - Direct clickable application link
-       - Company name and role title
-       - Key requirements match analysis
-       - Salary range and benefits
-       - Application deadline
-       - Customization strategy for this specific role
-       - Why this opportunity fits your profile
-    
-    10. **IMMEDIATE ACTION ITEMS**
-        - Jobs to apply for this week
-        - Profile improvements to make before applying
-        - Companies to research and network with
-        - Skills to highlight in applications
-    """,
-    agent=recruiter_feedback_specialist,
-    context=[job_search_task]  # This ensures job search results are available
-)
-
-url_crew = Crew(
-    agents=[url_data_fetcher, skills_gap_analyzer, experience_evaluator,job_search_agent, recruiter_feedback_specialist],
-    tasks=[url_fetch_task, skills_analysis_task, experience_analysis_task, job_search_task,recruiter_feedback_task],
-    verbose=True,
-    sequential=True
-)
-
-file_crew = Crew(
-    agents=[file_processor, skills_gap_analyzer, experience_evaluator,job_search_agent, recruiter_feedback_specialist],
-    tasks=[file_process_task, skills_analysis_task, experience_analysis_task, job_search_task,recruiter_feedback_task],
-    verbose=True,
-    sequential=True
-)
-hybrid_crew = Crew(
-    agents=[url_data_fetcher, file_processor, skills_gap_analyzer, experience_evaluator,job_search_agent, recruiter_feedback_specialist],
-    tasks=[url_fetch_task, file_process_task, skills_analysis_task, experience_analysis_task, job_search_task,recruiter_feedback_task],
-    verbose=True,
-    sequential=True
-)
\ No newline at end of file
+def make_file_process_task(agent):
+    return Task(
+        description="""
+        Process and analyze uploaded resume documents:
+        
+        **IMPORTANT: Check if uploaded_file_path is provided in the inputs**
+        
+        Uploaded file path: {uploaded_file_path}
+        
+        If uploaded_file_path is provided and not empty:
+        1. Determine file type (PDF or DOCX) based on file extension
+        2. Use appropriate tool to extract all text content from the file
+        3. Identify and parse key sections:
+           - Contact information (name, email, phone, location)
+           - Professional summary/objective
+           - Work experience (companies, roles, dates, responsibilities)
+           - Education (degrees, institutions, graduation dates)
+           - Technical skills and competencies
+           - Certifications and licenses
+           - Projects and achievements
+           - Languages and additional skills
+        4. Structure the information in a clear, organized format
+        5. Highlight relevant keywords and phrases
+        6. Note any gaps or areas that need clarification
+        
+        If no uploaded_file_path is provided or path is empty:
+        - Return: "No resume file uploaded. Please upload a PDF or DOCX resume file for analysis."
+        
+        Focus on extracting comprehensive information that will be used for skills gap analysis and career guidance.
+        """,
+        expected_output="""
+        If file is processed successfully:
+        - Complete structured analysis of the uploaded resume including:
+          * Candidate contact information
+          * Professional summary
+          * Detailed work experience with dates and responsibilities  
+          * Educational background
+          * Technical skills and tools
+          * Certifications and achievements
+          * Projects and portfolio items
+          * Key strengths and areas of expertise
+        
+        If no file is uploaded:
+        - Clear message indicating no file was provided for analysis
+        """,
+        agent=agent
+    )
+
+def make_resume_text_task(agent):
+    return Task(
+        description="""
+        Analyze the resume text extracted from the uploaded document:
+        
+        {resume_text}
+        
+        1. Identify and parse key sections:
+           - Contact information (name, email, phone, location)
+           - Professional summary/objective
+           - Work experience (companies, roles, dates, responsibilities)
+           - Education (degrees, institutions, graduation dates)
+           - Technical skills and competencies
+           - Certifications and licenses
+           - Projects and achievements
+           - Languages and additional skills
+        2. Structure the information in a clear, organized format
+        3. Highlight relevant keywords and phrases
+        4. Note any gaps or areas that need clarification
+        
+        Focus on extracting comprehensive information that will be used for skills gap analysis and career guidance.
+        """,
+        expected_output="""
+        Complete structured analysis of the uploaded resume including:
+          * Candidate contact information
+          * Professional summary
+          * Detailed work experience with dates and responsibilities  
+          * Educational background
+          * Technical skills and tools
+          * Certifications and achievements
+          * Projects and portfolio items
+          * Key strengths and areas of expertise
+        """,
+        agent=agent
+    )
+
+# Appended to the target-dependent tasks when the profile stages ran (or were
+# served from the stage cache) in a separate crew.
+PROFILE_CONTEXT = """
+        Candidate profile data collected from the provided sources:
+        {candidate_profile}
+        """
+
+# Precomputed by skills_taxonomy.py from the profile and target text.
+SKILL_DIFF_CONTEXT = """
+        Skills recognized locally from the profile and the target (canonical names; use this
+        list instead of re-extracting skills from the raw profile data):
+        {skill_diff}
+        """
+
+# From role_requirements.py for Job Role/Title targets.
+ROLE_CONTEXT = """
+        Precomputed requirements for the target role (start from these instead of researching
+        the role; adjust only where the target information says otherwise):
+        {role_requirements}
+        """
+
+# Used by multi-target runs to rank targets without an extra LLM call.
+FIT_SCORE_INSTRUCTION = """
+        Finish your answer with a single line in exactly this format: FIT SCORE: <0-100>
+        """
+
+
+def make_skills_analysis_task(agent, with_profile=False, fit_score=False):
+    return Task(
+        description="""
+        Conduct a thorough skills gap analysis based on the collected candidate data and target requirements:
+        
+        Target information: {target_input}
+        Input type: {input_type}
+        
+        Analysis approach based on input type:
+        - If Job Role/Title: Start from the precomputed role requirements below when provided, otherwise research industry standards for this specific role
+        - If Job Description: Work from the parsed JD requirements (must-haves, nice-to-haves, seniority, location, keywords)
+        - If Keywords: Focus analysis around the provided keywords and skills
+        
+        1. Identify current technical skills, tools, and technologies from candidate data
+        2. Compare against target requirements
+        3. Highlight missing critical skills and certifications
+        4. Suggest specific learning paths and resources
+        5. Prioritize skills based on market demand and career impact
+        
+        Consider both hard technical skills and soft skills relevant to the position.
+        """ + (PROFILE_CONTEXT + SKILL_DIFF_CONTEXT + ROLE_CONTEXT if with_profile else "") + (FIT_SCORE_INSTRUCTION if fit_score else ""),
+        expected_output="Detailed skills gap analysis report with prioritized recommendations for skill development and specific learning resources",
+        agent=agent
+    )
+def make_experience_analysis_task(agent, with_profile=False, fit_score=False):
+    return Task(
+        description="""
+        Evaluate the candidate's professional experience and career progression against target requirements:
+        
+        Target information: {target_input}
+        Input type: {input_type}
+        
+        Analysis approach based on input type:
+        - If Job Role/Title: Compare experience against the precomputed seniority and experience expectations below when provided, otherwise typical requirements for this role level
+        - If Job Description: Match experience against the parsed must-haves and seniority of the JD
+        - If Keywords: Assess how well current experience aligns with the target keywords/skills
+        
+        1. Assess career trajectory and growth pattern
+        2. Identify experience gaps for target requirements
+        3. Evaluate project complexity and impact
+        4. Analyze leadership and collaboration experiences
+        5. Compare experience level against target expectations
+        
+        Provide insights on how to better position existing experience and what additional experience is needed.
+        """ + (PROFILE_CONTEXT + ROLE_CONTEXT if with_profile else "") + (FIT_SCORE_INSTRUCTION if fit_score else ""),
+        expected_output="Comprehensive experience evaluation with specific recommendations for strengthening professional background",
+        agent=agent
+    )
+
+def make_job_search_task(agent):
+    return Task(
+        description="""
+        Search for relevant job opportunities based on the candidate profile and target requirements:
+        
+        Target information: {target_input}
+        Input type: {input_type}
+        Candidate skills and experience: [This will be populated from previous tasks]
+        
+        Search Strategy:
+        1. Analyze the candidate's profile to identify key skills, experience level, and role preferences
+        2. Create targeted search queries based on:
+           - If Job Role/Title: Search for similar and related roles
+           - If Job Description: Search for positions matching the parsed must-haves, seniority and location
+           - If Keywords: Use keywords to find relevant opportunities
+        
+        3. Search across multiple platforms:
+           - LinkedIn Jobs (primary platform for professional roles)
+           - Indeed (broad job market coverage)
+           - Glassdoor (company insights and salary data)
+        
+        4. Filter and rank results by:
+           - Relevance to candidate profile
+           - Match with target requirements
+           - Company reputation and growth potential
+           - Salary range alignment
+           - Location preferences
+        
+        5. Focus on finding:
+           - Direct matches for target role
+           - Adjacent opportunities that could be stepping stones
+           - Companies known for hiring similar profiles
+           - Remote/hybrid opportunities if applicable
+        
+        Return top 15-20 most relevant opportunities with direct application links.
+        """,
+        expected_output="""
+        Curated list of job opportunities containing:
+        - Job title and company name
+        - Location and employment type
+        - Salary range (if available)
+        - Key requirements and qualifications
+        - Match percentage with candidate profile
+        - Direct application links
+        - Platform source (LinkedIn, Indeed, Glassdoor)
+        - Posted date and application deadline
+        - Brief analysis of why this opportunity matches the candidate
+        """,
+        agent=agent
+    )
+
+# Enhanced Recruiter Feedback Task with Job Opportunities Integration.
+# Only the core report is written here; the heavy sections in REPORT_SECTIONS
+# are generated on demand by run_report_section and keep their numbers.
+def make_recruiter_feedback_task(agent, job_search_task):
+    return Task(
+        description="""
+        Provide comprehensive recruiter-style feedback and a prioritized plan based on target requirements:
+        
+        Target information: {target_input}
+        Input type: {input_type}
+        
+        Feedback approach based on input type:
+        - If Job Role/Title: Provide feedback specific to landing this type of role
+        - If Job Description: Give detailed feedback on fit for this specific position
+        - If Keywords: Focus feedback on how to strengthen alignment with these keywords/skills
+        
+        COMPREHENSIVE ANALYSIS AREAS:
+        1. Overall candidate assessment and marketability for the target
+        2. Specific strengths that make the candidate attractive
+        3. Key weaknesses that could impact hiring decisions
+        4. Resume and profile optimization recommendations including:
+           - Missing keywords that should be incorporated
+           - Experience gaps that need to be addressed or repositioned
+           - Layout and formatting improvements for better ATS compatibility
+           - Section restructuring recommendations
+           - Quantification opportunities for achievements
+        5. Interview preparation advice specific to the target
+        6. Career development roadmap with timeline
+        7. Actionable improvement checklist with priority levels:
+            - High Priority: Critical issues that could eliminate candidacy
+            - Medium Priority: Improvements that would strengthen positioning
+            - Low Priority: Nice-to-have enhancements for competitive edge
+        8. Immediate next steps, using the job search results from the job_search_task
+        
+        The cover letter template, recruiter simulation, salary negotiation insights and the
+        categorized job opportunities (report sections 4, 6, 8 and 9) are generated separately
+        on request. Do not write them.
+        
+        FORMATTING REQUIREMENTS:
+        - Structure the response with clear sections and headers
+        - Use bullet points for actionable items
+        - Include specific examples and recommendations
+        - Provide timeline estimates for improvements
+        - Be direct, honest, and constructive in feedback
+        - Focus on practical steps the candidate can implement immediately
+        
+        TONE: Professional yet approachable, direct but encouraging, focused on practical actionability rather than generic advice.
+        """,
+        expected_output="""
+        A recruiter assessment report containing exactly these sections, numbered as shown:
+        
+        1. EXECUTIVE SUMMARY
+           - Overall candidacy strength (1-10 scale)
+           - Primary value propositions
+           - Critical improvement areas
+        
+        2. DETAILED ANALYSIS
+           - Strengths assessment with specific examples
+           - Weakness identification with improvement strategies
+           - Market positioning analysis
+        
+        3. RESUME OPTIMIZATION GUIDE
+           - Keyword integration recommendations
+           - Layout and formatting improvements
+           - Content restructuring suggestions
+           - ATS optimization tips
+        
+        5. INTERVIEW PREPARATION STRATEGY
+           - Likely questions based on profile gaps
+           - Recommended talking points
+           - Story banking suggestions (STAR method examples)
+        
+        7. PRIORITIZED ACTION PLAN
+           - High/Medium/Low priority improvements
+           - Timeline recommendations
+           - Resource suggestions for skill development
+        
+        10. **IMMEDIATE ACTION ITEMS**
+            - Jobs to apply for this week
+            - Profile improvements to make before applying
+            - Companies to research and network with
+            - Skills to highlight in applications
+        """,
+        agent=agent,
+        context=[job_search_task]  # This ensures job search results are available
+    )
+
+
+# Report sections generated only when the user opens them: number -> (title,
+# what to write). Section numbers match the core report's.
+REPORT_SECTIONS = {
+    "4": ("CUSTOMIZED COVER LETTER TEMPLATE", """
+           - Do not generate email look like cover letter
+           - Generate Resume like format
+           - Addresses specific requirements from the target job/role
+           - Highlights relevant experience and skills from candidate profile
+           - Uses appropriate tone and language for the target industry/role
+           - Includes placeholders for company-specific customization
+           - Demonstrates clear value proposition
+        """),
+    "6": ("RECRUITER SIMULATION FEEDBACK", """
+           - Initial resume screening feedback (pass/fail with reasons)
+           - Phone screening talking points and potential questions
+           - Hiring manager perspective and interview panel recommendations
+           - Reference check considerations
+           - Negotiation positioning advice
+        """),
+    "8": ("SALARY NEGOTIATION INSIGHTS", """
+           - Market positioning assessment based on current profile
+           - Negotiation leverage points
+           - Compensation discussion strategy
+        """),
+    "9": ("RELEVANT JOB OPPORTUNITIES", """
+           - Present the job search results from the analysis
+           - Categorize opportunities by fit level:
+             **Perfect Match Jobs (90%+ fit)**: Direct application ready
+             **Good Match Jobs (70-89% fit)**: Minor improvements needed
+             **Growth Opportunities (50-69% fit)**: Stepping stone positions
+           - For each opportunity: **[APPLY NOW]** direct clickable application link, company name and role
+             title, key requirements match, salary range, application deadline, customization strategy and
+             why it fits the profile
+           - Prioritize opportunities based on candidate's current profile strength
+        """),
+}
+
+
+def make_report_section_task(agent, section):
+    title, instructions = REPORT_SECTIONS[section]
+    return Task(
+        description=f"""
+        Write section {section} ({title}) of the recruiter assessment report for this candidate.
+        
+        Target information: {{target_input}}
+        Input type: {{input_type}}
+        
+        The completed analysis (skills gap, experience review, job search results and the
+        core recruiter report) is below. Build on it; do not repeat the other sections.
+        {{analysis}}
+        
+        The section must cover:
+        {instructions}
+        TONE: Professional yet approachable, direct but encouraging, focused on practical actionability rather than generic advice.
+        """,
+        expected_output=f"The report section, starting with the heading line: {section}. {title}",
+        agent=agent
+    )
+
+def make_url_fetch_crew(sources, prefetched=(), snapshots=None):
+    # snapshots: source -> collection a prefetch started but did not finish
+    snapshots = snapshots or {}
+    fetcher = make_url_data_fetcher([
+        URL_FETCH_TOOLS[key](**({"snapshot_id": snapshots[key]} if key in snapshots else {}))
+        for key in sources if key not in prefetched
+    ])
+    return [fetcher], [make_url_fetch_task(fetcher, sources, prefetched)]
+
+
+def make_file_process_crew(resume_text, native=True):
+    if native:
+        processor = make_file_processor([])
+        return [processor], [make_resume_text_task(processor)]
+    # Opt-in RAG for very long documents, indexed from memory rather than a file.
+    # Each resume gets its own collection so a search never returns another
+    # candidate's chunks; chunk ids are content hashes, so re-adding is a no-op
+    collection = "resume_" + hashlib.sha256(resume_text.encode("utf-8")).hexdigest()[:16]
+    tool = RagTool(name="resume_search", description="Search the uploaded resume document.",
+                   collection_name=collection)
+    tool.add(resume_text, data_type="text")
+    processor = make_file_processor([tool])
+    return [processor], [make_file_process_task(processor)]
+
+
+def load_resume_text(inputs):
+    # Returns (text, native); native is False when the RAG path was opted into
+    upload = inputs["uploaded_file"]
+    text = document_text.extract_text(upload.data, upload.name)
+    return text, not (inputs.get("use_rag") and len(text) > RAG_MIN_CHARS)
+
+
+def crew_inputs(inputs):
+    # Kickoff inputs are interpolated into prompts; drop in-memory uploads etc.
+    # Prefetched data is passed per source by the URL fetch stage
+    return {
+        k: v for k, v in inputs.items()
+        if k != "prefetched" and isinstance(v, (str, int, float, bool, dict, list))
+    }
+
+
+def make_analysis_crew(with_profile=False):
+    skills = make_skills_gap_analyzer()
+    experience = make_experience_evaluator()
+    searcher = make_job_search_agent()
+    recruiter = make_recruiter_feedback_specialist()
+    search_task = make_job_search_task(searcher)
+    agents = [skills, experience, searcher, recruiter]
+    tasks = [
+        make_skills_analysis_task(skills, with_profile),
+        make_experience_analysis_task(experience, with_profile),
+        search_task,
+        make_recruiter_feedback_task(recruiter, search_task),
+    ]
+    return agents, tasks
+
+
+def provided_sources(inputs):
+    return [key for key in URL_FETCH_TOOLS if inputs.get(key)]
+
+
+@dataclass
+class AnalysisResult:
+    raw: str
+    tasks_output: list = field(default_factory=list)
+    stages: dict = field(default_factory=dict)
+    fingerprint: str = ""
+    usage: dict = field(default_factory=dict)
+    budget: dict = field(default_factory=dict)
+    degraded: dict = field(default_factory=dict)
+    # Skills found in the profile stage outputs, i.e. the candidate's own
+    candidate_skills: list = field(default_factory=list)
+
+
+def _kickoff(agents, tasks, inputs, sink=None):
+    def task_done(output):
+        if sink:
+            sink.task_done(output)
+        # Stop between tasks once the run is cancelled
+        cancellation.check()
+
+    crew = Crew(agents=agents, tasks=tasks, verbose=True, sequential=True, task_callback=task_done)
+    if sink is None:
+        return crew.kickoff(inputs=inputs)
+    with streaming.stream_to(sink):
+        return crew.kickoff(inputs=inputs)
+
+
+def _add_usage(usage, output):
+    # Sums a crew's token usage into usage; cached stages add nothing
+    metrics = getattr(output, "token_usage", None)
+    if usage is None or metrics is None:
+        return
+    for name, value in metrics.model_dump().items():
+        if isinstance(value, (int, float)):
+            usage[name] = usage.get(name, 0) + value
+
+
+DEGRADED_NOTICE = """
+DEGRADED MODE: these profile sources were skipped because their data provider is currently failing:
+{sources}
+Base the analysis on the remaining sources and state clearly in the report which data was unavailable.
+"""
+FAILED_SOURCES_NOTICE = """
+DEGRADED MODE: fetching these profile sources failed during this run:
+{sources}
+Base the analysis on the data that was collected and state clearly in the report which data was unavailable.
+"""
+
+
+def degraded_sources(inputs):
+    # {source: reason} for provided sources whose provider's circuit breaker
+    # is open; they are left out of the crew rather than waited on
+    degraded = {}
+    for source in provided_sources(inputs):
+        host = SOURCE_HOSTS.get(source) or ResumeFetcherTool()._convert_drive_link(inputs[source])
+        breaker = http_client.breaker(host)
+        if breaker.is_open():
+            degraded[source] = f"{breaker.name} unavailable ({breaker.reason})"
+    return degraded
+
+
+def _profile_stages(inputs, exclude=()):
+    # (stage name, cache key, label, factory) for each profile source; the
+    # factory returns the stage's agents, tasks and extra kickoff inputs.
+    stages = []
+    sources = [source for source in provided_sources(inputs) if source not in exclude]
+    if sources:
+        key = stage_cache.stage_key("url_fetch", **{k: inputs[k] for k in sources})
+        label = ", ".join(inputs[k] for k in sources)
+        prefetched = prefetch.usable(inputs.get("prefetched"), inputs, sources)
+        snapshots = prefetch.pending(inputs.get("prefetched"), inputs, sources)
+        stages.append(("url_fetch", key, label, lambda: (
+            *make_url_fetch_crew(sources, prefetched, snapshots),
+            {f"prefetched_{source}": data for source, data in prefetched.items()},
+        )))
+    upload = inputs.get("uploaded_file")
+    if upload:
+        key = stage_cache.stage_key(
+            "file_process",
+            digest=upload.digest(),
+            extension=upload.extension,
+            use_rag=bool(inputs.get("use_rag")),
+        )
+
+        def file_stage():
+            text, native = load_resume_text(inputs)
+            return (*make_file_process_crew(text, native), {"resume_text": text, "uploaded_file_path": upload.name})
+
+        stages.append(("file_process", key, upload.name, file_stage))
+    return stages
+
+
+def _budget_status(stage, agents, sink=None):
+    # "ran", or "partial" when a budget cut one of the stage's agents short;
+    # partial output is returned but never cached
+    if not run_budget.stopped(agent.llm for agent in agents):
+        return "ran"
+    if sink:
+        sink.stage(stage, "partial")
+    return "partial"
+
+
+def _skip_stage(stage, status, sink=None):
+    # Stages that have not started are skipped once the run budget is spent
+    if not run_budget.exhausted():
+        return False
+    status[stage] = "skipped"
+    if sink:
+        sink.stage(stage, "skipped")
+    return True
+
+
+def run_profile_stages(inputs, use_cache=True, sink=None, usage=None, degraded=None):
+    # degraded, if given, receives {source: reason} for sources left out or
+    # whose fetch failed during the run
+    skipped = degraded_sources(inputs)
+    if degraded is not None:
+        degraded.update(skipped)
+    stages = _profile_stages(inputs, exclude=skipped)
+    if not stages:
+        if skipped:
+            raise ValueError("No profile source is available: " + "; ".join(skipped.values()))
+        raise ValueError("At least one resume URL, GitHub URL, LinkedIn URL or uploaded file is required")
+
+    sections, status = [], {}
+    for source, reason in skipped.items():
+        print(f"🔌 Degraded mode, skipping {source}: {reason}")
+        status[source] = "degraded"
+        if sink:
+            sink.stage(source, "degraded")
+    if skipped:
+        sections.append(DEGRADED_NOTICE.format(
+            sources="\n".join(f"- {source}: {reason}" for source, reason in skipped.items())
+        ).strip())
+    for stage, key, label, factory in stages:
+        cancellation.check()
+        output = stage_cache.cache.get(key) if use_cache else None
+        if output is None:
+            if _skip_stage(stage, status, sink):
+                continue
+            if sink:
+                sink.stage(stage, "running")
+            agents, tasks, stage_inputs = factory()
+            failures = {}
+            reset = _source_failures.set(failures)
+            try:
+                crew_output = _kickoff(agents, tasks, crew_inputs({**inputs, **stage_inputs}), sink)
+            finally:
+                _source_failures.reset(reset)
+            _add_usage(usage, crew_output)
+            output = crew_output.raw
+            status[stage] = _budget_status(stage, agents, sink)
+            if failures:
+                print(f"🔌 Degraded mode, {stage} failed for {', '.join(failures)}")
+                status[stage] = "degraded"
+                if sink:
+                    sink.stage(stage, "degraded")
+                if degraded is not None:
+                    degraded.update(failures)
+                output = FAILED_SOURCES_NOTICE.format(
+                    sources="\n".join(f"- {source}: {reason}" for source, reason in failures.items())
+                ).strip() + "\n\n" + output
+            elif status[stage] == "ran":
+                stage_cache.cache.put(key, stage, output, label)
+        else:
+            status[stage] = "cached"
+            if sink:
+                sink.stage(stage, "cached")
+                sink.task(stage, output)
+        sections.append(output)
+    return "\n\n".join(sections), status
+
+
+def candidate_skills(profile):
+    return sorted(skills_taxonomy.extract_skills(profile), key=str.lower)
+
+
+def _result_lookup(inputs, target_input, kind, force):
+    # Returns (fingerprint, key, variant, stored result or None)
+    profile_fingerprint = result_cache.fingerprint(inputs)
+    variant = f"{kind}:v{RESULT_CACHE_VERSION}:rag={bool(inputs.get('use_rag'))}"
+    key = result_cache.result_key(profile_fingerprint, target_input, inputs.get("input_type"), variant)
+    stored = None if force else result_cache.cache.get(key)
+    return profile_fingerprint, key, variant, stored
+
+
+def run_analysis(inputs, use_cache=True, sink=None, force=False):
+    # Whole results are looked up by profile fingerprint and target first.
+    # Below that, profile stages are keyed by their source inputs only and the
+    # analysis stage by the profile plus target, so changing just the target
+    # re-runs only the target-dependent tasks. force bypasses both caches.
+    target_input = inputs.get("target_input")
+    profile_fingerprint, result_key, variant, stored = _result_lookup(inputs, target_input, "analysis", force)
+    if stored is not None:
+        if sink:
+            sink.stage("result", "cached")
+            for task in stored["tasks_output"]:
+                sink.task(task["agent"], task["raw"])
+        return AnalysisResult(**{**stored, "stages": {"result": "cached"}})
+
+    use_cache = use_cache and not force
+    usage, degraded = {}, {}
+    budget = new_run_budget()
+    with run_budget.track(budget):
+        profile, status = run_profile_stages(inputs, use_cache, sink, usage, degraded)
+        analysis = _analysis_stage(inputs, profile, status, use_cache, sink, usage)
+
+    print(f"🗂️ Stage status: {status}")
+    result = AnalysisResult(raw=analysis["raw"], tasks_output=analysis["tasks_output"], stages=status,
+                            fingerprint=profile_fingerprint, usage=usage, budget=budget.report(),
+                            degraded=degraded, candidate_skills=candidate_skills(profile))
+    if budget.partial:
+        print(f"💸 Run stopped early: {budget.exhausted or 'agent budget reached'}")
+    elif not degraded:
+        # Degraded results are not stored, so the full analysis runs once the provider recovers
+        result_cache.cache.put(result_key, profile_fingerprint, target_input, inputs.get("input_type"), variant, asdict(result))
+    return result
+
+
+def _ask(agent, prompt):
+    # One direct fast-tier call outside a crew; None on failure
+    llm = make_llm(agent)
+    try:
+        # Nobody watches these calls, so they are not streamed
+        with call_stream_override(llm, False):
+            text = llm.call([{"role": "user", "content": prompt}])
+    except Exception as e:
+        print(f"⚠️ {agent} call failed: {e}")
+        return None
+    return text if isinstance(text, str) else None
+
+
+def _generate_role_profile(title):
+    # Fills a role_requirements gap
+    return role_requirements.parse_profile(_ask("role_profiler", role_requirements.ROLE_PROFILE_PROMPT.format(title=title)))
+
+
+def _extract_job_description(text):
+    return job_description.parse_response(_ask("jd_parser", job_description.JD_PARSE_PROMPT.format(text=text)))
+
+
+def _target_context(profile, target_input, input_type):
+    # Prompt inputs derived from the target: the local skill diff, for job
+    # titles the precomputed role requirements, and for job descriptions the
+    # parsed requirements, which replace the raw JD text in every task
+    context = {"target_input": target_input}
+    requirements = None
+    target_text = target_input
+    if input_type == "Job Role/Title":
+        requirements = role_requirements.knowledge_base.lookup(target_input, generate=_generate_role_profile)
+        target_text = f"{target_input}\n{role_requirements.requirement_text(requirements)}"
+    elif input_type == "Job Description":
+        parsed = job_description.store.parse(target_input, extract=_extract_job_description)
+        context["target_input"] = job_description.format_requirements(parsed)
+        target_text = f"{target_input}\n{job_description.requirement_text(parsed)}"
+    context["skill_diff"] = skills_taxonomy.format_diff(skills_taxonomy.skill_diff(profile, target_text))
+    context["role_requirements"] = role_requirements.format_requirements(requirements)
+    return context
+
+
+def _analysis_stage(inputs, profile, status, use_cache, sink, usage):
+    context = _target_context(profile, inputs.get("target_input"), inputs.get("input_type"))
+    key = stage_cache.stage_key(
+        "analysis",
+        profile=hashlib.sha256(profile.encode("utf-8")).hexdigest(),
+        target_input=inputs.get("target_input"),
+        input_type=inputs.get("input_type"),
+        target_context=context["target_input"],
+        role_requirements=context["role_requirements"],
+    )
+    cached = stage_cache.cache.get(key) if use_cache else None
+    if cached is not None:
+        status["analysis"] = "cached"
+        if sink:
+            sink.stage("analysis", "cached")
+            for task in cached["tasks_output"]:
+                sink.task(task["agent"], task["raw"])
+        return cached
+    if _skip_stage("analysis", status, sink):
+        return {
+            "raw": f"⚠️ Stopped early ({run_budget.exhausted()}) before the analysis ran. "
+                   f"Profile gathered so far:\n\n{profile}",
+            "tasks_output": [],
+        }
+
+    cancellation.check()
+    if sink:
+        sink.stage("analysis", "running")
+    agents, tasks = make_analysis_crew(with_profile=True)
+    output = _kickoff(agents, tasks, {
+        "input_type": inputs.get("input_type"),
+        "candidate_profile": profile,
+        **context,
+    }, sink)
+    _add_usage(usage, output)
+    analysis = {
+        "raw": output.raw,
+        "tasks_output": [{"agent": t.agent, "raw": t.raw} for t in output.tasks_output],
+    }
+    status["analysis"] = _budget_status("analysis", agents, sink)
+    # An analysis of a degraded profile is not stored either
+    if status["analysis"] == "ran" and "degraded" not in status.values():
+        stage_cache.cache.put(key, "analysis", analysis, f"{inputs.get('input_type')}: {str(inputs.get('target_input'))[:60]}")
+    return analysis
+
+
+@dataclass
+class SectionResult:
+    section: str
+    title: str
+    raw: str
+    stages: dict = field(default_factory=dict)
+    usage: dict = field(default_factory=dict)
+    budget: dict = field(default_factory=dict)
+
+
+def run_report_section(inputs, tasks_output, section, use_cache=True, sink=None, force=False):
+    # Generates one of the REPORT_SECTIONS for a finished analysis, given its
+    # tasks_output. Stored in the result cache per analysis, so each section
+    # costs one recruiter turn the first time it is opened and nothing after.
+    if section not in REPORT_SECTIONS:
+        raise ValueError(f"Unknown report section {section!r}")
+    title = REPORT_SECTIONS[section][0]
+    analysis = "\n\n".join(f"{task['agent']}:\n{task['raw']}" for task in tasks_output)
+    if not analysis:
+        raise ValueError("The analysis has no task output to build the section from")
+    target_input = inputs.get("target_input")
+    analysis_digest = hashlib.sha256(analysis.encode("utf-8")).hexdigest()[:16]
+    _, key, variant, stored = _result_lookup(inputs, target_input, f"section{section}:{analysis_digest}", force or not use_cache)
+    if stored is not None:
+        if sink:
+            sink.stage(f"section_{section}", "cached")
+        return SectionResult(**{**stored, "stages": {f"section_{section}": "cached"}})
+
+    usage = {}
+    budget = new_run_budget()
+    with run_budget.track(budget):
+        cancellation.check()
+        if sink:
+            sink.stage(f"section_{section}", "running")
+        context = _target_context(analysis, target_input, inputs.get("input_type"))
+        recruiter = make_recruiter_feedback_specialist()
+        output = _kickoff([recruiter], [make_report_section_task(recruiter, section)], {
+            "target_input": context["target_input"],
+            "input_type": inputs.get("input_type"),
+            "analysis": analysis,
+        }, sink)
+        _add_usage(usage, output)
+        state = _budget_status(f"section_{section}", [recruiter], sink)
+
+    result = SectionResult(section=section, title=title, raw=output.raw, stages={f"section_{section}": state},
+                           usage=usage, budget=budget.report())
+    if state == "ran":
+        result_cache.cache.put(key, result_cache.fingerprint(inputs), target_input, inputs.get("input_type"), variant, asdict(result))
+    return result
+
+
+@dataclass
+class MultiTargetResult:
+    raw: str
+    matrix: list = field(default_factory=list)
+    targets: list = field(default_factory=list)
+    stages: dict = field(default_factory=dict)
+    fingerprint: str = ""
+    usage: dict = field(default_factory=dict)
+    budget: dict = field(default_factory=dict)
+    degraded: dict = field(default_factory=dict)
+    # Skills found in the profile stage outputs, i.e. the candidate's own
+    candidate_skills: list = field(default_factory=list)
+
+
+def _fit_score(text):
+    match = re.search(r"FIT SCORE:\s*(\d{1,3})", text or "", re.I)
+    return min(int(match.group(1)), 100) if match else None
+
+
+def _run_target_fit(profile, profile_digest, target_input, input_type, use_cache, store=True):
+    context = _target_context(profile, target_input, input_type)
+    key = stage_cache.stage_key(
+        "target_fit",
+        profile=profile_digest,
+        target_input=target_input,
+        input_type=input_type,
+        target_context=context["target_input"],
+        role_requirements=context["role_requirements"],
+    )
+    cached = stage_cache.cache.get(key) if use_cache else None
+    if cached is not None:
+        return cached, "cached"
+    if run_budget.exhausted():
+        notice = f"[Stopped early: {run_budget.exhausted()}]"
+        return {
+            "target_input": target_input, "input_type": input_type, "skills": notice, "experience": notice,
+            "skills_fit": None, "experience_fit": None, "usage": {},
+        }, "skipped"
+
+    cancellation.check()
+    skills = make_skills_gap_analyzer()
+    experience = make_experience_evaluator()
+    output = _kickoff([skills, experience], [
+        make_skills_analysis_task(skills, with_profile=True, fit_score=True),
+        make_experience_analysis_task(experience, with_profile=True, fit_score=True),
+    ], {
+        "input_type": input_type,
+        "candidate_profile": profile,
+        **context,
+    })
+    skills_raw, experience_raw = (t.raw for t in output.tasks_output)
+    usage = {}
+    _add_usage(usage, output)
+    result = {
+        "target_input": target_input,
+        "input_type": input_type,
+        "skills": skills_raw,
+        "experience": experience_raw,
+        "skills_fit": _fit_score(skills_raw),
+        "experience_fit": _fit_score(experience_raw),
+        "usage": usage,
+    }
+    state = _budget_status("target_fit", [skills, experience])
+    if state == "ran" and store:
+        stage_cache.cache.put(key, "target_fit", result, f"{input_type}: {target_input[:60]}")
+    return result, state
+
+
+def _comparison_matrix(results):
+    rows = []
+    for index, result in enumerate(results):
+        scores = [v for v in (result["skills_fit"], result["experience_fit"]) if v is not None]
+        rows.append({
+            "index": index,
+            "target": result["target_input"][:80],
+            "input_type": result["input_type"],
+            "skills_fit": result["skills_fit"],
+            "experience_fit": result["experience_fit"],
+            "overall_fit": round(sum(scores) / len(scores)) if scores else None,
+        })
+    rows.sort(key=lambda row: -1 if row["overall_fit"] is None else row["overall_fit"], reverse=True)
+    for rank, row in enumerate(rows, 1):
+        row["rank"] = rank
+    return rows
+
+
+def run_multi_target(inputs, targets, max_workers=None, use_cache=True, sink=None, force=False):
+    # One profile, many targets: the profile stages run (or hit the cache) once
+    # and only the skills/experience tasks fan out per target, in parallel.
+    # targets is a list of target strings or (target_input, input_type) pairs.
+    targets = [
+        (t, inputs.get("input_type")) if isinstance(t, str) else tuple(t)
+        for t in targets if t
+    ]
+    if not targets:
+        raise ValueError("At least one target is required")
+
+    target_input = json.dumps(targets)
+    profile_fingerprint, result_key, variant, stored = _result_lookup(inputs, target_input, "multi_target", force)
+    if stored is not None:
+        if sink:
+            sink.stage("result", "cached")
+        return MultiTargetResult(**{**stored, "stages": {"result": "cached"}})
+
+    use_cache = use_cache and not force
+    usage, degraded = {}, {}
+    workers = max(1, min(max_workers or MULTI_TARGET_WORKERS, len(targets)))
+    budget = new_run_budget(len(targets), workers)
+    with run_budget.track(budget):
+        profile, status = run_profile_stages(inputs, use_cache, sink, usage, degraded)
+    profile_digest = hashlib.sha256(profile.encode("utf-8")).hexdigest()
+
+    with ThreadPoolExecutor(max_workers=workers) as pool, run_budget.track(budget):
+        # Each target runs in a copy of this context so it charges the run's
+        # budget and sees the run's cancellation token
+        futures = [
+            pool.submit(contextvars.copy_context().run, _run_target_fit,
+                        profile, profile_digest, target_input, input_type, use_cache, not degraded)
+            for target_input, input_type in targets
+        ]
+        results = []
+        for i, future in enumerate(futures, 1):
+            result, state = future.result()
+            status[f"target_fit_{i}"] = state
+            results.append(result)
+            if state in ("ran", "partial"):
+                for name, value in result.get("usage", {}).items():
+                    usage[name] = usage.get(name, 0) + value
+            if sink:
+                sink.task(f"Target {i}: {result['target_input'][:60]}", result["skills"] + "\n\n" + result["experience"])
+
+    matrix = _comparison_matrix(results)
+    lines = ["| Rank | Target | Skills fit | Experience fit | Overall fit |", "|---|---|---|---|---|"]
+    for row in matrix:
+        lines.append(f"| {row['rank']} | {row['target']} | {row['skills_fit']} | {row['experience_fit']} | {row['overall_fit']} |")
+
+    print(f"🗂️ Stage status: {status}")
+    result = MultiTargetResult(raw="\n".join(lines), matrix=matrix, targets=results, stages=status,
+                               fingerprint=profile_fingerprint, usage=usage, budget=budget.report(),
+                               degraded=degraded, candidate_skills=candidate_skills(profile))
+    if budget.partial:
+        print(f"💸 Run stopped early: {budget.exhausted or 'agent budget reached'}")
+    elif not degraded:
+        result_cache.cache.put(result_key, profile_fingerprint, target_input, inputs.get("input_type"), variant, asdict(result))
+    return result
@@ -0,0 +1,201 @@
+import asyncio
+import json
+import os
+import socket
+import threading
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, File, Form, HTTPException, Request, UploadFile
+from fastapi.responses import StreamingResponse
+
+import http_client
+import job_queue
+import llm_gateway
+import uploads
+import worker
+
+# Async HTTP API over the analysis job queue, for ATS integrations:
+#
+#     POST /analyses                 submit URLs and/or a resume file
+#     GET  /analyses/{id}            poll status
+#     GET  /analyses/{id}/result     fetch the structured result
+#     GET  /analyses/{id}/events     progress as server-sent events
+#     POST /analyses/{id}/cancel     stop a queued or running analysis
+#     POST /analyses/{id}/sections/{n}
+#                                    generate one of the on-demand report
+#                                    sections (4, 6, 8, 9) of a finished
+#                                    analysis; returns a new job
+#
+# Jobs run on a bounded set of embedded worker threads (API_WORKERS, 0 to
+# rely on separate worker.py processes) and submissions are rejected with 429
+# once API_MAX_PENDING jobs are waiting. For local load tests run with stubbed
+# LLM and fetchers:
+#
+#     STUB_LLM=1 STUB_FETCHERS=1 uvicorn api_server:app
+
+API_WORKERS = int(os.getenv("API_WORKERS", "2"))
+MAX_PENDING = int(os.getenv("API_MAX_PENDING", "100"))
+EVENT_POLL_SECONDS = 0.5
+INPUT_TYPES = ("Job Role/Title", "Job Description", "Keywords/Skills")
+
+
+@asynccontextmanager
+async def lifespan(app):
+    host = socket.gethostname()
+    for i in range(API_WORKERS):
+        threading.Thread(
+            target=worker.work_loop,
+            args=(f"api-{host}-{os.getpid()}-{i}",),
+            daemon=True
+        ).start()
+    yield
+
+
+app = FastAPI(title="AI Career Assistant API", lifespan=lifespan)
+
+
+def _links(job_id):
+    return {
+        "status": f"/analyses/{job_id}",
+        "result": f"/analyses/{job_id}/result",
+        "events": f"/analyses/{job_id}/events",
+        "cancel": f"/analyses/{job_id}/cancel",
+    }
+
+
+async def _job_or_404(job_id):
+    job = await asyncio.to_thread(job_queue.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Analysis not found")
+    return job
+
+
+@app.post("/analyses", status_code=202)
+async def submit_analysis(
+    target_input: str = Form("General Professional Position"),
+    input_type: str = Form("Job Role/Title"),
+    resume_url: str = Form(""),
+    github_url: str = Form(""),
+    linkedin_url: str = Form(""),
+    targets: list[str] = Form([]),
+    use_rag: bool = Form(False),
+    force: bool = Form(False),
+    file: UploadFile | None = File(None),
+):
+    if input_type not in INPUT_TYPES:
+        raise HTTPException(status_code=422, detail=f"input_type must be one of {list(INPUT_TYPES)}")
+    if not (resume_url or github_url or linkedin_url or file):
+        raise HTTPException(status_code=422, detail="Provide at least one URL or a resume file")
+
+    counts = await asyncio.to_thread(job_queue.counts)
+    if counts.get(job_queue.QUEUED, 0) >= MAX_PENDING:
+        raise HTTPException(status_code=429, detail="Too many pending analyses, retry later")
+
+    inputs = {
+        "target_input": target_input,
+        "input_type": input_type,
+        "use_rag": use_rag,
+        "resume_url": resume_url,
+        "github_url": github_url,
+        "linkedin_url": linkedin_url,
+    }
+    if file is not None:
+        if os.path.splitext(file.filename or "")[1].lower() not in (".pdf", ".docx"):
+            raise HTTPException(status_code=422, detail="Resume file must be PDF or DOCX")
+        inputs["uploaded_file"] = uploads.UploadedResume(file.filename, await file.read())
+
+    options = {"force": force}
+    kind = "analysis"
+    if targets:
+        kind = "multi_target"
+        options["targets"] = [target_input] + targets
+
+    job_id = await asyncio.to_thread(job_queue.submit, kind, inputs, options)
+    return {"id": job_id, "state": job_queue.QUEUED, "links": _links(job_id)}
+
+
+@app.get("/analyses/{job_id}")
+async def analysis_status(job_id: str):
+    job = await _job_or_404(job_id)
+    return {
+        "id": job["id"],
+        "kind": job["kind"],
+        "state": job["state"],
+        "attempts": job["attempts"],
+        "created": job["created"],
+        "started": job["started"],
+        "finished": job["finished"],
+        "error": job["error"],
+        "links": _links(job["id"]),
+    }
+
+
+@app.get("/analyses/{job_id}/result")
+async def analysis_result(job_id: str):
+    job = await _job_or_404(job_id)
+    if job["state"] in (job_queue.FAILED, job_queue.CANCELLED):
+        raise HTTPException(status_code=409, detail={"state": job["state"], "error": job["error"]})
+    if job["state"] != job_queue.DONE:
+        raise HTTPException(status_code=409, detail={"state": job["state"]})
+    return {"id": job["id"], "kind": job["kind"], "result": job["result"]}
+
+
+@app.get("/analyses/{job_id}/events")
+async def analysis_events(job_id: str, request: Request):
+    await _job_or_404(job_id)
+    last_event = int(request.headers.get("Last-Event-ID") or 0)
+
+    async def stream():
+        nonlocal last_event
+        while True:
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            for event_id, kind, data in await asyncio.to_thread(job_queue.events, job_id, last_event):
+                last_event = event_id
+                yield f"id: {event_id}\nevent: {kind}\ndata: {json.dumps(data)}\n\n"
+            if job["state"] in job_queue.FINISHED:
+                yield f"event: end\ndata: {json.dumps({'state': job['state'], 'error': job['error']})}\n\n"
+                return
+            if await request.is_disconnected():
+                return
+            await asyncio.sleep(EVENT_POLL_SECONDS)
+
+    return StreamingResponse(stream(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.post("/analyses/{job_id}/cancel", status_code=202)
+async def cancel_analysis(job_id: str):
+    await _job_or_404(job_id)
+    state = await asyncio.to_thread(job_queue.cancel, job_id)
+    return {"id": job_id, "state": state, "links": _links(job_id)}
+
+
+@app.post("/analyses/{job_id}/sections/{section}", status_code=202)
+async def request_report_section(job_id: str, section: str):
+    from Main_Server import REPORT_SECTIONS
+
+    job = await _job_or_404(job_id)
+    if section not in REPORT_SECTIONS:
+        raise HTTPException(status_code=404, detail=f"section must be one of {list(REPORT_SECTIONS)}")
+    if job["kind"] != "analysis" or job["state"] != job_queue.DONE:
+        raise HTTPException(status_code=409, detail={"state": job["state"], "kind": job["kind"]})
+    options = {"section": section, "tasks_output": job["result"]["tasks_output"]}
+    section_job = await asyncio.to_thread(job_queue.submit, "report_section", job["inputs"], options)
+    return {"id": section_job, "state": job_queue.QUEUED, "links": _links(section_job)}
+
+
+@app.get("/health")
+async def health():
+    return {
+        "status": "ok",
+        "jobs": await asyncio.to_thread(job_queue.counts),
+        "llm": llm_gateway.metrics(),
+        "llm_latency": llm_gateway.latency_metrics(),
+        "http": http_client.metrics(),
+        "breakers": http_client.breakers(),
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
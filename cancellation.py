@@ -0,0 +1,119 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Cooperative cancellation for analysis runs. The worker opens a scope with a
+# CancelToken around each job and trips it when the job is cancelled or its
+# UI session goes away. The runner checks it between stages and tasks, tools
+# and polling loops check it between steps and sleep on it, and in-flight LLM
+# and HTTP calls are waited on in slices so a cancelled run walks away from
+# them and releases its worker within about a second. The abandoned call
+# stops at its next stream chunk (streamed completions, HTTP bodies); until
+# then, and for a non-streamed completion or an HTTP request still waiting
+# for its response headers, it finishes in the background.
+
+POLL_SECONDS = float(os.getenv("CANCEL_POLL_SECONDS", "0.5"))
+
+_current = contextvars.ContextVar("cancel_token", default=None)
+
+
+class Cancelled(BaseException):
+    # BaseException, like asyncio.CancelledError, so generic "except
+    # Exception" handlers in tools and in crewai's retry loops let it through
+    pass
+
+
+class CancelToken:
+    def __init__(self):
+        self.reason = None
+        self._event = threading.Event()
+
+    def cancel(self, reason="cancelled"):
+        if not self._event.is_set():
+            self.reason = reason
+            self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+    def check(self):
+        if self._event.is_set():
+            raise Cancelled(self.reason)
+
+    def wait(self, seconds):
+        # True when cancelled before the time is up
+        return self._event.wait(seconds)
+
+
+@contextmanager
+def scope(token):
+    handle = _current.set(token)
+    try:
+        yield token
+    finally:
+        _current.reset(handle)
+
+
+def current():
+    return _current.get()
+
+
+def check():
+    token = _current.get()
+    if token is not None:
+        token.check()
+
+
+def sleep(seconds):
+    token = _current.get()
+    if token is None:
+        time.sleep(seconds)
+        return
+    if token.wait(seconds):
+        raise Cancelled(token.reason)
+
+
+def iterate(iterable):
+    # Checks for cancellation between items, e.g. chunks of a download
+    for item in iterable:
+        check()
+        yield item
+
+
+def call(fn, timeout=None, timeout_error=TimeoutError):
+    # Runs fn on a helper thread carrying the caller's context so the caller
+    # can stop waiting: raises Cancelled when the token trips and
+    # timeout_error after timeout seconds. Without either it just calls fn.
+    token = _current.get()
+    if token is None and timeout is None:
+        return fn()
+    if token is not None:
+        token.check()
+    outcome = {}
+    context = contextvars.copy_context()
+
+    def target():
+        try:
+            outcome["result"] = context.run(fn)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise timeout_error(f"Call exceeded its {timeout:g}s budget")
+        slice_seconds = POLL_SECONDS if remaining is None else min(POLL_SECONDS, remaining)
+        thread.join(slice_seconds)
+        if not thread.is_alive():
+            break
+        if token is not None and token.cancelled:
+            raise Cancelled(token.reason)
+    if "error" in outcome:
+        raise outcome["error"]
+    return outcome["result"]
@@ -0,0 +1,102 @@
+import os
+import zipfile
+from io import BytesIO
+from xml.etree.ElementTree import iterparse
+
+import fitz
+
+# Native text extraction for uploaded resumes. A two-page resume does not need
+# chunking, embedding and a vector store round trip; the text goes straight
+# into the file processing task.
+
+W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _as_stream(source):
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return BytesIO(source)
+    return source
+
+
+def extract_pdf_text(source):
+    if isinstance(source, (str, os.PathLike)):
+        doc = fitz.open(source)
+    else:
+        data = source.read() if hasattr(source, "read") else source
+        if isinstance(data, memoryview):
+            data = data.tobytes()
+        doc = fitz.open(stream=data, filetype="pdf")
+    with doc:
+        return "".join(page.get_text() for page in doc)
+
+
+def _iter_docx_blocks(xml):
+    # Stream-parse word/document.xml: paragraphs as lines, list items as
+    # indented bullets, headings as markdown headings and table rows as
+    # pipe-separated cells. Elements are cleared once consumed.
+    runs = []
+    table_depth = 0
+    cells, cell_parts = [], []
+    list_level = None
+    heading = False
+
+    for event, elem in iterparse(xml, events=("start", "end")):
+        tag = elem.tag
+        if event == "start":
+            if tag == W + "tbl":
+                table_depth += 1
+            elif tag == W + "p":
+                runs, list_level, heading = [], None, False
+            continue
+
+        if tag == W + "t":
+            runs.append(elem.text or "")
+        elif tag == W + "tab":
+            runs.append("\t")
+        elif tag in (W + "br", W + "cr"):
+            runs.append("\n")
+        elif tag == W + "pStyle":
+            heading = (elem.get(W + "val") or "").lower().startswith(("heading", "title"))
+        elif tag == W + "ilvl":
+            list_level = int(elem.get(W + "val") or 0)
+        elif tag == W + "numPr" and list_level is None:
+            list_level = 0
+        elif tag == W + "p":
+            text = "".join(runs).strip()
+            if text:
+                if list_level is not None:
+                    text = "  " * list_level + "- " + text
+                elif heading:
+                    text = "## " + text
+                if table_depth:
+                    cell_parts.append(text)
+                else:
+                    yield text
+            elem.clear()
+        elif tag == W + "tc" and table_depth == 1:
+            cells.append(" ".join(cell_parts))
+            cell_parts = []
+        elif tag == W + "tr" and table_depth == 1:
+            if any(cells):
+                yield "| " + " | ".join(cells) + " |"
+            cells = []
+            elem.clear()
+        elif tag == W + "tbl":
+            table_depth -= 1
+            if not table_depth:
+                elem.clear()
+
+
+def extract_docx_text(source):
+    with zipfile.ZipFile(_as_stream(source)) as archive:
+        with archive.open("word/document.xml") as xml:
+            return "\n".join(_iter_docx_blocks(xml))
+
+
+def extract_text(source, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".docx":
+        return extract_docx_text(source)
+    if extension == ".pdf":
+        return extract_pdf_text(source)
+    raise ValueError(f"Unsupported resume format: {extension or filename}")
@@ -0,0 +1,154 @@
+import contextvars
+import math
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+
+import requests
+
+import http_client
+import stage_cache
+
+# Enriches a GitHub profile beyond each repo's primary language: for the
+# top-N repos (by stars and recency) it fetches the /languages byte breakdown
+# and a truncated README with bounded concurrency, caches both per repo until
+# its pushed_at changes, and folds the byte counts into one language-weight
+# vector for the candidate. Only complete answers are cached; a repo whose
+# fetch fails keeps its basic data, and enrichment is cut down or skipped
+# when the GitHub rate-limit quota is running out.
+
+TOP_N = int(os.getenv("GITHUB_ENRICH_TOP_N", "10"))
+CONCURRENCY = int(os.getenv("GITHUB_ENRICH_CONCURRENCY", "6"))
+README_CHARS = int(os.getenv("GITHUB_README_CHARS", "1200"))
+# Recency half-life, in days, used when ranking repos
+RECENCY_HALF_LIFE_DAYS = 180
+MAX_LANGUAGES = 10
+# Requests left in the GitHub quota that enrichment never spends
+RATE_LIMIT_RESERVE = int(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "10"))
+# Two requests per repo: /languages and /readme
+REQUESTS_PER_REPO = 2
+
+repo_cache = stage_cache.StageCache(
+    path=os.getenv("GITHUB_REPO_CACHE_PATH", os.path.join("db", "github_repos.sqlite3")),
+    max_entries=int(os.getenv("GITHUB_REPO_CACHE_MAX_ENTRIES", "2048")),
+)
+
+_BADGE_LINE = re.compile(r"^\s*(\[!\[|!\[|<img|<p align|<a href)", re.I)
+
+
+def _age_days(pushed_at):
+    if not pushed_at:
+        return None
+    try:
+        pushed = datetime.fromisoformat(pushed_at.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return max(0.0, (datetime.now(timezone.utc) - pushed).total_seconds() / 86400)
+
+
+def repo_score(repo):
+    stars = math.log1p(repo.get("stargazers_count") or 0)
+    age = _age_days(repo.get("pushed_at"))
+    recency = 0.0 if age is None else 2 ** (-age / RECENCY_HALF_LIFE_DAYS)
+    return stars + 2 * recency
+
+
+def top_repos(repos, n=TOP_N):
+    owned = [r for r in repos if isinstance(r, dict) and not r.get("fork")]
+    return sorted(owned, key=repo_score, reverse=True)[:n]
+
+
+def _clean_readme(text):
+    lines = [line for line in text.splitlines() if line.strip() and not _BADGE_LINE.match(line)]
+    text = "\n".join(lines)
+    return text[:README_CHARS] + ("…" if len(text) > README_CHARS else "")
+
+
+def _fetch_repo(repo, headers):
+    full_name = repo["full_name"]
+    key = stage_cache.stage_key("github_repo", repo=full_name, pushed_at=repo.get("pushed_at"))
+    cached = repo_cache.get(key)
+    if cached is not None:
+        return cached
+
+    base = f"https://api.github.com/repos/{full_name}"
+    languages = {}
+    languages_response = http_client.get(f"{base}/languages", headers=headers)
+    if languages_response.ok:
+        languages = languages_response.json()
+    readme = ""
+    readme_response = http_client.get(f"{base}/readme", headers={**headers, "Accept": "application/vnd.github.raw"})
+    if readme_response.ok:
+        readme = _clean_readme(readme_response.text)
+
+    value = {"languages": languages, "readme": readme}
+    # A 403/5xx is not the repo's answer; a missing README (404) is
+    if languages_response.ok and (readme_response.ok or readme_response.status_code == 404):
+        repo_cache.put(key, "github_repo", value, full_name)
+    return value
+
+
+def _fetch_repo_or_basic(repo, headers):
+    try:
+        return _fetch_repo(repo, headers)
+    except requests.exceptions.RequestException as e:
+        print(f"⚠️ Could not enrich {repo.get('full_name')}: {e}")
+        return {"languages": {}, "readme": ""}
+
+
+def _quota_allows(remaining, n):
+    # Number of repos the remaining GitHub quota can pay for, at most n
+    if remaining is None:
+        return n
+    try:
+        remaining = int(remaining)
+    except (TypeError, ValueError):
+        return n
+    return max(0, min(n, (remaining - RATE_LIMIT_RESERVE) // REQUESTS_PER_REPO))
+
+
+def language_weights(enriched):
+    totals = {}
+    for repo in enriched:
+        for language, size in repo["languages"].items():
+            totals[language] = totals.get(language, 0) + size
+    total = sum(totals.values())
+    if not total:
+        return {}
+    ranked = sorted(totals.items(), key=lambda item: item[1], reverse=True)[:MAX_LANGUAGES]
+    return {language: round(size / total, 3) for language, size in ranked}
+
+
+def enrich(repos, headers=None, n=TOP_N, remaining=None):
+    # remaining: X-RateLimit-Remaining of the last GitHub response, if known
+    headers = headers or {}
+    selected = top_repos(repos, n)
+    allowed = _quota_allows(remaining, len(selected))
+    if allowed < len(selected):
+        print(f"⚠️ GitHub quota low ({remaining} requests left): enriching {allowed} of {len(selected)} repos")
+        selected = selected[:allowed]
+    if not selected:
+        return {"top_repos": [], "language_weights": {}}
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, min(CONCURRENCY, len(selected) or 1))) as pool:
+        # Each fetch runs in a copy of the caller's context so the run's
+        # cancellation token and budget apply inside the pool
+        futures = [
+            pool.submit(contextvars.copy_context().run, _fetch_repo_or_basic, repo, headers)
+            for repo in selected
+        ]
+        details = [future.result() for future in futures]
+    enriched = [
+        {
+            "name": repo.get("name"),
+            "stars": repo.get("stargazers_count"),
+            "pushed_at": repo.get("pushed_at"),
+            "languages": detail["languages"],
+            "readme": detail["readme"],
+        }
+        for repo, detail in zip(selected, details)
+    ]
+    print(f"🐙 Enriched {len(enriched)} repos in {time.monotonic() - start:.2f}s")
+    return {"top_repos": enriched, "language_weights": language_weights(enriched)}
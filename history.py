@@ -0,0 +1,179 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from datetime import datetime
+from urllib.parse import urlsplit
+
+import sqlite_store
+
+# Searchable history of completed analyses. Every finished job is stored with
+# its report, the report's numbered sections, inputs, timings and token usage;
+# an FTS5 index over candidate, target, skills and report text keeps search
+# across thousands of analyses well under a second. Skills are the
+# candidate's own, found in the profile stage outputs; the report also names
+# the skills they are missing.
+
+DB_PATH = os.getenv("HISTORY_PATH", os.path.join("db", "history.sqlite3"))
+
+_SECTION = re.compile(r"^\s*(?:#+\s*)?\**\s*(\d{1,2})\.\s+([A-Z][^\n]*?)\**\s*:?\s*$", re.M)
+_FTS_TOKEN = re.compile(r"\w[\w+#.-]*")
+
+
+def parse_sections(report):
+    # "7. PRIORITIZED ACTION PLAN" -> {"7. PRIORITIZED ACTION PLAN": "..."}
+    matches = list(_SECTION.finditer(report or ""))
+    sections = {}
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(report)
+        sections[f"{match.group(1)}. {match.group(2).strip()}"] = report[match.end():end].strip()
+    return sections
+
+
+def candidate_label(inputs):
+    for key in ("linkedin_url", "github_url"):
+        if inputs.get(key):
+            return urlsplit(inputs[key]).path.strip("/").split("/")[-1]
+    if inputs.get("upload_name"):
+        return os.path.splitext(inputs["upload_name"])[0]
+    return inputs.get("resume_url") or "unknown"
+
+
+def _fts_query(text, column=None):
+    # Quote each token so user input never breaks FTS5 syntax; the last token
+    # is a prefix match for search-as-you-type
+    tokens = _FTS_TOKEN.findall(text or "")
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens[:-1]] + [f'"{tokens[-1]}"*']
+    query = " ".join(terms)
+    return f"{column} : ({query})" if column else query
+
+
+class HistoryStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        sqlite_store.prepare(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS analyses (
+                    id INTEGER PRIMARY KEY,
+                    job_id TEXT UNIQUE,
+                    created REAL NOT NULL,
+                    kind TEXT NOT NULL,
+                    candidate TEXT,
+                    target_input TEXT,
+                    input_type TEXT,
+                    fingerprint TEXT,
+                    skills TEXT,
+                    report TEXT NOT NULL,
+                    sections TEXT,
+                    inputs TEXT,
+                    timings TEXT,
+                    usage TEXT,
+                    result TEXT
+                );
+                CREATE INDEX IF NOT EXISTS analyses_created ON analyses (created);
+                CREATE VIRTUAL TABLE IF NOT EXISTS analyses_fts USING fts5(
+                    candidate, target_input, skills, report,
+                    content='analyses', content_rowid='id', tokenize='unicode61'
+                );
+                CREATE TRIGGER IF NOT EXISTS analyses_ai AFTER INSERT ON analyses BEGIN
+                    INSERT INTO analyses_fts (rowid, candidate, target_input, skills, report)
+                    VALUES (new.id, new.candidate, new.target_input, new.skills, new.report);
+                END;
+                CREATE TRIGGER IF NOT EXISTS analyses_ad AFTER DELETE ON analyses BEGIN
+                    INSERT INTO analyses_fts (analyses_fts, rowid, candidate, target_input, skills, report)
+                    VALUES ('delete', old.id, old.candidate, old.target_input, old.skills, old.report);
+                END;
+            """)
+
+    def _connect(self):
+        return sqlite_store.connect(self.path, row_factory=sqlite3.Row)
+
+    def record(self, kind, inputs, result, timings=None, job_id=None):
+        report = result.get("raw", "")
+        if kind == "multi_target":
+            report = "\n\n".join([report] + [
+                f"## {t['target_input']}\n{t['skills']}\n\n{t['experience']}" for t in result.get("targets", [])
+            ])
+        skills = result.get("candidate_skills") or []
+        with self._lock, self._connect() as conn:
+            conn.execute("DELETE FROM analyses WHERE job_id = ?", (job_id,))
+            cursor = conn.execute(
+                "INSERT INTO analyses (job_id, created, kind, candidate, target_input, input_type, fingerprint, "
+                "skills, report, sections, inputs, timings, usage, result) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    job_id, time.time(), kind, candidate_label(inputs), inputs.get("target_input"),
+                    inputs.get("input_type"), result.get("fingerprint"), ", ".join(skills), report,
+                    json.dumps(parse_sections(result.get("raw", ""))), json.dumps(inputs),
+                    json.dumps(timings or {}), json.dumps(result.get("usage") or {}), json.dumps(result),
+                ),
+            )
+            return cursor.lastrowid
+
+    def search(self, query="", candidate="", role="", skill="", since=None, until=None, limit=50):
+        # since/until are dates, datetimes or timestamps; returns summary rows, newest first
+        clauses = [q for q in (
+            _fts_query(query),
+            _fts_query(candidate, "candidate"),
+            _fts_query(role, "target_input"),
+            _fts_query(skill, "skills"),
+        ) if q]
+        where, params = [], []
+        if clauses:
+            where.append("analyses.id IN (SELECT rowid FROM analyses_fts WHERE analyses_fts MATCH ?)")
+            params.append(" AND ".join(clauses))
+        if since is not None:
+            where.append("created >= ?")
+            params.append(_timestamp(since))
+        if until is not None:
+            where.append("created < ?")
+            params.append(_timestamp(until, end_of_day=True))
+        sql = (
+            "SELECT id, job_id, created, kind, candidate, target_input, input_type, skills, usage, timings "
+            "FROM analyses" + (" WHERE " + " AND ".join(where) if where else "") +
+            " ORDER BY created DESC LIMIT ?"
+        )
+        with self._connect() as conn:
+            rows = conn.execute(sql, (*params, limit)).fetchall()
+        return [
+            {**dict(row), "usage": json.loads(row["usage"] or "{}"), "timings": json.loads(row["timings"] or "{}")}
+            for row in rows
+        ]
+
+    def get(self, analysis_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM analyses WHERE id = ?", (analysis_id,)).fetchone()
+        if row is None:
+            return None
+        record = dict(row)
+        for key in ("sections", "inputs", "timings", "usage", "result"):
+            record[key] = json.loads(record[key] or "null")
+        return record
+
+    def count(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM analyses").fetchone()[0]
+
+    def delete(self, analysis_id):
+        with self._lock, self._connect() as conn:
+            return conn.execute("DELETE FROM analyses WHERE id = ?", (analysis_id,)).rowcount
+
+
+def _timestamp(value, end_of_day=False):
+    if isinstance(value, (int, float)):
+        return float(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+        if end_of_day:
+            return value.timestamp() + 86400
+    return value.timestamp()
+
+
+store = HistoryStore()
@@ -0,0 +1,405 @@
+import os
+import random
+import threading
+import time
+from collections import defaultdict, deque
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import cancellation
+
+# Shared HTTP layer for every fetcher tool: one pooled keep-alive session per
+# host, hard connect/read timeouts, retries with jittered backoff that respect
+# Retry-After and GitHub rate-limit headers, per-host concurrency caps and
+# simple request metrics. Each upstream provider also has a circuit breaker
+# over its recent error rate and latency: an open breaker fails requests
+# fast with CircuitOpen until a probe after the cooldown succeeds, and the
+# crew leaves that provider's source out (see Main_Server.degraded_sources).
+
+CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+READ_TIMEOUT = float(os.getenv("HTTP_READ_TIMEOUT", "30"))
+MAX_RETRIES = int(os.getenv("HTTP_MAX_RETRIES", "3"))
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20.0
+# Never sleep longer than this for a single Retry-After / rate-limit reset.
+MAX_RETRY_WAIT = float(os.getenv("HTTP_MAX_RETRY_WAIT", "60"))
+POOL_SIZE = 10
+BODY_CHUNK_SIZE = 16 * 1024
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+HOST_LIMITS = {
+    "api.github.com": 8,
+    "api.brightdata.com": 4,
+    "drive.google.com": 4,
+    "serpapi.com": 4,
+}
+DEFAULT_HOST_LIMIT = 8
+
+# Hosts grouped into the providers breakers are kept for; other hosts get a
+# breaker of their own
+PROVIDERS = {
+    "api.github.com": "github",
+    "api.brightdata.com": "brightdata",
+    "drive.google.com": "google_drive",
+    "drive.usercontent.google.com": "google_drive",
+    "docs.google.com": "google_drive",
+    "google.serper.dev": "serper",
+}
+BREAKER_WINDOW_SECONDS = float(os.getenv("BREAKER_WINDOW_SECONDS", "120"))
+BREAKER_MIN_REQUESTS = int(os.getenv("BREAKER_MIN_REQUESTS", "5"))
+BREAKER_ERROR_RATE = float(os.getenv("BREAKER_ERROR_RATE", "0.5"))
+BREAKER_COOLDOWN_SECONDS = float(os.getenv("BREAKER_COOLDOWN_SECONDS", "60"))
+# A provider whose p95 latency over the window exceeds this is tripped too
+BREAKER_SLOW_SECONDS = {"brightdata": 20.0, "google_drive": 20.0}
+DEFAULT_SLOW_SECONDS = float(os.getenv("BREAKER_SLOW_SECONDS", "15"))
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+
+def _retry_after_seconds(response):
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _github_reset_seconds(response):
+    # GitHub signals an exhausted quota with 403/429 and X-RateLimit-Remaining: 0
+    if response.status_code not in (403, 429):
+        return None
+    if response.headers.get("X-RateLimit-Remaining") != "0":
+        return None
+    reset = response.headers.get("X-RateLimit-Reset")
+    if not reset:
+        return None
+    try:
+        return max(0.0, float(reset) - time.time())
+    except ValueError:
+        return None
+
+
+def _read_body(response):
+    # Reads the body in chunks, checking the run's token (this runs on the
+    # cancellation.call helper thread, in the run's context), so a cancelled
+    # run closes the connection mid-download and frees its host slot instead
+    # of holding both until the body arrives
+    try:
+        body = b"".join(cancellation.iterate(response.iter_content(BODY_CHUNK_SIZE)))
+    except BaseException:
+        response.close()
+        raise
+    response._content = body
+    response._content_consumed = True
+
+
+def provider(url_or_host):
+    host = urlsplit(url_or_host).netloc.lower() if "//" in url_or_host else url_or_host.lower()
+    return PROVIDERS.get(host, host)
+
+
+def _percentile(values, pct):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))] if values else 0.0
+
+
+class CircuitOpen(requests.exceptions.ConnectionError):
+    # A ConnectionError so existing RequestException handling treats it as an
+    # unavailable upstream
+    def __init__(self, provider, reason):
+        super().__init__(f"{provider} is unavailable (circuit open: {reason}); failing fast")
+        self.provider = provider
+        self.reason = reason
+
+
+class CircuitBreaker:
+    def __init__(self, name, window=BREAKER_WINDOW_SECONDS, min_requests=BREAKER_MIN_REQUESTS,
+                 error_rate=BREAKER_ERROR_RATE, slow_seconds=None, cooldown=BREAKER_COOLDOWN_SECONDS):
+        self.name = name
+        self.window = window
+        self.min_requests = min_requests
+        self.error_rate = error_rate
+        self.slow_seconds = slow_seconds or BREAKER_SLOW_SECONDS.get(name, DEFAULT_SLOW_SECONDS)
+        self.cooldown = cooldown
+        self.state = CLOSED
+        self.reason = None
+        self.opened_at = None
+        self.opens = 0
+        self.rejected = 0
+        self._probe_started = None
+        # (time, ok, seconds or None)
+        self._samples = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now):
+        while self._samples and now - self._samples[0][0] > self.window:
+            self._samples.popleft()
+
+    def _open(self, now, reason):
+        self.state = OPEN
+        self.reason = reason
+        self.opened_at = now
+        self.opens += 1
+        print(f"🔌 Circuit for {self.name} opened: {reason}")
+
+    def is_open(self):
+        # Without claiming the half-open probe
+        with self._lock:
+            return self.state == OPEN and time.monotonic() - self.opened_at < self.cooldown
+
+    def allow(self):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == OPEN:
+                if now - self.opened_at < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self.state = HALF_OPEN
+                self._probe_started = None
+            if self.state == HALF_OPEN:
+                # One probe at a time; a probe that never reported back expires
+                if self._probe_started is not None and now - self._probe_started < self.cooldown:
+                    self.rejected += 1
+                    return False
+                self._probe_started = now
+            return True
+
+    def record(self, ok, seconds=None):
+        now = time.monotonic()
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probe_started = None
+                if ok:
+                    self.state = CLOSED
+                    self.reason = None
+                    self._samples.clear()
+                    print(f"🔌 Circuit for {self.name} closed")
+                else:
+                    self._open(now, f"half-open probe failed ({self.reason})")
+                return
+            self._samples.append((now, ok, seconds))
+            self._trim(now)
+            if self.state != CLOSED or len(self._samples) < self.min_requests:
+                return
+            count = len(self._samples)
+            errors = sum(1 for _, sample_ok, _ in self._samples if not sample_ok)
+            p95 = _percentile([s for _, _, s in self._samples if s is not None], 0.95)
+            if errors / count >= self.error_rate:
+                self._open(now, f"{errors}/{count} requests failed in the last {self.window:g}s")
+            elif p95 > self.slow_seconds:
+                self._open(now, f"p95 latency {p95:.1f}s over the last {count} requests")
+
+    def snapshot(self):
+        now = time.monotonic()
+        with self._lock:
+            self._trim(now)
+            count = len(self._samples)
+            latencies = [s for _, _, s in self._samples if s is not None]
+            return {
+                "state": self.state,
+                "reason": self.reason,
+                "requests": count,
+                "error_rate": round(sum(1 for _, ok, _ in self._samples if not ok) / count, 3) if count else 0.0,
+                "p50_seconds": round(_percentile(latencies, 0.5), 3),
+                "p95_seconds": round(_percentile(latencies, 0.95), 3),
+                "opens": self.opens,
+                "rejected": self.rejected,
+                "open_for_seconds": round(now - self.opened_at, 1) if self.state != CLOSED else None,
+            }
+
+
+class HttpClient:
+    def __init__(self, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT,
+                 max_retries=MAX_RETRIES, host_limits=None):
+        self.timeout = (connect_timeout, read_timeout)
+        self.max_retries = max_retries
+        self.host_limits = dict(HOST_LIMITS if host_limits is None else host_limits)
+        self._sessions = {}
+        self._semaphores = {}
+        self._breakers = {}
+        self._lock = threading.Lock()
+        self._metrics = defaultdict(lambda: {
+            "requests": 0,
+            "errors": 0,
+            "retries": 0,
+            "in_flight": 0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+            "status": defaultdict(int),
+        })
+
+    def _session(self, host):
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                # Retries are handled in request() so that Retry-After and
+                # rate-limit headers can be honored; the adapter only pools.
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=POOL_SIZE, max_retries=0)
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+            return session
+
+    def _semaphore(self, host):
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                limit = self.host_limits.get(host, DEFAULT_HOST_LIMIT)
+                semaphore = threading.BoundedSemaphore(limit)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    def breaker(self, name):
+        # name is a provider, a host or a URL
+        name = provider(name)
+        with self._lock:
+            breaker = self._breakers.get(name)
+            if breaker is None:
+                breaker = self._breakers[name] = CircuitBreaker(name)
+            return breaker
+
+    def _record(self, host, seconds, status=None, error=False):
+        with self._lock:
+            stats = self._metrics[host]
+            stats["requests"] += 1
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if status is not None:
+                stats["status"][status] += 1
+            if error:
+                stats["errors"] += 1
+
+    def _bump(self, host, key, amount=1):
+        with self._lock:
+            self._metrics[host][key] += amount
+
+    def _backoff(self, attempt):
+        return random.uniform(0, min(BACKOFF_CAP, BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self, method, url, timeout=None, retries=None, **kwargs):
+        method = method.upper()
+        host = urlsplit(url).netloc.lower()
+        session = self._session(host)
+        retries = self.max_retries if retries is None else retries
+        timeout = timeout or self.timeout
+        idempotent = method in IDEMPOTENT_METHODS
+        breaker = self.breaker(host)
+        stream = kwargs.pop("stream", False)
+
+        def send():
+            with self._semaphore(host):
+                # A run cancelled while queued for the host never sends
+                cancellation.check()
+                self._bump(host, "in_flight")
+                try:
+                    response = session.request(method, url, timeout=timeout, stream=True, **kwargs)
+                    if not stream:
+                        _read_body(response)
+                    return response
+                finally:
+                    self._bump(host, "in_flight", -1)
+
+        attempt = 0
+        while True:
+            if not breaker.allow():
+                raise CircuitOpen(breaker.name, breaker.reason)
+            start = time.monotonic()
+            try:
+                # Waited on in slices so a cancelled run stops waiting promptly
+                response = cancellation.call(send)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self._record(host, time.monotonic() - start, error=True)
+                breaker.record(False, time.monotonic() - start)
+                # A read timeout on a POST may already have been processed upstream.
+                sent = isinstance(e, requests.exceptions.ReadTimeout)
+                if attempt >= retries or (sent and not idempotent):
+                    raise
+                wait = self._backoff(attempt)
+            else:
+                self._record(host, time.monotonic() - start, status=response.status_code,
+                             error=response.status_code >= 500)
+                wait = _github_reset_seconds(response)
+                # Client errors (404 for an unknown profile...) say nothing about the provider's health
+                failed = response.status_code >= 500 or response.status_code == 429 or wait is not None
+                breaker.record(not failed, time.monotonic() - start)
+                if wait is None and response.status_code in RETRY_STATUSES:
+                    if not idempotent and response.status_code not in (429, 503):
+                        return response
+                    wait = _retry_after_seconds(response)
+                    if wait is None:
+                        wait = self._backoff(attempt)
+                if wait is None or attempt >= retries or wait > MAX_RETRY_WAIT:
+                    return response
+                response.close()
+                wait += random.uniform(0, BACKOFF_BASE)
+
+            attempt += 1
+            self._bump(host, "retries")
+            cancellation.sleep(wait)
+
+    def get(self, url, **kwargs):
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url, **kwargs):
+        return self.request("POST", url, **kwargs)
+
+    def metrics(self):
+        with self._lock:
+            snapshot = {}
+            for host, stats in self._metrics.items():
+                count = stats["requests"]
+                snapshot[host] = {
+                    **{k: v for k, v in stats.items() if k != "status"},
+                    "status": dict(stats["status"]),
+                    "avg_seconds": stats["total_seconds"] / count if count else 0.0,
+                }
+            return snapshot
+
+    def breakers(self):
+        with self._lock:
+            breakers = list(self._breakers.values())
+        return {breaker.name: breaker.snapshot() for breaker in breakers}
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+client = HttpClient()
+
+
+def request(method, url, **kwargs):
+    return client.request(method, url, **kwargs)
+
+
+def get(url, **kwargs):
+    return client.get(url, **kwargs)
+
+
+def post(url, **kwargs):
+    return client.post(url, **kwargs)
+
+
+def metrics():
+    return client.metrics()
+
+
+def breaker(name):
+    return client.breaker(name)
+
+
+def breakers():
+    return client.breakers()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+import role_requirements
+import skills_taxonomy
+import sqlite_store
+
+# Compact requirement structure for "Job Description" targets. A JD is parsed
+# once (must-haves, nice-to-haves, seniority, location, keywords) and the
+# structure replaces the raw JD text in the analysis prompts, so the long
+# description is not re-read by every task. Parsed JDs are stored by a hash
+# of their text in JD_CACHE_PATH; when the LLM parse is unavailable a local
+# parse based on skills_taxonomy.py is used instead (and not stored).
+
+DB_PATH = os.getenv("JD_CACHE_PATH", os.path.join("db", "job_descriptions.sqlite3"))
+MAX_ITEMS = 12
+
+JD_PARSE_PROMPT = """Extract the requirements from this job description as a JSON object with exactly these keys:
+"title": the job title, "must_have": required skills and qualifications (short phrases, at most 12),
+"nice_to_have": preferred or bonus skills (at most 12), "seniority": junior, mid, senior, lead or null,
+"location": location and remote policy or null, "keywords": other important keywords (at most 12).
+Reply with the JSON object only.
+
+Job description:
+{text}"""
+
+_NICE_HEADER = re.compile(r"nice[\s-]to[\s-]have|preferred|bonus|a plus|desirable|good to have", re.I)
+_MUST_HEADER = re.compile(r"requirements|qualifications|must[\s-]have|required|you have|you bring|what you.ll need|skills", re.I)
+_OTHER_HEADER = re.compile(r"benefits|perks|we offer|about (us|the company)|compensation|salary|how to apply", re.I)
+_YEARS = re.compile(r"(\d{1,2})\s*\+?\s*(?:-\s*\d{1,2}\s*)?years", re.I)
+_LOCATION = re.compile(r"^\s*(?:location|based in|office)\s*[:\-]\s*(.+)$", re.I | re.M)
+_REMOTE = re.compile(r"\b(fully remote|remote|hybrid|on[\s-]?site)\b", re.I)
+
+
+def digest(text):
+    return hashlib.sha256(" ".join((text or "").split()).encode("utf-8")).hexdigest()
+
+
+def parse_response(text):
+    # The LLM's JSON answer -> requirement structure, or None if it is unusable
+    match = re.search(r"\{.*\}", text or "", re.S)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("must_have"), list) or not data["must_have"]:
+        return None
+
+    def items(key):
+        return [str(item) for item in data.get(key) or [] if item][:MAX_ITEMS]
+
+    return {
+        "title": str(data.get("title") or "") or None,
+        "must_have": items("must_have"),
+        "nice_to_have": items("nice_to_have"),
+        "seniority": str(data.get("seniority") or "") or None,
+        "location": str(data.get("location") or "") or None,
+        "keywords": items("keywords"),
+        "source": "llm",
+    }
+
+
+def parse_locally(text):
+    # Header-driven split into required and preferred lines, with skills
+    # recognized by skills_taxonomy; no LLM call
+    lines = [line.strip() for line in (text or "").splitlines() if line.strip()]
+    section, must_lines, nice_lines, other_lines = None, [], [], []
+    for line in lines:
+        header = len(line) < 60 and not line.startswith(("-", "*", "•"))
+        if header and _NICE_HEADER.search(line):
+            section = "nice"
+        elif header and _OTHER_HEADER.search(line):
+            section = "other"
+        elif header and _MUST_HEADER.search(line):
+            section = "must"
+        (nice_lines if section == "nice" else must_lines if section == "must" else other_lines).append(line)
+    if not must_lines:
+        must_lines, other_lines = other_lines, []
+
+    must = skills_taxonomy.extract_skills("\n".join(must_lines))
+    nice = skills_taxonomy.extract_skills("\n".join(nice_lines))
+    everything = skills_taxonomy.extract_skills(text)
+    ranked = lambda found: sorted(found, key=lambda name: (-found[name], name.lower()))
+    years = _YEARS.search("\n".join(must_lines) or text or "")
+    title = lines[0] if lines and len(lines[0]) < 80 else None
+    seniority = role_requirements.normalize(title)[1] if title else None
+    location = _LOCATION.search(text or "") or _REMOTE.search(text or "")
+    return {
+        "title": title,
+        "must_have": ranked(must)[:MAX_ITEMS] + ([f"{years.group(1)}+ years of experience"] if years else []),
+        "nice_to_have": [name for name in ranked(nice) if name not in must][:MAX_ITEMS],
+        "seniority": seniority,
+        "location": location.group(1).strip() if location else None,
+        "keywords": [name for name in ranked(everything) if name not in must and name not in nice][:MAX_ITEMS],
+        "source": "local",
+    }
+
+
+def format_requirements(requirements):
+    lines = [
+        f"Job description (parsed): {requirements.get('title') or 'untitled role'}",
+        f"Must-have: {'; '.join(requirements['must_have']) or 'not stated'}",
+        f"Nice-to-have: {'; '.join(requirements['nice_to_have']) or 'not stated'}",
+        f"Seniority: {requirements.get('seniority') or 'not stated'}",
+        f"Location: {requirements.get('location') or 'not stated'}",
+        f"Keywords: {', '.join(requirements['keywords']) or 'none'}",
+    ]
+    return "\n".join(lines)
+
+
+def requirement_text(requirements):
+    # Skills text for skills_taxonomy.skill_diff on the target side
+    return ", ".join(requirements["must_have"] + requirements["nice_to_have"] + requirements["keywords"])
+
+
+class JobDescriptionStore:
+    def __init__(self, path=DB_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        sqlite_store.prepare(path)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS job_descriptions (
+                    digest TEXT PRIMARY KEY,
+                    requirements TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+
+    def _connect(self):
+        return sqlite_store.connect(self.path)
+
+    def get(self, key):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT requirements FROM job_descriptions WHERE digest = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE job_descriptions SET hits = hits + 1 WHERE digest = ?", (key,))
+        return json.loads(row[0])
+
+    def put(self, key, requirements):
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_descriptions (digest, requirements, created) VALUES (?, ?, ?)",
+                (key, json.dumps(requirements), time.time()),
+            )
+
+    def parse(self, text, extract=None):
+        # Requirement structure for a JD. extract(text) is the LLM parse,
+        # called once per distinct JD; its result is stored for reuse.
+        key = digest(text)
+        stored = self.get(key)
+        if stored is not None:
+            return stored
+        requirements = extract(text) if extract is not None else None
+        if requirements is None:
+            return parse_locally(text)
+        self.put(key, requirements)
+        print(f"📋 Parsed job description {key[:12]}: {len(text)} chars -> {len(format_requirements(requirements))}")
+        return requirements
+
+
+store = JobDescriptionStore()
@@ -0,0 +1,284 @@
+import json
+import os
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict
+
+import sqlite_store
+import uploads
+
+# Durable analysis queue in SQLite. The UI (or API) submits jobs, separate
+# worker processes claim them under a lease and heartbeat while running, so a
+# UI restart never kills in-flight work and a crashed worker's job is picked
+# up again once its lease expires. Progress and stream output are appended to
+# job_events for pollers. Queued jobs are cancelled on the spot; running ones
+# get a cancel flag their worker polls for. Jobs submitted with an
+# abandon_after option are also cancelled once their viewer stops calling
+# watch() for that many seconds (the tab was closed).
+
+DB_PATH = os.getenv("JOB_QUEUE_PATH", os.path.join("db", "jobs.sqlite3"))
+LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "60"))
+MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+FINISHED = (DONE, FAILED, CANCELLED)
+
+_initialized = set()
+
+
+@contextmanager
+def _connect(path=None):
+    path = path or DB_PATH
+    if path not in _initialized:
+        _init(path)
+    conn = sqlite3.connect(path, timeout=30, isolation_level=None)
+    conn.row_factory = sqlite3.Row
+    try:
+        yield conn
+    finally:
+        conn.close()
+
+
+def _init(path):
+    sqlite_store.prepare(path)
+    conn = sqlite3.connect(path, timeout=30)
+    try:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                kind TEXT NOT NULL,
+                state TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                upload_name TEXT,
+                upload_handle TEXT,
+                result TEXT,
+                error TEXT,
+                worker TEXT,
+                lease_until REAL,
+                attempts INTEGER NOT NULL DEFAULT 0,
+                created REAL NOT NULL,
+                started REAL,
+                finished REAL,
+                cancel_requested INTEGER NOT NULL DEFAULT 0,
+                watched REAL
+            );
+            CREATE INDEX IF NOT EXISTS jobs_state_created ON jobs (state, created);
+            CREATE TABLE IF NOT EXISTS job_events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                job_id TEXT NOT NULL,
+                created REAL NOT NULL,
+                kind TEXT NOT NULL,
+                data TEXT
+            );
+            CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id, id);
+        """)
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(jobs)")}
+        for column, declaration in (
+            ("cancel_requested", "INTEGER NOT NULL DEFAULT 0"), ("watched", "REAL"), ("upload_handle", "TEXT"),
+        ):
+            if column not in columns:
+                conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {declaration}")
+        conn.commit()
+    finally:
+        conn.close()
+    _initialized.add(path)
+
+
+def submit(kind, inputs, options=None):
+    # inputs may hold an UploadedResume. Its bytes never reach the database:
+    # they are copied into shared memory and only the handle is stored, so
+    # uploads need a worker on the same host. The segment is released when
+    # the job finishes.
+    inputs = dict(inputs)
+    upload = inputs.pop("uploaded_file", None)
+    handle = uploads.share(upload) if upload else None
+    payload = json.dumps({"inputs": inputs, "options": options or {}})
+    job_id = uuid.uuid4().hex
+    now = time.time()
+    try:
+        with _connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, kind, state, payload, upload_name, upload_handle, created, watched) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, kind, QUEUED, payload, upload.name if upload else None,
+                 json.dumps(asdict(handle)) if handle else None, now, now),
+            )
+    except BaseException:
+        if handle:
+            uploads.release(handle)
+        raise
+    return job_id
+
+
+def _row_to_job(row, with_upload=False):
+    # with_upload adds the upload's shared-memory handle as job["upload"];
+    # attach it with uploads.attach for the duration of the run
+    job = dict(row)
+    payload = json.loads(job.pop("payload"))
+    job["inputs"] = payload["inputs"]
+    job["options"] = payload["options"]
+    job.pop("upload", None)
+    handle = job.pop("upload_handle", None)
+    if with_upload and handle:
+        job["upload"] = uploads.SharedUpload(**json.loads(handle))
+    job["result"] = json.loads(job["result"]) if job["result"] else None
+    return job
+
+
+def _release_uploads(conn, job_ids):
+    # Frees the shared-memory uploads of jobs that reached a final state
+    for job_id in job_ids:
+        row = conn.execute("SELECT upload_handle FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row and row["upload_handle"]:
+            uploads.release(uploads.SharedUpload(**json.loads(row["upload_handle"])))
+            conn.execute("UPDATE jobs SET upload_handle = NULL WHERE id = ?", (job_id,))
+
+
+def get(job_id):
+    with _connect() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _row_to_job(row) if row else None
+
+
+def claim(worker_id, lease_seconds=LEASE_SECONDS):
+    # Oldest queued job, or a running one whose worker stopped heartbeating
+    now = time.time()
+    with _connect() as conn:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            expired = [row["id"] for row in conn.execute(
+                "SELECT id FROM jobs WHERE state = ? AND lease_until < ? AND (attempts >= ? OR cancel_requested = 1)",
+                (RUNNING, now, MAX_ATTEMPTS),
+            )]
+            conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, finished = ? "
+                "WHERE state = ? AND lease_until < ? AND attempts >= ?",
+                (FAILED, "Lease expired too many times", now, RUNNING, now, MAX_ATTEMPTS),
+            )
+            # A cancelled job whose worker died is not picked up again
+            conn.execute(
+                "UPDATE jobs SET state = ?, error = ?, finished = ? "
+                "WHERE state = ? AND lease_until < ? AND cancel_requested = 1",
+                (CANCELLED, "cancelled", now, RUNNING, now),
+            )
+            _release_uploads(conn, expired)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE state = ? OR (state = ? AND lease_until < ?) "
+                "ORDER BY created LIMIT 1",
+                (QUEUED, RUNNING, now),
+            ).fetchone()
+            if row is None:
+                conn.execute("COMMIT")
+                return None
+            conn.execute(
+                "UPDATE jobs SET state = ?, worker = ?, lease_until = ?, attempts = attempts + 1, "
+                "started = COALESCE(started, ?) WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, now, row["id"]),
+            )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    job = _row_to_job(row, with_upload=True)
+    job["worker"] = worker_id
+    return job
+
+
+def heartbeat(job_id, worker_id, lease_seconds=LEASE_SECONDS):
+    # False means the lease was lost and the job belongs to someone else now
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET lease_until = ? WHERE id = ? AND worker = ? AND state = ?",
+            (time.time() + lease_seconds, job_id, worker_id, RUNNING),
+        )
+        return cursor.rowcount == 1
+
+
+def complete(job_id, worker_id, result):
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = ?, result = ?, finished = ? "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            (DONE, json.dumps(result), time.time(), job_id, worker_id, RUNNING),
+        )
+        _release_uploads(conn, [job_id] if cursor.rowcount else [])
+        return cursor.rowcount == 1
+
+
+def fail(job_id, worker_id, error):
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished = ? "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            (FAILED, str(error), time.time(), job_id, worker_id, RUNNING),
+        )
+        _release_uploads(conn, [job_id] if cursor.rowcount else [])
+        return cursor.rowcount == 1
+
+
+def cancel(job_id, reason="cancelled by user"):
+    # Returns the job's state afterwards, or None if there is no such job
+    now = time.time()
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished = ? WHERE id = ? AND state = ?",
+            (CANCELLED, reason, now, job_id, QUEUED),
+        )
+        _release_uploads(conn, [job_id] if cursor.rowcount else [])
+        conn.execute(
+            "UPDATE jobs SET cancel_requested = 1, error = ? WHERE id = ? AND state = ?",
+            (reason, job_id, RUNNING),
+        )
+        row = conn.execute("SELECT state FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return row["state"] if row else None
+
+
+def cancel_requested(job_id):
+    # (reason or None, last watch() time) for the worker's cancellation poll
+    with _connect() as conn:
+        row = conn.execute("SELECT cancel_requested, error, watched FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    if row is None:
+        return "job deleted", None
+    return (row["error"] or "cancelled") if row["cancel_requested"] else None, row["watched"]
+
+
+def watch(job_id):
+    with _connect() as conn:
+        conn.execute("UPDATE jobs SET watched = ? WHERE id = ?", (time.time(), job_id))
+
+
+def cancelled(job_id, worker_id, reason):
+    with _connect() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET state = ?, error = ?, finished = ? "
+            "WHERE id = ? AND worker = ? AND state = ?",
+            (CANCELLED, str(reason), time.time(), job_id, worker_id, RUNNING),
+        )
+        _release_uploads(conn, [job_id] if cursor.rowcount else [])
+        return cursor.rowcount == 1
+
+
+def add_event(job_id, kind, data=None):
+    with _connect() as conn:
+        conn.execute(
+            "INSERT INTO job_events (job_id, created, kind, data) VALUES (?, ?, ?, ?)",
+            (job_id, time.time(), kind, json.dumps(data)),
+        )
+
+
+def events(job_id, after_id=0):
+    with _connect() as conn:
+        rows = conn.execute(
+            "SELECT id, kind, data FROM job_events WHERE job_id = ? AND id > ? ORDER BY id",
+            (job_id, after_id),
+        ).fetchall()
+    return [(row["id"], row["kind"], json.loads(row["data"])) for row in rows]
+
+
+def counts():
+    with _connect() as conn:
+        rows = conn.execute("SELECT state, COUNT(*) FROM jobs GROUP BY state").fetchall()
+    return {state: count for state, count in rows}
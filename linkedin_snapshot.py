@@ -0,0 +1,235 @@
+import codecs
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+# Streaming field projection for Bright Data LinkedIn snapshots. The snapshot
+# body (NDJSON, or a JSON array) is parsed incrementally from the response
+# chunks; only the configured top-level fields are materialized and every
+# other value (activity feeds, recommendations, embedded HTML) is skipped by
+# a byte scanner without ever being built as Python objects. Compare against
+# a whole-payload json.loads with:
+#
+#     python linkedin_snapshot.py snapshot.json
+
+FIELDS = tuple(
+    f.strip() for f in os.getenv(
+        "LINKEDIN_FIELDS",
+        "name,headline,position,about,current_company,city,experience,education,"
+        "certifications,skills,languages",
+    ).split(",") if f.strip()
+)
+# Always kept: Bright Data reports a blocked, private or missing profile as a
+# record carrying these instead of the profile fields
+ERROR_FIELDS = ("error", "error_code", "warning", "warning_code", "status")
+# Inside kept fields, drop markup and media and cap long free text
+DROP_KEYS = {"logo", "img", "image", "avatar", "banner_image", "company_logo_url", "institute_logo_url"}
+MAX_TEXT = int(os.getenv("LINKEDIN_MAX_TEXT", "800"))
+CHUNK_SIZE = 64 * 1024
+
+_decoder = json.JSONDecoder()
+_SCALAR_END = re.compile(r"[,}\]\s]")
+_STRING_SPECIAL = re.compile(r'["\\]')
+_STRUCTURAL = re.compile(r'["{}\[\]]')
+
+
+class _Reader:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self.buf = ""
+        self.pos = 0
+        self.bytes_read = 0
+
+    def more(self):
+        for chunk in self._chunks:
+            if isinstance(chunk, bytes):
+                self.bytes_read += len(chunk)
+                chunk = self._utf8.decode(chunk)
+            else:
+                self.bytes_read += len(chunk)
+            if chunk:
+                self.buf = self.buf[self.pos:] + chunk
+                self.pos = 0
+                return True
+        return False
+
+    def peek(self):
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.more():
+                return None
+
+    def expect(self, ch):
+        if self.peek() != ch:
+            raise ValueError(f"Malformed snapshot: expected {ch!r} at offset {self.bytes_read}")
+        self.pos += 1
+
+    def value(self):
+        self.peek()
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if not self.more():
+                    raise
+                continue
+            # A number may continue in the next chunk
+            if end == len(self.buf) and self.more():
+                continue
+            self.pos = end
+            return value
+
+    def skip(self):
+        # Jump between structural characters with regexes, discarding consumed
+        # text as it goes, so skipped values are never decoded
+        self.peek()
+        depth, in_string, escaped = 0, False, False
+        scalar = self.buf[self.pos] not in "{[\""
+        while True:
+            buf, i = self.buf, self.pos
+            while i < len(buf):
+                if scalar:
+                    match = _SCALAR_END.search(buf, i)
+                    if match is None:
+                        break
+                    self.pos = match.start()
+                    return
+                if in_string:
+                    if escaped:
+                        i, escaped = i + 1, False
+                        continue
+                    match = _STRING_SPECIAL.search(buf, i)
+                    if match is None:
+                        break
+                    i = match.end()
+                    if match.group() == "\\":
+                        escaped = True
+                        continue
+                    in_string = False
+                    if depth == 0:
+                        self.pos = i
+                        return
+                    continue
+                match = _STRUCTURAL.search(buf, i)
+                if match is None:
+                    break
+                i = match.end()
+                ch = match.group()
+                if ch == '"':
+                    in_string = True
+                elif ch in "{[":
+                    depth += 1
+                else:
+                    depth -= 1
+                    if depth == 0:
+                        self.pos = i
+                        return
+            self.pos = len(buf)
+            if not self.more():
+                return
+
+
+def _prune(value):
+    if isinstance(value, dict):
+        return {
+            k: _prune(v) for k, v in value.items()
+            if v not in (None, "", [], {}) and k not in DROP_KEYS and not k.endswith("_html")
+        }
+    if isinstance(value, list):
+        return [_prune(v) for v in value]
+    if isinstance(value, str) and len(value) > MAX_TEXT:
+        return value[:MAX_TEXT] + "…"
+    return value
+
+
+def _record(reader, fields):
+    reader.expect("{")
+    record = {}
+    if reader.peek() == "}":
+        reader.pos += 1
+        return record
+    while True:
+        key = reader.value()
+        reader.expect(":")
+        if key in fields:
+            record[key] = _prune(reader.value())
+        else:
+            reader.skip()
+        if reader.peek() == ",":
+            reader.pos += 1
+            continue
+        reader.expect("}")
+        return record
+
+
+def project_stream(chunks, fields=FIELDS, stats=None):
+    # Yields one projected dict per snapshot record
+    reader = _Reader(chunks)
+    fields = set(fields) | set(ERROR_FIELDS)
+    while True:
+        ch = reader.peek()
+        if ch is None:
+            break
+        if ch in "[],":
+            reader.pos += 1
+            continue
+        yield _record(reader, fields) if ch == "{" else reader.value()
+    if stats is not None:
+        stats["bytes_read"] = reader.bytes_read
+
+
+def record_error(record, fields=FIELDS):
+    # Error message for a record that is a collection error rather than a
+    # profile, or None. A profile that only carries a warning is kept.
+    if not isinstance(record, dict):
+        return None
+    if record.get("error"):
+        code = record.get("error_code")
+        return f"{record['error']} ({code})" if code else str(record["error"])
+    if any(key in record for key in fields if key not in ERROR_FIELDS):
+        return None
+    details = [str(record[key]) for key in ("warning", "warning_code", "status") if record.get(key)]
+    return "; ".join(details) or "empty profile record"
+
+
+def _chunks(data, size=CHUNK_SIZE):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+def measure(data, fields=FIELDS):
+    # Peak memory and prompt size for whole-payload parsing vs projection
+    tracemalloc.start()
+    start = time.perf_counter()
+    whole = json.loads(data)
+    whole_prompt = len(json.dumps(whole))
+    _, whole_peak = tracemalloc.get_traced_memory()
+    whole_seconds = time.perf_counter() - start
+    del whole
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    projected = list(project_stream(_chunks(data), fields))
+    projected_prompt = len(json.dumps(projected))
+    _, projected_peak = tracemalloc.get_traced_memory()
+    projected_seconds = time.perf_counter() - start
+    tracemalloc.stop()
+
+    return {
+        "payload_bytes": len(data),
+        "whole": {"peak_bytes": whole_peak, "prompt_chars": whole_prompt, "seconds": round(whole_seconds, 3)},
+        "projected": {"peak_bytes": projected_peak, "prompt_chars": projected_prompt, "seconds": round(projected_seconds, 3)},
+    }
+
+
+if __name__ == "__main__":
+    with open(sys.argv[1], "rb") as f:
+        print(json.dumps(measure(f.read()), indent=2))
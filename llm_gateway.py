@@ -0,0 +1,354 @@
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict, deque
+
+from crewai.llms.base_llm import BaseLLM, call_stop_override, call_stream_override
+
+import cancellation
+import run_budget
+import streaming
+
+# Gateway between every agent and its model. Identical in-flight requests
+# (same model, messages, tools and stop words) are coalesced so only one
+# reaches the provider and the rest share its answer; calls then queue for a
+# per-model and a global concurrency slot so bursts do not turn into cascades
+# of provider 429s. Queue waits and call latencies are kept per model, and
+# per-agent latencies and budget timeouts are appended to LLM_LATENCY_LOG
+# (summarize with `python llm_gateway.py`).
+
+MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+DEFAULT_MODEL_LIMIT = int(os.getenv("LLM_MODEL_CONCURRENCY_DEFAULT", "8"))
+# e.g. LLM_MODEL_CONCURRENCY="gpt-4o=4,gpt-4o-mini=12"
+MODEL_LIMITS = {
+    model.strip(): int(limit)
+    for model, _, limit in (
+        item.partition("=") for item in os.getenv("LLM_MODEL_CONCURRENCY", "").split(",") if "=" in item
+    )
+}
+COALESCE = os.getenv("LLM_COALESCE", "true").lower() == "true"
+WAIT_SAMPLES = 1000
+LATENCY_LOG = os.getenv("LLM_LATENCY_LOG", os.path.join("db", "llm_latency.jsonl"))
+
+
+def request_key(model, messages, tools=None, stop=None, response_model=None):
+    payload = json.dumps(
+        {
+            "model": model,
+            "messages": messages,
+            "tools": tools,
+            "stop": sorted(stop or []),
+            "response_model": getattr(response_model, "__name__", None),
+        },
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        # The leader's run was cancelled before it had an answer; that is
+        # not the followers' error, so one of them takes over
+        self.abandoned = False
+
+
+class LLMGateway:
+    def __init__(self, max_concurrency=MAX_CONCURRENCY, model_limits=None,
+                 default_model_limit=DEFAULT_MODEL_LIMIT, coalesce=COALESCE):
+        self.model_limits = dict(MODEL_LIMITS if model_limits is None else model_limits)
+        self.default_model_limit = default_model_limit
+        self.coalesce = coalesce
+        self._global = threading.BoundedSemaphore(max_concurrency)
+        self._semaphores = {}
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._waits = defaultdict(lambda: deque(maxlen=WAIT_SAMPLES))
+        self._metrics = defaultdict(lambda: {
+            "calls": 0,
+            "coalesced": 0,
+            "errors": 0,
+            "waiting": 0,
+            "in_flight": 0,
+            "total_wait_seconds": 0.0,
+            "max_wait_seconds": 0.0,
+            "total_seconds": 0.0,
+            "max_seconds": 0.0,
+        })
+
+    def _semaphore(self, model):
+        with self._lock:
+            semaphore = self._semaphores.get(model)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.model_limits.get(model, self.default_model_limit))
+                self._semaphores[model] = semaphore
+            return semaphore
+
+    def _bump(self, model, key, amount=1):
+        with self._lock:
+            self._metrics[model][key] += amount
+
+    def _record(self, model, wait, seconds, error=False):
+        with self._lock:
+            stats = self._metrics[model]
+            stats["calls"] += 1
+            stats["total_wait_seconds"] += wait
+            stats["max_wait_seconds"] = max(stats["max_wait_seconds"], wait)
+            stats["total_seconds"] += seconds
+            stats["max_seconds"] = max(stats["max_seconds"], seconds)
+            if error:
+                stats["errors"] += 1
+            self._waits[model].append(wait)
+
+    def _limited(self, model, fn):
+        # Model slot first so a saturated model never holds global slots
+        semaphore = self._semaphore(model)
+        queued = time.monotonic()
+        self._bump(model, "waiting")
+        try:
+            semaphore.acquire()
+            self._global.acquire()
+        finally:
+            self._bump(model, "waiting", -1)
+        wait = time.monotonic() - queued
+
+        self._bump(model, "in_flight")
+        start = time.monotonic()
+        try:
+            # A run cancelled while queued gives its slot straight back
+            cancellation.check()
+            result = fn()
+        except Exception:
+            self._record(model, wait, time.monotonic() - start, error=True)
+            raise
+        finally:
+            self._bump(model, "in_flight", -1)
+            self._global.release()
+            semaphore.release()
+        self._record(model, wait, time.monotonic() - start)
+        return result
+
+    def call(self, model, key, fn):
+        # Returns (result, coalesced)
+        if not self.coalesce or key is None:
+            return self._limited(model, fn), False
+
+        while True:
+            with self._lock:
+                flight = self._flights.get(key)
+                leader = flight is None
+                if leader:
+                    flight = self._flights[key] = _Flight()
+            if leader:
+                break
+            flight.done.wait()
+            if flight.abandoned:
+                continue
+            self._bump(model, "coalesced")
+            if flight.error is not None:
+                raise flight.error
+            return flight.result, True
+
+        try:
+            flight.result = self._limited(model, fn)
+        except cancellation.Cancelled:
+            flight.abandoned = True
+            raise
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+        return flight.result, False
+
+    def metrics(self):
+        with self._lock:
+            snapshot = {}
+            for model, stats in self._metrics.items():
+                waits = sorted(self._waits[model])
+                count = stats["calls"]
+                snapshot[model] = {
+                    **stats,
+                    "avg_wait_seconds": stats["total_wait_seconds"] / count if count else 0.0,
+                    "p50_wait_seconds": waits[len(waits) // 2] if waits else 0.0,
+                    "p95_wait_seconds": waits[int(len(waits) * 0.95)] if waits else 0.0,
+                    "avg_seconds": stats["total_seconds"] / count if count else 0.0,
+                }
+            return snapshot
+
+
+gateway = LLMGateway()
+
+
+class BudgetExceeded(TimeoutError):
+    pass
+
+
+def _within_budget(fn, budget):
+    # The call runs on a helper thread carrying the caller's context and
+    # stream sink; on timeout or cancellation it is abandoned and finishes in
+    # the background.
+    return cancellation.call(streaming.bind(fn), budget, BudgetExceeded)
+
+
+class GatewayLLM(BaseLLM):
+    # Wraps a provider LLM so every agent call goes through the gateway; the
+    # call-scoped stop words and stream mode crewai sets on this wrapper are
+    # forwarded to the wrapped LLM. With a budget, a call that runs longer
+    # fails over to the next (faster) model in fallbacks; when the last model
+    # overruns too, the agent's turn ends with a stopped answer. Calls are
+    # checked against and charged to the active run budget (run_budget.py).
+    inner: BaseLLM
+    fallbacks: list[BaseLLM] = []
+    budget: float | None = None
+    agent: str | None = None
+    gateway: LLMGateway | None = None
+
+    def __init__(self, inner, gateway=None, **kwargs):
+        super().__init__(inner=inner, gateway=gateway, model=inner.model, stream=inner.stream,
+                         provider=inner.provider, **kwargs)
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        stop = list(self.stop_sequences)
+        stream = bool(self._effective_stream())
+        candidates = [self.inner, *self.fallbacks]
+        cancellation.check()
+        budget = run_budget.current()
+        if budget is not None:
+            reason = budget.check(self.agent, id(self))
+            if reason:
+                print(f"💸 {self.agent or 'agent'} stopped: {reason}")
+                return run_budget.stopped_answer(reason)
+
+        for i, llm in enumerate(candidates):
+            last = i == len(candidates) - 1
+            key = request_key(llm.model, messages, tools, stop, response_model)
+
+            def invoke(llm=llm):
+                with call_stop_override(llm, stop), call_stream_override(llm, stream):
+                    return llm.call(
+                        messages, tools=tools, callbacks=callbacks, available_functions=available_functions,
+                        from_task=from_task, from_agent=from_agent, response_model=response_model,
+                    )
+
+            start = time.monotonic()
+            tokens_before = llm.get_token_usage_summary().total_tokens
+            try:
+                result, coalesced = _within_budget(
+                    lambda: (self.gateway or gateway).call(llm.model, key, invoke),
+                    self.budget,
+                )
+            except BudgetExceeded:
+                record_latency(self.agent, llm.model, time.monotonic() - start, "timeout")
+                if budget is not None:
+                    # The abandoned call still runs, and bills, in the background
+                    budget.charge(self.agent, id(self), run_budget.estimate_tokens(messages, None))
+                if last:
+                    reason = f"{llm.model} exceeded the {self.budget:g}s call budget"
+                    print(f"⏱️ {self.agent or 'agent'} stopped: {reason}")
+                    return run_budget.stopped_answer(reason)
+                print(f"⏱️ {self.agent or 'agent'} on {llm.model} exceeded {self.budget:g}s, "
+                      f"failing over to {candidates[i + 1].model}")
+                continue
+            except Exception:
+                record_latency(self.agent, llm.model, time.monotonic() - start, "error")
+                raise
+            record_latency(self.agent, llm.model, time.monotonic() - start, "coalesced" if coalesced else "ok")
+            if budget is not None:
+                # Coalesced calls cost nothing; the leader's run pays for them
+                tokens = 0 if coalesced else llm.get_token_usage_summary().total_tokens - tokens_before
+                if not coalesced and tokens <= 0:
+                    tokens = run_budget.estimate_tokens(messages, result)
+                budget.charge(self.agent, id(self), tokens)
+            if coalesced and stream and isinstance(result, str):
+                # The leader streamed to its own session; replay the answer here
+                self._emit_stream_chunk_event(chunk=result, from_task=from_task, from_agent=from_agent)
+            return result
+
+    def supports_function_calling(self):
+        return self.inner.supports_function_calling()
+
+    def supports_stop_words(self):
+        return self.inner.supports_stop_words()
+
+    def get_context_window_size(self):
+        return self.inner.get_context_window_size()
+
+    def supports_multimodal(self):
+        return self.inner.supports_multimodal()
+
+    def get_token_usage_summary(self):
+        return self.inner.get_token_usage_summary()
+
+
+_latencies = defaultdict(lambda: {"outcomes": defaultdict(int), "seconds": deque(maxlen=WAIT_SAMPLES)})
+_latency_lock = threading.Lock()
+
+
+def record_latency(agent, model, seconds, outcome):
+    with _latency_lock:
+        stats = _latencies[(agent or "-", model)]
+        stats["outcomes"][outcome] += 1
+        if outcome in ("ok", "coalesced"):
+            stats["seconds"].append(seconds)
+        if LATENCY_LOG:
+            directory = os.path.dirname(LATENCY_LOG)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(LATENCY_LOG, "a") as f:
+                f.write(json.dumps({"ts": time.time(), "agent": agent, "model": model,
+                                    "seconds": round(seconds, 3), "outcome": outcome}) + "\n")
+
+
+def _summarize(samples, outcomes):
+    samples = sorted(samples)
+    return {
+        **outcomes,
+        "p50_seconds": samples[len(samples) // 2] if samples else 0.0,
+        "p95_seconds": samples[int(len(samples) * 0.95)] if samples else 0.0,
+        "max_seconds": samples[-1] if samples else 0.0,
+    }
+
+
+def latency_metrics():
+    with _latency_lock:
+        return {
+            f"{agent}/{model}": _summarize(stats["seconds"], dict(stats["outcomes"]))
+            for (agent, model), stats in _latencies.items()
+        }
+
+
+def wrap(llm, fallbacks=(), budget=None, agent=None):
+    return GatewayLLM(llm, fallbacks=list(fallbacks), budget=budget, agent=agent)
+
+
+def metrics():
+    return gateway.metrics()
+
+
+def main():
+    # Summarize the latency log to tune AGENT_ROUTES in Main_Server.py
+    path = sys.argv[1] if len(sys.argv) > 1 else LATENCY_LOG
+    rows = defaultdict(lambda: ([], defaultdict(int)))
+    with open(path) as f:
+        for line in f:
+            entry = json.loads(line)
+            samples, outcomes = rows[(entry["agent"], entry["model"])]
+            outcomes[entry["outcome"]] += 1
+            if entry["outcome"] in ("ok", "coalesced"):
+                samples.append(entry["seconds"])
+    for (agent, model), (samples, outcomes) in sorted(rows.items(), key=lambda item: str(item[0])):
+        print(f"{agent} / {model}: {json.dumps(_summarize(samples, dict(outcomes)))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,277 @@
+import argparse
+import json
+import multiprocessing
+import os
+import queue
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+
+# Concurrent-session load test for streamlit_app.py. Each session is a
+# Streamlit AppTest session in its own process, driven through the real
+# button-press path (sidebar inputs -> Run -> job queue -> worker -> rendered
+# result); analysis workers run as threads in this process, as in the API
+# server. The LLM and external APIs are stubbed (stubs.py) and all SQLite
+# stores live in a temp directory. Concurrency ramps through --levels; each
+# level reports p50/p95/p99 latency, error rate, memory per session and peak
+# thread counts.
+# Results are written with the current commit so runs can be compared:
+#
+#     python loadtest.py --levels 1,2,4,8 --workers 4 --output loadtest_results
+#     python loadtest.py --compare loadtest_results/<old>.json loadtest_results/<new>.json
+
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "streamlit_app.py")
+SAMPLE_SECONDS = 0.1
+
+
+def _isolate(workdir):
+    # Must run before any project module is imported
+    os.environ.setdefault("STUB_LLM", "1")
+    os.environ.setdefault("STUB_FETCHERS", "1")
+    os.environ["JOB_QUEUE_PATH"] = os.path.join(workdir, "jobs.sqlite3")
+    os.environ["RESULT_CACHE_PATH"] = os.path.join(workdir, "analysis_cache.sqlite3")
+    os.environ["HISTORY_PATH"] = os.path.join(workdir, "history.sqlite3")
+    os.environ["STAGE_CACHE_PATH"] = os.path.join(workdir, "stage_cache.sqlite3")
+    os.environ["GITHUB_REPO_CACHE_PATH"] = os.path.join(workdir, "github_repos.sqlite3")
+    os.environ["JD_CACHE_PATH"] = os.path.join(workdir, "job_descriptions.sqlite3")
+    os.environ["ROLE_KB_PATH"] = os.path.join(workdir, "roles.sqlite3")
+    os.environ["LLM_LATENCY_LOG"] = os.path.join(workdir, "llm_latency.jsonl")
+    os.environ.setdefault("OPENAI_API_KEY", "stub")
+
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    # ru_maxrss is KB on Linux and bytes on macOS; only a fallback
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def _commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=os.path.dirname(APP_PATH), text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    index = min(len(values) - 1, max(0, round(pct / 100 * len(values)) - 1))
+    return values[index]
+
+
+class _Sampler:
+    def __init__(self):
+        self.peak_rss = _rss_bytes()
+        self.peak_threads = threading.active_count()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(SAMPLE_SECONDS):
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+            self.peak_threads = max(self.peak_threads, threading.active_count())
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+
+def run_session(session_id, timeout, reuse_profile, barrier=None):
+    # One browser session: page load, fill the sidebar, press Run and wait
+    # for the rendered result. Returns (latency, errors, extra_rss, peak_threads)
+    from streamlit.testing.v1 import AppTest
+
+    baseline = _rss_bytes()
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout).run()
+    handle = "loadtest" if reuse_profile else f"loadtest-{session_id}-{time.time_ns()}"
+    next(w for w in at.text_input if w.label == "GitHub Profile URL").set_value(f"https://github.com/{handle}")
+    next(w for w in at.text_input if w.label == "Job Role/Position").set_value("Backend Engineer")
+    if barrier is not None:
+        barrier.wait()
+    with _Sampler() as sampler:
+        start = time.perf_counter()
+        next(b for b in at.button if b.label == "🚀 Run Career Analysis").click().run()
+        latency = time.perf_counter() - start
+
+    errors = [str(e.value) for e in at.exception] + [e.value for e in at.error]
+    done = any("Career Analysis Complete" in s.value for s in at.success)
+    if not done and not errors:
+        errors.append("analysis did not complete")
+    return latency, errors, sampler.peak_rss - baseline, sampler.peak_threads
+
+
+def _session_process(session_id, timeout, reuse_profile, barrier, results):
+    # Streamlit's AppTest is not thread-safe, so each concurrent session gets
+    # its own process, warmed up (imports done) before its baseline is taken
+    import streamlit.testing.v1  # noqa: F401
+    import Main_Server  # noqa: F401
+
+    try:
+        results.put((session_id, run_session(session_id, timeout, reuse_profile, barrier)))
+    except Exception as e:
+        traceback.print_exc()
+        try:
+            barrier.abort()
+        except Exception:
+            pass
+        results.put((session_id, (None, [f"{type(e).__name__}: {e}"], 0, 0)))
+
+
+def run_level(concurrency, timeout, reuse_profile):
+    context = multiprocessing.get_context("spawn")
+    barrier = context.Barrier(concurrency)
+    results = context.Queue()
+    processes = [
+        context.Process(target=_session_process, args=(i, timeout, reuse_profile, barrier, results), daemon=True)
+        for i in range(concurrency)
+    ]
+    for process in processes:
+        process.start()
+
+    # Workers run in this process; sample its memory and threads as well
+    collected = []
+    started = time.perf_counter()
+    with _Sampler() as sampler:
+        deadline = time.monotonic() + timeout + 120
+        while len(collected) < concurrency and time.monotonic() < deadline:
+            try:
+                collected.append(results.get(timeout=1)[1])
+            except queue.Empty:
+                if not any(p.is_alive() for p in processes) and results.empty():
+                    break
+    wall = time.perf_counter() - started
+    for process in processes:
+        process.join(timeout=5)
+        if process.is_alive():
+            process.terminate()
+    collected += [(None, ["session process exited without a result"], 0, 0)] * (concurrency - len(collected))
+
+    latencies = [latency for latency, errors, _, _ in collected if latency is not None and not errors]
+    failures = [errors for _, errors, _, _ in collected if errors]
+    session_rss = [extra for _, _, extra, _ in collected if extra]
+    return {
+        "concurrency": concurrency,
+        "sessions": concurrency,
+        "errors": len(failures),
+        "error_rate": round(len(failures) / concurrency, 3),
+        "error_samples": sorted({e for errors in failures for e in errors})[:5],
+        "p50_seconds": _percentile(latencies, 50),
+        "p95_seconds": _percentile(latencies, 95),
+        "p99_seconds": _percentile(latencies, 99),
+        "max_seconds": max(latencies) if latencies else None,
+        "throughput_per_minute": round(len(latencies) / wall * 60, 2) if wall else None,
+        "wall_seconds": round(wall, 3),
+        "mb_per_session": round(sum(session_rss) / len(session_rss) / 2**20, 2) if session_rss else None,
+        "session_peak_threads": max((threads for _, _, _, threads in collected), default=0),
+        "worker_rss_peak_mb": round(sampler.peak_rss / 2**20, 1),
+        "worker_peak_threads": sampler.peak_threads,
+    }
+
+
+def _print_level(level):
+    fmt = lambda v: "-" if v is None else f"{v:.2f}"
+    print(
+        f"  N={level['concurrency']:>3}  p50={fmt(level['p50_seconds'])}s  p95={fmt(level['p95_seconds'])}s  "
+        f"p99={fmt(level['p99_seconds'])}s  errors={level['error_rate']:.0%}  "
+        f"mem/session={level['mb_per_session']}MB  session_threads={level['session_peak_threads']}  "
+        f"worker_rss={level['worker_rss_peak_mb']}MB  worker_threads={level['worker_peak_threads']}"
+    )
+    for sample in level["error_samples"]:
+        print(f"         ❌ {sample[:160]}")
+
+
+def compare(old_path, new_path):
+    with open(old_path) as f:
+        old = json.load(f)
+    with open(new_path) as f:
+        new = json.load(f)
+    print(f"📊 {old['commit']} → {new['commit']}")
+    old_levels = {level["concurrency"]: level for level in old["levels"]}
+    for level in new["levels"]:
+        before = old_levels.get(level["concurrency"])
+        if before is None:
+            continue
+        parts = []
+        for key in ("p50_seconds", "p95_seconds", "p99_seconds", "error_rate", "mb_per_session",
+                    "session_peak_threads", "worker_rss_peak_mb", "worker_peak_threads"):
+            a, b = before.get(key), level.get(key)
+            if a is None or b is None:
+                parts.append(f"{key}: {a} → {b}")
+            else:
+                change = f" ({(b - a) / a:+.0%})" if a else ""
+                parts.append(f"{key}: {a} → {b}{change}")
+        print(f"  N={level['concurrency']}: " + ", ".join(parts))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ramp concurrent Streamlit sessions against stubbed crews")
+    parser.add_argument("--levels", default="1,2,4,8", help="comma-separated concurrency levels")
+    parser.add_argument("--workers", type=int, default=4, help="embedded analysis worker threads")
+    parser.add_argument("--timeout", type=float, default=300, help="per-session timeout in seconds")
+    parser.add_argument("--reuse-profile", action="store_true",
+                        help="all sessions analyze the same profile, exercising the caches and coalescing")
+    parser.add_argument("--output", default="loadtest_results", help="directory for the JSON report")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="compare two JSON reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    workdir = tempfile.mkdtemp(prefix="loadtest-")
+    _isolate(workdir)
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+    import worker
+
+    for i in range(args.workers):
+        threading.Thread(target=worker.work_loop, args=(f"loadtest-{i}",), daemon=True).start()
+
+    levels = [int(n) for n in args.levels.split(",") if n.strip()]
+    report = {
+        "commit": _commit(),
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "config": {
+            "levels": levels,
+            "workers": args.workers,
+            "reuse_profile": args.reuse_profile,
+            "stub_llm_latency": os.getenv("STUB_LLM_LATENCY", "default"),
+            "stub_fetch_latency": os.getenv("STUB_FETCH_LATENCY", "default"),
+            "python": sys.version.split()[0],
+            "cpus": os.cpu_count(),
+        },
+        "levels": [],
+    }
+    print(f"🚦 Load test at {report['commit']} with {args.workers} workers (stores in {workdir})")
+    # One unmeasured session so worker warm-up does not count as load
+    run_level(1, args.timeout, args.reuse_profile)
+    for concurrency in levels:
+        level = run_level(concurrency, args.timeout, args.reuse_profile)
+        report["levels"].append(level)
+        _print_level(level)
+
+    os.makedirs(args.output, exist_ok=True)
+    path = os.path.join(args.output, f"{time.strftime('%Y%m%d-%H%M%S')}-{report['commit']}.json")
+    with open(path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Results written to {path}")
+
+
+if __name__ == "__main__":
+    main()
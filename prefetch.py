@@ -0,0 +1,173 @@
+import json
+import re
+import threading
+import time
+import weakref
+from urllib.parse import urlsplit
+
+import cancellation
+
+# Speculative profile fetches for the Streamlit sidebar. As soon as a valid
+# resume, GitHub or LinkedIn URL is entered, the page starts that source's
+# fetch tool in the background; a URL that is edited away cancels its fetch.
+# When the analysis is submitted (without waiting) the finished fetches travel
+# with the job inputs ("prefetched") and the URL fetch stage hands them to the
+# agent instead of calling the tool again, so the slow LinkedIn collection is
+# often done before Run is pressed. A LinkedIn collection still running is
+# handed over by its Bright Data snapshot id, so the worker polls that
+# snapshot rather than triggering a second one. One Prefetcher lives in each
+# browser session.
+
+_GITHUB = re.compile(r"^https?://(www\.)?github\.com/[A-Za-z0-9](?:[A-Za-z0-9-]{0,38})/?$", re.I)
+_LINKEDIN = re.compile(r"^https?://([a-z]{2,3}\.)?(www\.)?linkedin\.com/in/[^/?#\s]+/?(\?.*)?$", re.I)
+
+
+def _normalize(url):
+    return (url or "").strip().rstrip("/")
+
+
+def valid(source, url):
+    url = (url or "").strip()
+    if source == "github_url":
+        return bool(_GITHUB.match(url))
+    if source == "linkedin_url":
+        return bool(_LINKEDIN.match(url))
+    parts = urlsplit(url)
+    return parts.scheme in ("http", "https") and "." in parts.netloc
+
+
+def usable(prefetched, inputs, sources):
+    # {source: fetched text} for the sources whose prefetch matches the URL
+    # actually being analyzed
+    return {
+        source: entry["data"]
+        for source, entry in _matching(prefetched, inputs, sources).items()
+        if entry.get("data") is not None
+    }
+
+
+def pending(prefetched, inputs, sources):
+    # {source: snapshot id} for collections still running at submit time
+    return {
+        source: entry["snapshot_id"]
+        for source, entry in _matching(prefetched, inputs, sources).items()
+        if entry.get("data") is None and entry.get("snapshot_id")
+    }
+
+
+def _matching(prefetched, inputs, sources):
+    return {
+        source: entry
+        for source, entry in (prefetched or {}).items()
+        if source in sources and _normalize(entry.get("url")) == _normalize(inputs.get(source))
+    }
+
+
+class _Fetch:
+    def __init__(self, source, url, tool):
+        self.source = source
+        self.url = url
+        self.token = cancellation.CancelToken()
+        self.data = None
+        self.error = None
+        self.started = time.monotonic()
+        self.seconds = None
+        self.tool = tool
+        # The worker took over the remote collection (see Prefetcher.results)
+        self.handed_over = False
+        self._done = threading.Event()
+        threading.Thread(target=self._run, args=(tool,), daemon=True).start()
+
+    def _run(self, tool):
+        try:
+            with cancellation.scope(self.token):
+                result = tool._run(self.url)
+            if isinstance(result, dict) and result.get("error"):
+                self.error = result["error"]
+            else:
+                self.data = result if isinstance(result, str) else json.dumps(result, default=str)
+        except cancellation.Cancelled as e:
+            self.error = f"cancelled: {e}"
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+        finally:
+            self.seconds = round(time.monotonic() - self.started, 1)
+            self._done.set()
+
+    @property
+    def snapshot_id(self):
+        # Set by tools that start a remote collection (LinkedInFetcherTool)
+        return getattr(self.tool, "snapshot_id", None)
+
+    @property
+    def done(self):
+        return self._done.is_set()
+
+    @property
+    def state(self):
+        if self.handed_over:
+            return "handed over"
+        if not self.done:
+            return "running"
+        return "ready" if self.data is not None else "failed"
+
+
+def _cancel_all(fetches, reason):
+    for fetch in list(fetches.values()):
+        fetch.token.cancel(reason)
+
+
+class Prefetcher:
+    def __init__(self, tools):
+        # tools: source -> fetch tool class (Main_Server.URL_FETCH_TOOLS)
+        self.tools = tools
+        self._fetches = {}
+        self._lock = threading.Lock()
+        # The browser session went away: stop whatever is still running
+        weakref.finalize(self, _cancel_all, self._fetches, "session closed")
+
+    def update(self, urls):
+        # urls: source -> URL currently in the form ("" or None when absent).
+        # Starts fetches for new valid URLs and cancels ones edited away.
+        with self._lock:
+            for source in self.tools:
+                url = (urls.get(source) or "").strip()
+                current = self._fetches.get(source)
+                if current is not None and _normalize(current.url) == _normalize(url):
+                    continue
+                if current is not None:
+                    current.token.cancel("URL changed")
+                    del self._fetches[source]
+                    print(f"🛑 Prefetch of {source} cancelled: URL changed")
+                if url and valid(source, url):
+                    self._fetches[source] = _Fetch(source, url, self.tools[source]())
+                    print(f"⚡ Prefetching {source}: {url}")
+
+    def status(self):
+        with self._lock:
+            return {source: fetch.state for source, fetch in self._fetches.items()}
+
+    def results(self):
+        # {source: {"url", "data"}} of successful fetches and {source: {"url",
+        # "snapshot_id"}} of remote collections still running; never waits.
+        # A handed-over collection stops being polled here (the worker polls
+        # it now) but stays listed, so the URL is not fetched again and a
+        # later run reuses the same snapshot.
+        with self._lock:
+            fetches = list(self._fetches.values())
+        results = {}
+        for fetch in fetches:
+            if fetch.data is not None:
+                results[fetch.source] = {"url": fetch.url, "data": fetch.data}
+            elif fetch.snapshot_id and (fetch.handed_over or not fetch.done):
+                results[fetch.source] = {"url": fetch.url, "snapshot_id": fetch.snapshot_id}
+                if not fetch.handed_over:
+                    fetch.handed_over = True
+                    fetch.token.cancel("handed over to the analysis")
+                    print(f"🤝 Prefetch of {fetch.source} handed over: snapshot {fetch.snapshot_id}")
+        return results
+
+    def cancel(self, reason="cancelled"):
+        with self._lock:
+            _cancel_all(self._fetches, reason)
+            self._fetches.clear()
@@ -0,0 +1,144 @@
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict
+
+import uploads
+
+# Process-pool execution of crew runs for batch screening. Crews run
+# synchronously and the non-LLM work (PDF parsing, JSON shaping, ranking,
+# regex parsing) is CPU-bound under the GIL, so throughput scales with
+# processes rather than threads. Each process imports Main_Server (crewai,
+# the document parsers, the taxonomy) once and keeps its HTTP connection
+# pools and LLM gateway across jobs; agents and crews are built per run. The
+# stage cache is shared through SQLite.
+# Jobs and results cross the process boundary as zlib-compressed JSON;
+# uploads travel as shared-memory handles. Crew logs from the pool processes
+# go to stderr, so stdout (or --output) carries only the JSONL results.
+#
+#     python process_pool.py batch.jsonl --workers 8 --output results.jsonl
+
+POOL_WORKERS = int(os.getenv("CREW_POOL_WORKERS", str(os.cpu_count() or 1)))
+START_METHOD = os.getenv("CREW_POOL_START_METHOD", "spawn")
+
+
+def pack(value):
+    return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"))
+
+
+def unpack(data):
+    return json.loads(zlib.decompress(data).decode("utf-8"))
+
+
+def _warm():
+    sys.stdout = sys.stderr
+    import Main_Server  # noqa: F401  pays the heavy imports once per process
+
+
+def _run(payload, handle=None):
+    from Main_Server import run_analysis, run_multi_target
+
+    job = unpack(payload)
+    inputs, options = job["inputs"], job["options"]
+    started = time.monotonic()
+
+    def execute():
+        if job["kind"] == "multi_target":
+            return run_multi_target(inputs, options["targets"], use_cache=options.get("use_cache", True), force=options.get("force", False))
+        return run_analysis(inputs, use_cache=options.get("use_cache", True), force=options.get("force", False))
+
+    if handle is None:
+        result = execute()
+    else:
+        with uploads.attach(handle) as upload:
+            inputs["uploaded_file"] = upload
+            result = execute()
+            del inputs["uploaded_file"]
+    return pack({"pid": os.getpid(), "seconds": time.monotonic() - started, "result": asdict(result)})
+
+
+class CrewPool:
+    def __init__(self, workers=None):
+        self.workers = workers or POOL_WORKERS
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context(START_METHOD),
+            initializer=_warm,
+        )
+
+    def submit(self, inputs, kind="analysis", options=None):
+        # Returns a future resolving to {"pid", "seconds", "result"}
+        inputs = dict(inputs)
+        upload = inputs.pop("uploaded_file", None)
+        handle = uploads.share(upload) if upload else None
+        payload = pack({"kind": kind, "inputs": inputs, "options": options or {}})
+        future = self._executor.submit(_run, payload, handle)
+        if handle is not None:
+            future.add_done_callback(lambda _: uploads.release(handle))
+        return _UnpackingFuture(future)
+
+    def screen_batch(self, batch, kind="analysis", options=None):
+        futures = [self.submit(inputs, kind, options) for inputs in batch]
+        results = []
+        for future in futures:
+            try:
+                results.append(future.result())
+            except Exception as e:
+                results.append({"error": str(e)})
+        return results
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait, cancel_futures=not wait)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+
+class _UnpackingFuture:
+    def __init__(self, future):
+        self._future = future
+
+    def result(self, timeout=None):
+        return unpack(self._future.result(timeout))
+
+    def done(self):
+        return self._future.done()
+
+    def cancel(self):
+        return self._future.cancel()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Screen a batch of profiles (JSONL of crew inputs) on a process pool")
+    parser.add_argument("batch", help="JSONL file, one inputs object per line")
+    parser.add_argument("--workers", type=int, default=POOL_WORKERS)
+    parser.add_argument("--force", action="store_true")
+    parser.add_argument("--output", default="-", help="JSONL file for the results (default: stdout)")
+    args = parser.parse_args()
+
+    with open(args.batch) as f:
+        batch = [json.loads(line) for line in f if line.strip()]
+    started = time.monotonic()
+    with CrewPool(args.workers) as pool:
+        results = pool.screen_batch(batch, options={"force": args.force})
+    out = sys.stdout if args.output == "-" else open(args.output, "w")
+    try:
+        for result in results:
+            out.write(json.dumps(result) + "\n")
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.monotonic() - started
+    print(f"⏱️ {len(batch)} profiles in {elapsed:.1f}s on {args.workers} processes", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from urllib.parse import urlsplit, urlunsplit
+
+import sqlite_store
+
+# Persistent cache of complete analysis results, keyed by
+# (profile fingerprint, target_input, input_type, crew variant). Repeat runs,
+# e.g. after a page refresh, return straight from here. Least recently used
+# entries are evicted once the store grows past MAX_BYTES.
+
+DB_PATH = os.getenv("RESULT_CACHE_PATH", os.path.join("db", "analysis_cache.sqlite3"))
+MAX_BYTES = int(os.getenv("RESULT_CACHE_MAX_BYTES", str(200 * 1024 * 1024)))
+
+URL_KEYS = ("resume_url", "github_url", "linkedin_url")
+
+
+def _normalize_url(url):
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip("/"), parts.query, ""))
+
+
+def fingerprint(inputs):
+    # Content hash for uploads, normalized URL for remote sources
+    parts = {key: _normalize_url(inputs[key]) for key in URL_KEYS if inputs.get(key)}
+    upload = inputs.get("uploaded_file")
+    if upload:
+        parts["uploaded_file"] = upload.digest()
+    payload = json.dumps(parts, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def result_key(profile_fingerprint, target_input, input_type, variant):
+    payload = json.dumps([profile_fingerprint, target_input, input_type, variant])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ResultCache:
+    def __init__(self, path=DB_PATH, max_bytes=MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        sqlite_store.prepare(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS results (
+                    key TEXT PRIMARY KEY,
+                    fingerprint TEXT NOT NULL,
+                    target_input TEXT,
+                    input_type TEXT,
+                    variant TEXT,
+                    payload TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    created REAL NOT NULL,
+                    last_access REAL NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS results_last_access ON results (last_access)")
+
+    def _connect(self):
+        return sqlite_store.connect(self.path)
+
+    def get(self, key):
+        with self._lock, self._connect() as conn:
+            row = conn.execute("SELECT payload FROM results WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE results SET last_access = ? WHERE key = ?", (time.time(), key))
+            return json.loads(row[0])
+
+    def put(self, key, profile_fingerprint, target_input, input_type, variant, value):
+        payload = json.dumps(value)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO results VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, profile_fingerprint, target_input, input_type, variant, payload, len(payload), now, now),
+            )
+            self._evict(conn)
+
+    def _evict(self, conn):
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM results").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        for key, size in conn.execute("SELECT key, size FROM results ORDER BY last_access").fetchall():
+            conn.execute("DELETE FROM results WHERE key = ?", (key,))
+            total -= size
+            if total <= self.max_bytes:
+                break
+
+    def stats(self):
+        with self._lock, self._connect() as conn:
+            count, total = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM results").fetchone()
+            return {"entries": count, "bytes": total, "max_bytes": self.max_bytes}
+
+    def clear(self):
+        with self._lock, self._connect() as conn:
+            removed = conn.execute("DELETE FROM results").rowcount
+            return removed
+
+
+cache = ResultCache()
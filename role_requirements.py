@@ -0,0 +1,341 @@
+import difflib
+import json
+import os
+import re
+import threading
+import time
+
+import sqlite_store
+
+# Knowledge base of normalized role profiles (required and nice-to-have
+# skills, seniority levels and experience expectations) for "Job Role/Title"
+# targets, so the skills and experience analysts start from a known
+# requirement set instead of researching the role from scratch every run.
+# Titles are normalized ("Sr. Backend Dev" -> "backend engineer", senior)
+# and fuzzy-matched against the seeded roles below; a title that matches
+# none is profiled once by the LLM and stored in ROLE_KB_PATH for reuse.
+
+DB_PATH = os.getenv("ROLE_KB_PATH", os.path.join("db", "roles.sqlite3"))
+MATCH_CUTOFF = float(os.getenv("ROLE_MATCH_CUTOFF", "0.82"))
+
+_SENIORITY = {"junior": "junior", "jr": "junior", "entry": "junior", "graduate": "junior", "intern": "junior",
+                     "associate": "junior", "mid": "mid", "intermediate": "mid", "ii": "mid",
+                     "senior": "senior", "sr": "senior", "iii": "senior", "lead": "lead", "staff": "lead",
+                     "principal": "lead", "head": "lead", "chief": "lead"}
+_SYNONYMS = [
+    (r"\bfront[\s-]?end\b", "frontend"),
+    (r"\bback[\s-]?end\b", "backend"),
+    (r"\bfull[\s-]?stack\b", "fullstack"),
+    (r"\bdev[\s-]?ops\b", "devops"),
+    (r"\bswe\b", "software engineer"),
+    (r"\bsde\b", "software engineer"),
+    (r"\bsre\b", "site reliability engineer"),
+    (r"\bml\b", "machine learning"),
+    (r"\bai\b", "machine learning"),
+    (r"\bqa\b", "quality assurance"),
+    (r"\bpm\b", "product manager"),
+    (r"\bdevelopers?\b", "engineer"),
+    (r"\bdevs?\b", "engineer"),
+    (r"\bprogrammer\b", "engineer"),
+    (r"\bengineers\b", "engineer"),
+]
+# Role nouns shared by many unrelated titles; a match needs more than these
+_GENERIC = {"engineer", "engineering", "analyst", "scientist", "architect", "manager"}
+_NOISE = {"level", "remote", "hybrid", "onsite", "contract", "freelance", "the", "a", "an", "and", "of", "for", "with", "in"}
+
+_SENIORITY_LEVELS = {
+    "junior": "0-2 years; delivers well-scoped tasks with guidance",
+    "mid": "2-5 years; owns features end to end with little supervision",
+    "senior": "5+ years; owns systems, leads technical design and mentors others",
+    "lead": "8+ years; sets technical direction across teams and drives cross-team initiatives",
+}
+
+# canonical role: aliases, required skills, nice-to-have skills and
+# experience expectations; skill names follow skills_taxonomy.SKILLS
+ROLES = {
+    "software engineer": {
+        "aliases": ["software developer", "software development engineer", "application engineer"],
+        "required": ["Data Structures & Algorithms", "Object-Oriented Programming", "Git", "SQL", "Unit Testing", "REST APIs"],
+        "nice_to_have": ["System Design", "Docker", "CI/CD", "AWS", "Agile"],
+        "experience": ["Shipped production features in at least one mainstream language",
+                       "Code reviews, testing and debugging in a team codebase"],
+    },
+    "backend engineer": {
+        "aliases": ["backend", "backend software engineer", "api engineer", "server side engineer", "python engineer", "java engineer", "golang engineer"],
+        "required": ["REST APIs", "SQL", "PostgreSQL", "Docker", "Git", "Unit Testing", "System Design"],
+        "nice_to_have": ["Microservices", "Redis", "Apache Kafka", "Kubernetes", "AWS", "GraphQL", "gRPC", "CI/CD"],
+        "experience": ["Designed and operated APIs and services in production",
+                       "Data modelling, query tuning and caching", "On-call or production incident experience"],
+    },
+    "frontend engineer": {
+        "aliases": ["frontend", "frontend web engineer", "ui engineer", "react engineer", "web engineer"],
+        "required": ["JavaScript", "TypeScript", "HTML", "CSS", "React", "Git"],
+        "nice_to_have": ["Next.js", "Redux", "Tailwind CSS", "Unit Testing", "Selenium", "GraphQL", "Vue", "Angular"],
+        "experience": ["Built responsive, accessible user interfaces used in production",
+                       "State management and performance optimization in single-page apps"],
+    },
+    "fullstack engineer": {
+        "aliases": ["fullstack", "fullstack web engineer", "mern stack engineer", "mean stack engineer"],
+        "required": ["JavaScript", "TypeScript", "React", "Node.js", "REST APIs", "SQL", "Git"],
+        "nice_to_have": ["Next.js", "MongoDB", "PostgreSQL", "Docker", "AWS", "CI/CD", "GraphQL"],
+        "experience": ["Delivered features across frontend, backend and database",
+                       "Deployed and maintained web applications end to end"],
+    },
+    "mobile engineer": {
+        "aliases": ["mobile app engineer", "android engineer", "ios engineer", "flutter engineer", "react native engineer"],
+        "required": ["Android", "iOS", "Kotlin", "Swift", "REST APIs", "Git"],
+        "nice_to_have": ["Flutter", "React Native", "Unit Testing", "CI/CD", "GraphQL"],
+        "experience": ["Published and maintained apps in the App Store or Google Play",
+                       "Offline storage, performance and release management on mobile"],
+    },
+    "data scientist": {
+        "aliases": ["applied scientist", "research scientist", "decision scientist"],
+        "required": ["Python", "SQL", "Pandas", "NumPy", "scikit-learn", "Machine Learning"],
+        "nice_to_have": ["Deep Learning", "PyTorch", "TensorFlow", "NLP", "Apache Spark", "Tableau", "MLOps"],
+        "experience": ["Framed business problems as models and experiments",
+                       "Statistical analysis, A/B testing and communicating results to stakeholders"],
+    },
+    "data analyst": {
+        "aliases": ["business analyst", "bi analyst", "business intelligence analyst", "reporting analyst"],
+        "required": ["SQL", "Python", "Pandas", "Tableau", "Power BI", "Communication"],
+        "nice_to_have": ["BigQuery", "Snowflake", "dbt", "ETL"],
+        "experience": ["Built dashboards and reports used for business decisions",
+                       "Translated stakeholder questions into analyses"],
+    },
+    "data engineer": {
+        "aliases": ["big data engineer", "etl engineer", "analytics engineer", "data platform engineer"],
+        "required": ["Python", "SQL", "ETL", "Apache Spark", "Apache Airflow", "Data Structures & Algorithms"],
+        "nice_to_have": ["Apache Kafka", "dbt", "Snowflake", "BigQuery", "AWS", "Docker", "Hadoop"],
+        "experience": ["Built and operated batch and streaming data pipelines",
+                       "Data modelling, data quality and warehouse design"],
+    },
+    "machine learning engineer": {
+        "aliases": ["machine learning", "mlops engineer", "deep learning engineer", "llm engineer", "nlp engineer", "computer vision engineer"],
+        "required": ["Python", "Machine Learning", "Deep Learning", "PyTorch", "Docker", "MLOps"],
+        "nice_to_have": ["TensorFlow", "LLMs", "RAG", "LangChain", "Kubernetes", "AWS", "NLP", "Computer Vision"],
+        "experience": ["Trained, evaluated and deployed models to production",
+                       "Model monitoring, data pipelines for training and inference optimization"],
+    },
+    "devops engineer": {
+        "aliases": ["devops", "platform engineer", "build engineer", "release engineer", "infrastructure engineer"],
+        "required": ["Linux", "Docker", "Kubernetes", "CI/CD", "Terraform", "AWS", "Bash"],
+        "nice_to_have": ["Ansible", "Helm", "Prometheus", "Grafana", "GitHub Actions", "Jenkins", "Python", "Azure", "GCP"],
+        "experience": ["Automated build, test and deployment pipelines",
+                       "Operated production infrastructure as code with monitoring and alerting"],
+    },
+    "site reliability engineer": {
+        "aliases": ["reliability engineer", "production engineer"],
+        "required": ["Linux", "Kubernetes", "Prometheus", "Grafana", "Python", "System Design", "CI/CD"],
+        "nice_to_have": ["Go", "Terraform", "AWS", "GCP", "Nginx", "Apache Kafka"],
+        "experience": ["SLOs, incident response and blameless postmortems",
+                       "Capacity planning and performance tuning of distributed systems"],
+    },
+    "cloud engineer": {
+        "aliases": ["cloud architect", "aws engineer", "azure engineer", "gcp engineer", "solutions architect"],
+        "required": ["AWS", "Terraform", "Linux", "Docker", "Serverless", "CI/CD"],
+        "nice_to_have": ["Azure", "GCP", "Kubernetes", "Python", "Cybersecurity"],
+        "experience": ["Designed and migrated workloads on a public cloud",
+                       "Networking, IAM and cost management in cloud environments"],
+    },
+    "security engineer": {
+        "aliases": ["application security engineer", "cybersecurity engineer", "security analyst", "penetration tester"],
+        "required": ["Cybersecurity", "Linux", "OAuth", "Python", "AWS"],
+        "nice_to_have": ["Kubernetes", "Terraform", "Bash", "Docker"],
+        "experience": ["Threat modelling, vulnerability management and secure code review",
+                       "Incident response and security tooling"],
+    },
+    "quality assurance engineer": {
+        "aliases": ["test engineer", "test automation engineer", "sdet", "software development engineer in test", "quality assurance analyst"],
+        "required": ["Unit Testing", "Selenium", "Python", "CI/CD", "Agile"],
+        "nice_to_have": ["JavaScript", "Java", "REST APIs", "Docker", "SQL"],
+        "experience": ["Built and maintained automated test suites",
+                       "Test planning and release sign-off in an agile team"],
+    },
+    "product manager": {
+        "aliases": ["technical product manager", "product owner"],
+        "required": ["Communication", "Agile", "Project Management", "Leadership"],
+        "nice_to_have": ["SQL", "Tableau", "System Design"],
+        "experience": ["Owned a product roadmap from discovery to launch",
+                       "Defined success metrics and worked with engineering, design and stakeholders"],
+    },
+    "engineering manager": {
+        "aliases": ["software engineering manager", "development manager", "head of engineering", "tech lead", "technical lead"],
+        "required": ["Leadership", "Communication", "System Design", "Agile", "Project Management"],
+        "nice_to_have": ["Microservices", "AWS", "CI/CD"],
+        "experience": ["Managed and grew an engineering team, including hiring and performance reviews",
+                       "Delivered multi-quarter projects across teams"],
+    },
+}
+
+ROLE_PROFILE_PROMPT = """You maintain a knowledge base of job role requirements.
+Describe the typical requirements for the role "{title}" as a JSON object with exactly these keys:
+"required": the 5-8 most important skills, "nice_to_have": up to 8 further skills,
+"experience": 2-3 short experience expectations.
+Use common canonical skill names (e.g. "Python", "Docker", "REST APIs"). Reply with the JSON object only."""
+
+
+def normalize(title):
+    # -> (normalized key, seniority or None)
+    text = (title or "").lower()
+    text = re.sub(r"[/,|()]+", " ", text)
+    text = re.sub(r"\.(?=\s|$)", " ", text)
+    for pattern, replacement in _SYNONYMS:
+        text = re.sub(pattern, replacement, text)
+    seniority = None
+    words = []
+    for word in re.findall(r"[a-z0-9+#.-]+", text):
+        if word in _SENIORITY:
+            seniority = seniority or _SENIORITY[word]
+        elif word not in _NOISE:
+            words.append(word)
+    return " ".join(words), seniority
+
+
+def _match_word(word, words):
+    if word in words:
+        return "exact"
+    # Typos are tolerated in qualifiers only: "engineering" is not "engineer"
+    if word not in _GENERIC and difflib.get_close_matches(word, words, n=1, cutoff=MATCH_CUTOFF):
+        return "close"
+    return None
+
+
+def parse_profile(text):
+    # The LLM's JSON answer -> role profile, or None if it is unusable
+    match = re.search(r"\{.*\}", text or "", re.S)
+    if not match:
+        return None
+    try:
+        data = json.loads(match.group())
+    except json.JSONDecodeError:
+        return None
+    if not isinstance(data, dict) or not isinstance(data.get("required"), list) or not data["required"]:
+        return None
+    return {
+        "required": [str(s) for s in data["required"]][:10],
+        "nice_to_have": [str(s) for s in data.get("nice_to_have") or []][:10],
+        "experience": [str(s) for s in data.get("experience") or []][:5],
+    }
+
+
+class RoleKnowledgeBase:
+    def __init__(self, path=DB_PATH, roles=ROLES):
+        self.path = path
+        self.roles = dict(roles)
+        self._lock = threading.Lock()
+        sqlite_store.prepare(path)
+        with self._connect() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS roles (
+                    key TEXT PRIMARY KEY,
+                    title TEXT NOT NULL,
+                    profile TEXT NOT NULL,
+                    created REAL NOT NULL
+                )
+            """)
+            for key, title, profile in conn.execute("SELECT key, title, profile FROM roles"):
+                self.roles.setdefault(key, {**json.loads(profile), "aliases": [], "generated_from": title})
+        self._index()
+
+    def _connect(self):
+        return sqlite_store.connect(self.path)
+
+    def _index(self):
+        # normalized alias -> canonical role. Aliases that lost a seniority
+        # word ("tech lead" -> "tech") only match exactly.
+        self._aliases = {}
+        self._partial = {}
+        for role, profile in self.roles.items():
+            for alias in [role, *profile.get("aliases", [])]:
+                key, seniority = normalize(alias)
+                self._aliases.setdefault(key, role)
+                if seniority is None:
+                    self._partial.setdefault(key, role)
+
+    def match(self, title):
+        # -> (canonical role or None, seniority)
+        key, seniority = normalize(title)
+        if not key:
+            return None, seniority
+        with self._lock:
+            aliases = dict(self._aliases)
+            partial = dict(self._partial)
+        if key in aliases:
+            return aliases[key], seniority
+        # "backend engineer payments platform", "backnd engineer" -> the
+        # alias with the most words that all appear in the title, allowing
+        # typos per word. "sales engineer" shares only "engineer" with "aws
+        # engineer", so it matches nothing.
+        words = key.split()
+        best, best_score = None, None
+        for alias, role in partial.items():
+            alias_words = alias.split()
+            if not set(alias_words) - _GENERIC:
+                continue
+            matched = [_match_word(word, words) for word in alias_words]
+            if all(matched):
+                score = (len(alias_words), matched.count("exact"))
+                if best_score is None or score > best_score:
+                    best, best_score = role, score
+        return best, seniority
+
+    def add(self, title, profile):
+        key = normalize(title)[0]
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO roles (key, title, profile, created) VALUES (?, ?, ?, ?)",
+                (key, title, json.dumps(profile), time.time()),
+            )
+            self.roles[key] = {**profile, "aliases": [], "generated_from": title}
+            self._aliases[key] = key
+            self._partial[key] = key
+        return key
+
+    def lookup(self, title, generate=None):
+        # Role requirements for a title, or None. generate(title) is called
+        # once for titles that match no known role; its profile is stored.
+        role, seniority = self.match(title)
+        if role is None and generate is not None and normalize(title)[0]:
+            profile = generate(title)
+            if profile:
+                role = self.add(title, profile)
+                print(f"📚 Added role profile for {title!r}")
+        if role is None:
+            return None
+        profile = self.roles[role]
+        return {
+            "role": role,
+            "title": title,
+            "seniority": seniority,
+            "required": profile["required"],
+            "nice_to_have": profile.get("nice_to_have", []),
+            "experience": profile.get("experience", []),
+        }
+
+
+def format_requirements(requirements):
+    if requirements is None:
+        return "No precomputed profile for this target; derive the requirements from the target information."
+    seniority = requirements["seniority"]
+    levels = (
+        f"{seniority}: {_SENIORITY_LEVELS[seniority]}" if seniority
+        else "; ".join(f"{level}: {text}" for level, text in _SENIORITY_LEVELS.items())
+    )
+    lines = [
+        f"Role profile: {requirements['role'].title()} (matched from {requirements['title']!r})",
+        f"Required skills: {', '.join(requirements['required'])}",
+        f"Nice-to-have skills: {', '.join(requirements['nice_to_have']) or 'none'}",
+        f"Seniority expectations: {levels}",
+        "Typical experience: " + "; ".join(requirements["experience"]),
+    ]
+    return "\n".join(lines)
+
+
+def requirement_text(requirements):
+    # Skills text for skills_taxonomy.skill_diff on the target side
+    if requirements is None:
+        return ""
+    return ", ".join(requirements["required"] + requirements["nice_to_have"])
+
+
+knowledge_base = RoleKnowledgeBase()
@@ -0,0 +1,165 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Token, LLM-call and wall-time budgets for one analysis run and for each
+# agent within it. The crew runner opens a budget around the run; every LLM
+# call goes through llm_gateway.GatewayLLM, which checks the budget before
+# calling the provider and charges it afterwards. Once any limit is reached
+# the remaining agent turns are answered locally with a short notice instead
+# of reaching the provider, so the crew finishes with the results it has and
+# the runner skips stages that have not started. Usage against the limits is
+# returned with every result.
+#
+# Run limits come from RUN_MAX_TOKENS, RUN_MAX_CALLS and RUN_MAX_SECONDS (0
+# disables a limit) and are scaled by the target count in multi-target runs
+# (Main_Server.new_run_budget); per-agent limits are max_tokens, max_calls and
+# max_seconds in Main_Server.AGENT_ROUTES.
+
+MAX_TOKENS = int(os.getenv("RUN_MAX_TOKENS", "300000"))
+MAX_CALLS = int(os.getenv("RUN_MAX_CALLS", "80"))
+MAX_SECONDS = float(os.getenv("RUN_MAX_SECONDS", "900"))
+# Used when a provider does not report usage (e.g. some streaming responses)
+CHARS_PER_TOKEN = 4
+
+_current = contextvars.ContextVar("run_budget", default=None)
+
+
+class RunBudget:
+    def __init__(self, max_tokens=MAX_TOKENS, max_calls=MAX_CALLS, max_seconds=MAX_SECONDS, agent_limits=None):
+        self.limits = {"tokens": max_tokens, "calls": max_calls, "seconds": max_seconds}
+        # agent name -> {"tokens": ..., "calls": ..., "seconds": ...}
+        self.agent_limits = agent_limits or {}
+        self.exhausted = None
+        # Agent turns answered locally because a run or agent limit was hit,
+        # and the agent instances they belonged to
+        self.stops = 0
+        self.stopped = set()
+        self._start = time.monotonic()
+        self._tokens = 0
+        self._calls = 0
+        # (agent, instance) -> usage; several instances of one agent run in
+        # parallel in multi-target runs and each gets the agent's limits
+        self._agents = {}
+        self._lock = threading.Lock()
+
+    @property
+    def partial(self):
+        # Whether any part of the run was skipped or cut short
+        return bool(self.exhausted or self.stops)
+
+    def _agent(self, agent, instance):
+        usage = self._agents.get((agent, instance))
+        if usage is None:
+            usage = self._agents[(agent, instance)] = {
+                "tokens": 0, "calls": 0, "first": time.monotonic(), "last": time.monotonic(),
+            }
+        return usage
+
+    def check(self, agent=None, instance=None):
+        # Returns why the next call must not be made, or None
+        with self._lock:
+            reason = self._reason(agent, instance)
+            if reason:
+                self.stops += 1
+                self.stopped.add(instance)
+            return reason
+
+    def _spent(self):
+        if self.exhausted:
+            return self.exhausted
+        seconds = time.monotonic() - self._start
+        for name, used in (("tokens", self._tokens), ("calls", self._calls), ("seconds", seconds)):
+            limit = self.limits[name]
+            if limit and used >= limit:
+                self.exhausted = f"run {name} budget of {limit:g} reached"
+                return self.exhausted
+        return None
+
+    def spent(self):
+        # Why the run as a whole cannot make another call, or None
+        with self._lock:
+            return self._spent()
+
+    def _reason(self, agent, instance):
+        if self._spent():
+            return self.exhausted
+
+        limits = self.agent_limits.get(agent) or {}
+        usage = self._agent(agent, instance)
+        seconds = time.monotonic() - usage["first"]
+        for name, used in (("tokens", usage["tokens"]), ("calls", usage["calls"]), ("seconds", seconds)):
+            limit = limits.get(name)
+            if limit and used >= limit:
+                # Only this agent stops; the rest of the run goes on
+                return f"{agent} {name} budget of {limit:g} reached"
+        return None
+
+    def charge(self, agent=None, instance=None, tokens=0):
+        with self._lock:
+            self._tokens += tokens
+            self._calls += 1
+            usage = self._agent(agent, instance)
+            usage["tokens"] += tokens
+            usage["calls"] += 1
+            usage["last"] = time.monotonic()
+
+    def report(self):
+        with self._lock:
+            agents = {}
+            for (agent, _), usage in self._agents.items():
+                totals = agents.setdefault(agent or "-", {"tokens": 0, "calls": 0, "seconds": 0.0})
+                totals["tokens"] += usage["tokens"]
+                totals["calls"] += usage["calls"]
+                totals["seconds"] = round(totals["seconds"] + usage["last"] - usage["first"], 3)
+            return {
+                "limits": dict(self.limits),
+                "used": {
+                    "tokens": self._tokens,
+                    "calls": self._calls,
+                    "seconds": round(time.monotonic() - self._start, 3),
+                },
+                "agents": agents,
+                "exhausted": self.exhausted,
+                "stops": self.stops,
+                "partial": bool(self.exhausted or self.stops),
+            }
+
+
+@contextmanager
+def track(budget):
+    token = _current.set(budget)
+    try:
+        yield budget
+    finally:
+        _current.reset(token)
+
+
+def current():
+    return _current.get()
+
+
+def exhausted():
+    budget = _current.get()
+    return budget.spent() if budget is not None else None
+
+
+def stopped(llms):
+    # Whether any of these agent LLMs had a turn cut short by the budget
+    budget = _current.get()
+    return budget is not None and any(id(llm) in budget.stopped for llm in llms)
+
+
+def estimate_tokens(messages, result):
+    text = result if isinstance(result, str) else ""
+    for message in messages if isinstance(messages, list) else [messages]:
+        content = message.get("content") if isinstance(message, dict) else message
+        text += content if isinstance(content, str) else str(content or "")
+    return len(text) // CHARS_PER_TOKEN
+
+
+def stopped_answer(reason):
+    # Parsed by crewai as the agent's final answer, ending its turn
+    return f"Thought: The analysis budget is exhausted.\nFinal Answer: [Stopped early: {reason}]"
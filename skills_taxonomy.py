@@ -0,0 +1,246 @@
+import json
+import os
+from collections import deque
+
+# Local skill ontology and a compiled Aho–Corasick automaton over every alias,
+# so resume text, GitHub languages and LinkedIn data are reduced to canonical
+# skill sets in one linear pass. The candidate-vs-target diff is handed to the
+# skills analyst so the LLM reasons over a compact list instead of raw text.
+# Extra skills can be added with SKILL_TAXONOMY_PATH (a JSON object in the
+# same shape as SKILLS).
+
+CATEGORY_PARENTS = {
+    "Programming Languages": "Engineering",
+    "Web Frameworks": "Engineering",
+    "Frontend": "Engineering",
+    "Mobile": "Engineering",
+    "Databases": "Data",
+    "Data Engineering": "Data",
+    "Machine Learning": "Data",
+    "Cloud": "Infrastructure",
+    "DevOps": "Infrastructure",
+    "Containers & Orchestration": "Infrastructure",
+    "Testing": "Engineering",
+    "Security": "Infrastructure",
+    "Practices": "Engineering",
+    "Soft Skills": "Professional",
+}
+
+# canonical name: (category, aliases); the canonical name always matches too
+SKILLS = {
+    "Python": ("Programming Languages", ["python3"]),
+    "Java": ("Programming Languages", []),
+    "JavaScript": ("Programming Languages", ["js", "ecmascript", "es6"]),
+    "TypeScript": ("Programming Languages", []),
+    "Go": ("Programming Languages", ["golang"]),
+    "Rust": ("Programming Languages", []),
+    "C": ("Programming Languages", []),
+    "C++": ("Programming Languages", ["cpp"]),
+    "C#": ("Programming Languages", ["csharp", "c sharp"]),
+    "Ruby": ("Programming Languages", []),
+    "PHP": ("Programming Languages", []),
+    "Kotlin": ("Programming Languages", []),
+    "Swift": ("Programming Languages", []),
+    "Scala": ("Programming Languages", []),
+    "R": ("Programming Languages", []),
+    "SQL": ("Databases", []),
+    "Bash": ("Programming Languages", ["shell scripting"]),
+    "HTML": ("Frontend", ["html5"]),
+    "CSS": ("Frontend", ["css3", "scss", "sass"]),
+    "React": ("Frontend", ["react.js", "reactjs"]),
+    "Angular": ("Frontend", ["angularjs"]),
+    "Vue": ("Frontend", ["vue.js", "vuejs"]),
+    "Next.js": ("Frontend", ["nextjs"]),
+    "Redux": ("Frontend", []),
+    "Tailwind CSS": ("Frontend", ["tailwind", "tailwindcss"]),
+    "Node.js": ("Web Frameworks", ["Node", "nodejs"]),
+    "Express": ("Web Frameworks", ["express.js", "expressjs"]),
+    "Django": ("Web Frameworks", []),
+    "Flask": ("Web Frameworks", []),
+    "FastAPI": ("Web Frameworks", []),
+    "Spring Boot": ("Web Frameworks", ["Spring"]),
+    "Ruby on Rails": ("Web Frameworks", ["rails"]),
+    ".NET": ("Web Frameworks", ["dotnet", "asp.net"]),
+    "GraphQL": ("Web Frameworks", []),
+    "REST APIs": ("Web Frameworks", ["REST", "restful", "rest api", "restful apis"]),
+    "gRPC": ("Web Frameworks", []),
+    "Android": ("Mobile", []),
+    "iOS": ("Mobile", []),
+    "React Native": ("Mobile", []),
+    "Flutter": ("Mobile", ["dart"]),
+    "PostgreSQL": ("Databases", ["postgres", "psql"]),
+    "MySQL": ("Databases", []),
+    "SQLite": ("Databases", []),
+    "MongoDB": ("Databases", ["mongo"]),
+    "Redis": ("Databases", []),
+    "Elasticsearch": ("Databases", ["elastic search", "opensearch"]),
+    "Cassandra": ("Databases", []),
+    "DynamoDB": ("Databases", []),
+    "Apache Spark": ("Data Engineering", ["spark", "pyspark"]),
+    "Apache Kafka": ("Data Engineering", ["kafka"]),
+    "Apache Airflow": ("Data Engineering", ["airflow"]),
+    "Hadoop": ("Data Engineering", []),
+    "dbt": ("Data Engineering", []),
+    "Snowflake": ("Data Engineering", []),
+    "BigQuery": ("Data Engineering", []),
+    "ETL": ("Data Engineering", ["elt"]),
+    "Pandas": ("Data Engineering", []),
+    "NumPy": ("Data Engineering", []),
+    "Tableau": ("Data Engineering", []),
+    "Power BI": ("Data Engineering", ["powerbi"]),
+    "Machine Learning": ("Machine Learning", ["ML"]),
+    "Deep Learning": ("Machine Learning", []),
+    "PyTorch": ("Machine Learning", ["torch"]),
+    "TensorFlow": ("Machine Learning", ["keras"]),
+    "scikit-learn": ("Machine Learning", ["sklearn", "scikit learn"]),
+    "NLP": ("Machine Learning", ["natural language processing"]),
+    "Computer Vision": ("Machine Learning", ["opencv"]),
+    "LLMs": ("Machine Learning", ["llm", "large language models", "generative ai", "genai"]),
+    "LangChain": ("Machine Learning", []),
+    "CrewAI": ("Machine Learning", []),
+    "RAG": ("Machine Learning", ["retrieval augmented generation"]),
+    "MLOps": ("Machine Learning", ["mlflow", "kubeflow"]),
+    "AWS": ("Cloud", ["amazon web services", "ec2", "s3", "lambda"]),
+    "Azure": ("Cloud", ["microsoft azure"]),
+    "GCP": ("Cloud", ["google cloud", "google cloud platform"]),
+    "Serverless": ("Cloud", []),
+    "Docker": ("Containers & Orchestration", ["containers", "dockerfile"]),
+    "Kubernetes": ("Containers & Orchestration", ["k8s", "kubectl", "eks", "gke", "aks"]),
+    "Helm": ("Containers & Orchestration", []),
+    "Terraform": ("DevOps", ["infrastructure as code"]),
+    "Ansible": ("DevOps", []),
+    "CI/CD": ("DevOps", ["ci cd", "continuous integration", "continuous delivery", "continuous deployment"]),
+    "GitHub Actions": ("DevOps", []),
+    "Jenkins": ("DevOps", []),
+    "GitLab CI": ("DevOps", []),
+    "Git": ("DevOps", ["github", "gitlab", "version control"]),
+    "Linux": ("DevOps", ["unix", "ubuntu"]),
+    "Prometheus": ("DevOps", []),
+    "Grafana": ("DevOps", []),
+    "Nginx": ("DevOps", []),
+    "Microservices": ("Practices", ["microservice"]),
+    "System Design": ("Practices", ["distributed systems", "scalability"]),
+    "Data Structures & Algorithms": ("Practices", ["DSA", "data structures", "algorithms"]),
+    "Object-Oriented Programming": ("Practices", ["oop", "object oriented"]),
+    "Agile": ("Practices", ["scrum", "kanban"]),
+    "Unit Testing": ("Testing", ["pytest", "junit", "jest", "unittest", "tdd"]),
+    "Selenium": ("Testing", ["cypress", "playwright"]),
+    "OAuth": ("Security", ["oauth2", "openid connect", "jwt"]),
+    "Cybersecurity": ("Security", ["application security", "appsec", "owasp"]),
+    "Leadership": ("Soft Skills", ["team lead", "mentoring", "mentorship"]),
+    "Communication": ("Soft Skills", ["stakeholder management"]),
+    "Project Management": ("Soft Skills", ["jira"]),
+}
+
+
+# Spellings that are also everyday words only match with this exact casing
+CASE_SENSITIVE = {"C", "R", "Go", "Node", "Spring", "Express", "REST", "ML", "DSA"}
+
+
+def _load_extra(path):
+    if not path or not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return {name: (category, aliases) for name, (category, aliases) in json.load(f).items()}
+
+
+def _is_word_char(ch):
+    # "+" and "#" so that "C" does not match inside "C++" or "C#"
+    return ch.isalnum() or ch in "_+#"
+
+
+class SkillMatcher:
+    # Aho–Corasick over lowercased aliases; matches are kept only on word
+    # boundaries so "go" does not fire inside "google".
+    def __init__(self, skills):
+        self.categories = {name: category for name, (category, _) in skills.items()}
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+        for name, (_, aliases) in skills.items():
+            for alias in {name, *aliases}:
+                self._add(alias.lower(), name, alias if alias in CASE_SENSITIVE else None)
+        self._build()
+
+    def _add(self, pattern, name, exact=None):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), name, exact))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0) if state else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def extract(self, text):
+        # Canonical skill -> number of mentions
+        found = {}
+        original = text or ""
+        text = original.lower()
+        state = 0
+        for end, ch in enumerate(text):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, name, exact in self._out[state]:
+                start = end - length + 1
+                if exact and original[start:end + 1] != exact:
+                    continue
+                if start > 0 and _is_word_char(text[start - 1]) and _is_word_char(text[start]):
+                    continue
+                if end + 1 < len(text) and _is_word_char(text[end + 1]) and _is_word_char(text[end]):
+                    continue
+                found[name] = found.get(name, 0) + 1
+        return found
+
+    def by_category(self, skills):
+        grouped = {}
+        for name in sorted(skills, key=str.lower):
+            grouped.setdefault(self.categories[name], []).append(name)
+        return grouped
+
+
+matcher = SkillMatcher({**SKILLS, **_load_extra(os.getenv("SKILL_TAXONOMY_PATH"))})
+
+
+def extract_skills(text):
+    return matcher.extract(text)
+
+
+def skill_diff(candidate_text, target_text):
+    candidate = matcher.extract(candidate_text)
+    target = matcher.extract(target_text)
+    return {
+        "candidate": matcher.by_category(candidate),
+        "matched": sorted(set(candidate) & set(target), key=str.lower),
+        "missing": sorted(set(target) - set(candidate), key=str.lower),
+        "mentions": candidate,
+    }
+
+
+def format_diff(diff):
+    lines = ["Candidate skills by category:"]
+    for category, names in sorted(diff["candidate"].items()):
+        parent = CATEGORY_PARENTS.get(category)
+        label = f"{parent} / {category}" if parent else category
+        lines.append(f"- {label}: {', '.join(names)}")
+    if not diff["candidate"]:
+        lines.append("- none recognized")
+    lines.append(f"Target skills the candidate has: {', '.join(diff['matched']) or 'none'}")
+    lines.append(f"Target skills missing from the profile: {', '.join(diff['missing']) or 'none'}")
+    return "\n".join(lines)
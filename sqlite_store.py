@@ -0,0 +1,29 @@
+import os
+import sqlite3
+from contextlib import contextmanager
+
+# Connection handling shared by the SQLite-backed stores (stage and result
+# caches, job descriptions, roles, history). Every operation opens its own
+# short-lived connection, so a store can be used from any thread or worker
+# process; the connection commits on success and rolls back on error.
+
+TIMEOUT_SECONDS = 30
+
+
+def prepare(path):
+    # Creates the database's directory
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+
+@contextmanager
+def connect(path, row_factory=None):
+    conn = sqlite3.connect(path, timeout=TIMEOUT_SECONDS)
+    if row_factory is not None:
+        conn.row_factory = row_factory
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
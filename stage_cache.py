@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import sqlite_store
+
+# Shared memo of crew stage outputs. Each entry is keyed by a hash of only
+# the inputs that affect that stage, so re-running the same profile against a
+# new target reuses the profile stages. Entries live in SQLite so every
+# worker process hits the same cache and the UI lists and clears what the
+# workers actually use; the least recently used entries are evicted past
+# max_entries.
+
+DB_PATH = os.getenv("STAGE_CACHE_PATH", os.path.join("db", "stage_cache.sqlite3"))
+MAX_ENTRIES = int(os.getenv("STAGE_CACHE_MAX_ENTRIES", "256"))
+
+
+def stage_key(stage, **parts):
+    payload = json.dumps({"stage": stage, **parts}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    def __init__(self, path=DB_PATH, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        sqlite_store.prepare(path)
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript("""
+                CREATE TABLE IF NOT EXISTS stages (
+                    key TEXT PRIMARY KEY,
+                    stage TEXT NOT NULL,
+                    label TEXT,
+                    value TEXT NOT NULL,
+                    created REAL NOT NULL,
+                    last_used REAL NOT NULL,
+                    hits INTEGER NOT NULL DEFAULT 0
+                );
+                CREATE INDEX IF NOT EXISTS stages_last_used ON stages (last_used);
+            """)
+
+    def _connect(self):
+        return sqlite_store.connect(self.path)
+
+    def get(self, key):
+        with self._connect() as conn:
+            row = conn.execute("SELECT value FROM stages WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE stages SET hits = hits + 1, last_used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def put(self, key, stage, value, label=""):
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO stages (key, stage, label, value, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                (key, stage, label, json.dumps(value), now, now),
+            )
+            conn.execute(
+                "DELETE FROM stages WHERE key NOT IN (SELECT key FROM stages ORDER BY last_used DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def entries(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT key, stage, label, created, hits, length(value) FROM stages ORDER BY last_used DESC"
+            ).fetchall()
+        return [
+            {
+                "key": key[:12],
+                "stage": stage,
+                "label": label,
+                "age_seconds": int(time.time() - created),
+                "hits": hits,
+                "size": size,
+            }
+            for key, stage, label, created, hits, size in rows
+        ]
+
+    def clear(self, stage=None):
+        with self._lock, self._connect() as conn:
+            if stage is None:
+                return conn.execute("DELETE FROM stages").rowcount
+            return conn.execute("DELETE FROM stages WHERE stage = ?", (stage,)).rowcount
+
+
+cache = StageCache()
@@ -0,0 +1,98 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    from crewai.events import crewai_event_bus, LLMStreamChunkEvent
+except ImportError:
+    from crewai.utilities.events import crewai_event_bus, LLMStreamChunkEvent
+
+import cancellation
+
+# Forwards LLM stream chunks and finished task outputs from a running crew to
+# whoever is rendering it (the Streamlit page). The event bus is global, so
+# chunks are routed to the sink registered by the thread running the crew.
+
+_sinks = {}
+_lock = threading.Lock()
+
+
+class StreamSink:
+    def __init__(self):
+        self.events = queue.Queue()
+
+    def chunk(self, text):
+        if text:
+            self.events.put(("chunk", text))
+
+    def task(self, agent, raw):
+        self.events.put(("task", agent, raw))
+
+    def task_done(self, output):
+        # Crew task_callback signature
+        self.task(getattr(output, "agent", ""), getattr(output, "raw", str(output)))
+
+    def stage(self, name, state):
+        self.events.put(("stage", name, state))
+
+    def finish(self, result=None, error=None):
+        self.events.put(("done", result, error))
+
+
+@contextmanager
+def stream_to(sink):
+    ident = threading.get_ident()
+    with _lock:
+        _sinks[ident] = sink
+    try:
+        yield sink
+    finally:
+        with _lock:
+            _sinks.pop(ident, None)
+
+
+def _current_sink():
+    # Only the calling thread's own sink: stream chunk handlers run on the
+    # emitting thread, and bind() carries a sink onto helper threads. A thread
+    # without one (e.g. a multi-target fan-out) streams nowhere rather than
+    # into another job's sink.
+    with _lock:
+        return _sinks.get(threading.get_ident())
+
+
+def bind(fn):
+    # Lets fn stream to the calling thread's sink when run on another thread
+    sink = _current_sink()
+
+    def bound(*args, **kwargs):
+        if sink is None:
+            return fn(*args, **kwargs)
+        with stream_to(sink):
+            return fn(*args, **kwargs)
+
+    return bound
+
+
+@crewai_event_bus.on(LLMStreamChunkEvent)
+def _on_stream_chunk(source, event):
+    # Chunks are emitted on the thread making the LLM call, in its run's
+    # context: a cancelled run stops its streaming completion here, which
+    # closes the provider stream and frees the call's gateway slots
+    cancellation.check()
+    sink = _current_sink()
+    if sink is not None:
+        sink.chunk(event.chunk)
+
+
+class Throttle:
+    def __init__(self, interval=0.15):
+        self.interval = interval
+        self._last = 0.0
+
+    def ready(self):
+        now = time.monotonic()
+        if now - self._last >= self.interval:
+            self._last = now
+            return True
+        return False
@@ -1,8 +1,69 @@
 import streamlit as st
-import tempfile
 import os
 import re
-from Main_Server import url_crew, file_crew, hybrid_crew
+import time
+from Main_Server import AnalysisResult, MultiTargetResult, URL_FETCH_TOOLS
+from datetime import date, timedelta
+import cancellation
+import job_queue
+import prefetch
+import stage_cache
+import result_cache
+import history
+import streaming
+import uploads
+
+# A running analysis is cancelled once its page has not checked in for this
+# long (the tab was closed); the page checks in every WATCH_SECONDS
+ABANDON_SECONDS = float(os.getenv("UI_ABANDON_SECONDS", "30"))
+WATCH_SECONDS = 5
+
+
+def report_section(sections, number):
+    # Text of report section "<number>. TITLE" from history.parse_sections
+    return next((text for title, text in sections.items() if title.split(".")[0] == number), None)
+
+
+def show_report_section(job, number):
+    # On-demand report sections (Main_Server.REPORT_SECTIONS) are generated
+    # by a worker the first time their tab is opened; the section job is
+    # remembered per analysis, and its result is also in the result cache
+    key = f"section_{job['id']}_{number}"
+    if key not in st.session_state:
+        inputs = {k: v for k, v in job["inputs"].items() if k != "prefetched"}
+        st.session_state[key] = job_queue.submit("report_section", inputs, {
+            "section": number,
+            "tasks_output": job["result"]["tasks_output"],
+            "abandon_after": ABANDON_SECONDS,
+        })
+    live_output = st.empty()
+    buffer = ""
+    last_event = 0
+    throttle = streaming.Throttle()
+    watch_throttle = streaming.Throttle(WATCH_SECONDS)
+    with st.spinner("✍️ Writing this section..."):
+        while True:
+            section_job = job_queue.get(st.session_state[key])
+            if watch_throttle.ready():
+                job_queue.watch(section_job["id"])
+            for last_event, kind, data in job_queue.events(section_job["id"], last_event):
+                if kind == "chunk":
+                    buffer += data
+                    if throttle.ready():
+                        live_output.markdown(buffer)
+            if section_job["state"] in job_queue.FINISHED:
+                break
+            time.sleep(0.5)
+    live_output.empty()
+    if section_job["state"] == job_queue.DONE:
+        st.markdown(section_job["result"]["raw"])
+        return
+    # Let the next visit to the tab try again
+    del st.session_state[key]
+    if section_job["state"] == job_queue.CANCELLED:
+        st.warning(f"🛑 Section cancelled: {section_job['error']}")
+    else:
+        st.error(f"❌ Could not generate this section: {section_job['error']}")
 
 st.set_page_config(
     page_title="AI Career Assistant", 
@@ -22,6 +83,7 @@ resume_url = None
 github_url = None
 linkedin_url = None
 uploaded_file = None
+use_rag = False
 target_input = None
 st.sidebar.subheader("🎯 Target Position Details")
 input_type = st.sidebar.radio(
@@ -46,6 +108,19 @@ else:
         placeholder="e.g., Python, Machine Learning, AWS, Agile, Leadership, React, Node.js",
         height=100
     )
+multi_target = st.sidebar.checkbox(
+    "🧮 Compare against multiple targets",
+    help="Fetch the profile once and rank it against several roles, JDs or keyword sets"
+)
+extra_targets = []
+if multi_target:
+    extra_targets_text = st.sidebar.text_area(
+        "Additional targets",
+        placeholder="One per line. Separate job descriptions with a line containing ---",
+        height=150
+    )
+    separator = r"^\s*---\s*$" if input_type == "Job Description" else r"\n"
+    extra_targets = [t.strip() for t in re.split(separator, extra_targets_text, flags=re.M) if t.strip()]
 if input_method in ["URLs Only"]:
     st.sidebar.subheader("🔗 Profile URLs")
     resume_url = st.sidebar.text_input(
@@ -71,6 +146,12 @@ if input_method in ["File Upload Only"]:
         type=['pdf', 'docx'],
         help="Upload your resume in PDF or DOCX format"
     )
+    use_rag = st.sidebar.checkbox(
+        "Use RAG for very long documents",
+        value=False,
+        key='rag',
+        help="Resumes are read directly; enable to search very long documents through the vector store instead"
+    )
    
 if input_method in ["Both URLs and Files"]:
     st.sidebar.subheader("📁 File Upload")
@@ -80,6 +161,12 @@ if input_method in ["Both URLs and Files"]:
         help="Upload your resume in PDF or DOCX format"
         
     )
+    use_rag = st.sidebar.checkbox(
+        "Use RAG for very long documents",
+        value=False,
+        key='ragh',
+        help="Resumes are read directly; enable to search very long documents through the vector store instead"
+    )
     st.sidebar.subheader("🔗 Profile URLs")
     resume_url = st.sidebar.text_input(
         "Resume URL (PDF/Google Drive)", 
@@ -97,269 +184,447 @@ if input_method in ["Both URLs and Files"]:
     include_github = st.sidebar.checkbox("Include GitHub Analysis", value=True,key='gith')
     include_linkedin = st.sidebar.checkbox("Include LinkedIn Analysis", value=True,key='link')
 
-col1, col2 = st.columns([2, 1])
+# Start fetching profile URLs while the rest of the form is filled in
+if "prefetcher" not in st.session_state:
+    st.session_state.prefetcher = prefetch.Prefetcher(URL_FETCH_TOOLS)
+prefetch_urls = {}
+if input_method in ["URLs Only", "Both URLs and Files"]:
+    prefetch_urls = {
+        "resume_url": resume_url,
+        "github_url": github_url if include_github else "",
+        "linkedin_url": linkedin_url if include_linkedin else "",
+    }
+st.session_state.prefetcher.update(prefetch_urls)
+prefetch_status = st.session_state.prefetcher.status()
+if prefetch_status:
+    st.sidebar.caption("⚡ Prefetch: " + ", ".join(
+        f"{source.replace('_url', '')} ({state})" for source, state in prefetch_status.items()
+    ))
+
+with st.sidebar.expander("🗂️ Caches"):
+    use_stage_cache = st.checkbox(
+        "Reuse cached stages",
+        value=True,
+        help="Profile stages are reused when only the target changes"
+    )
+    force_rerun = st.checkbox(
+        "Force re-run",
+        value=False,
+        help="Ignore stored results and cached stages for this analysis"
+    )
+    if st.button("🧹 Clear stage cache"):
+        removed = stage_cache.cache.clear()
+        st.success(f"Removed {removed} cached stages")
+    cache_entries = stage_cache.cache.entries()
+    if cache_entries:
+        st.dataframe(cache_entries, hide_index=True)
+    else:
+        st.caption("Stage cache is empty.")
+    if st.button("🧹 Clear stored results"):
+        removed = result_cache.cache.clear()
+        st.success(f"Removed {removed} stored results")
+    result_stats = result_cache.cache.stats()
+    st.caption(f"Stored results: {result_stats['entries']} ({result_stats['bytes'] / 1024:.0f} KB of {result_stats['max_bytes'] / 1024 / 1024:.0f} MB)")
+
+analysis_tab, history_tab = st.tabs(["🚀 Analysis", "📚 History"])
+
+with analysis_tab:
+    col1, col2 = st.columns([2, 1])
 
-with col1:
-    st.markdown("### 🔍 How it works:")
-    st.markdown("""
-    1. **Data Collection**: My AI agents fetch your professional data from various sources
-    2. **Smart Analysis**: AI adapts analysis based on your target (role, JD, or keywords)
-    3. **Skills Gap Identification**: Identify missing technical and soft skills
-    4. **Experience Evaluation**: Assess career progression and alignment
-    5. **Recruiter Feedback**: Get honest, actionable feedback from an AI recruiter
-    """)
+    with col1:
+        st.markdown("### 🔍 How it works:")
+        st.markdown("""
+        1. **Data Collection**: My AI agents fetch your professional data from various sources
+        2. **Smart Analysis**: AI adapts analysis based on your target (role, JD, or keywords)
+        3. **Skills Gap Identification**: Identify missing technical and soft skills
+        4. **Experience Evaluation**: Assess career progression and alignment
+        5. **Recruiter Feedback**: Get honest, actionable feedback from an AI recruiter
+        """)
 
-with col2:
-    st.markdown("### 📊 What you'll get:")
-    st.markdown("""
-    - ✅ Tailored skills gap analysis
-    - ✅ Experience evaluation
-    - ✅ Resume optimization tips
-    - ✅ Interview preparation advice
-    - ✅ Career development roadmap
-    - ✅ Target-specific recommendations
-    """)
-st.markdown("### 🎯 Target Input Types:")
-col_a, col_b, col_c = st.columns(3)
+    with col2:
+        st.markdown("### 📊 What you'll get:")
+        st.markdown("""
+        - ✅ Tailored skills gap analysis
+        - ✅ Experience evaluation
+        - ✅ Resume optimization tips
+        - ✅ Interview preparation advice
+        - ✅ Career development roadmap
+        - ✅ Target-specific recommendations
+        """)
+    st.markdown("### 🎯 Target Input Types:")
+    col_a, col_b, col_c = st.columns(3)
 
-with col_a:
-    st.markdown("""
-    **Job Role/Title** 🎯
-    - Quick analysis for specific positions
-    - Industry standard comparisons
-    - Role-focused recommendations
-    """)
+    with col_a:
+        st.markdown("""
+        **Job Role/Title** 🎯
+        - Quick analysis for specific positions
+        - Industry standard comparisons
+        - Role-focused recommendations
+        """)
 
-with col_b:
-    st.markdown("""
-    **Job Description** 📄
-    - Most comprehensive analysis
-    - Exact requirement matching
-    - Position-specific optimization
-    """)
+    with col_b:
+        st.markdown("""
+        **Job Description** 📄
+        - Most comprehensive analysis
+        - Exact requirement matching
+        - Position-specific optimization
+        """)
 
-with col_c:
-    st.markdown("""
-    **Keywords/Skills** 🔑
-    - Skill-focused assessment
-    - Targeted learning paths
-    - Keyword optimization
-    """)
+    with col_c:
+        st.markdown("""
+        **Keywords/Skills** 🔑
+        - Skill-focused assessment
+        - Targeted learning paths
+        - Keyword optimization
+        """)
 
-if st.sidebar.button("🚀 Run Career Analysis", type="primary"):
-    has_input = False
-    
-    if input_method in ["URLs Only", "Both URLs and Files"]:
-        if resume_url or github_url or linkedin_url:
-            has_input = True
+    if st.sidebar.button("🚀 Run Career Analysis", type="primary"):
+        has_input = False
     
-    if input_method in ["File Upload Only", "Both URLs and Files"]:
-        if uploaded_file:
-            has_input = True
+        if input_method in ["URLs Only", "Both URLs and Files"]:
+            if resume_url or github_url or linkedin_url:
+                has_input = True
     
-    if not has_input:
-        st.sidebar.error("❌ Please provide at least one input source!")
-        st.stop()
+        if input_method in ["File Upload Only", "Both URLs and Files"]:
+            if uploaded_file:
+                has_input = True
     
-    if not target_input:
-        st.sidebar.warning("⚠️ Target information will help provide more specific feedback!")
+        if not has_input:
+            st.sidebar.error("❌ Please provide at least one input source!")
+            st.stop()
     
-    progress_bar = st.progress(0)
-    status_text = st.empty()
+        if not target_input:
+            st.sidebar.warning("⚠️ Target information will help provide more specific feedback!")
     
-    try:
-        crew_to_use = None
         inputs = {
             "target_input": target_input or "General Professional Position",
-            "input_type": input_type
+            "input_type": input_type,
+            "use_rag": use_rag
         }
-        
+    
         if input_method == "URLs Only":
-            crew_to_use = url_crew
             inputs.update({
                 "resume_url": resume_url or "",
                 "github_url": github_url if include_github else "",
                 "linkedin_url": linkedin_url if include_linkedin else ""
             })
-            
+        
         elif input_method == "File Upload Only":
-            crew_to_use = file_crew
             if uploaded_file:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    inputs["uploaded_file_path"] = tmp_file.name
+                inputs["uploaded_file"] = uploads.UploadedResume(uploaded_file.name, uploaded_file.getbuffer())
             else:
                 st.sidebar.error("❌ Please upload a file!")
                 st.stop()
-                
+            
         else: 
-            crew_to_use = hybrid_crew
             inputs.update({
                 "resume_url": resume_url or "",
                 "github_url": github_url if include_github else "",
                 "linkedin_url": linkedin_url if include_linkedin else ""
             })
             if uploaded_file:
-                with tempfile.NamedTemporaryFile(delete=False, suffix=f".{uploaded_file.name.split('.')[-1]}") as tmp_file:
-                    tmp_file.write(uploaded_file.getvalue())
-                    inputs["uploaded_file_path"] = tmp_file.name
-        progress_bar.progress(25)
-        status_text.text("🔄 Initializing AI agents...")
-        
-        st.info(f"🎯 **Analysis Target**: {input_type} - {target_input[:100]}{'...' if len(target_input) > 100 else ''}")
+                inputs["uploaded_file"] = uploads.UploadedResume(uploaded_file.name, uploaded_file.getbuffer())
+        if input_method != "File Upload Only":
+            inputs["prefetched"] = st.session_state.prefetcher.results()
+        options = {"use_cache": use_stage_cache, "force": force_rerun}
+        if multi_target:
+            options["targets"] = [inputs["target_input"]] + extra_targets
+        options["abandon_after"] = ABANDON_SECONDS
+        if st.session_state.get("job_id"):
+            # Pressing Run again replaces the previous analysis
+            job_queue.cancel(st.session_state.job_id, "replaced by a new run")
+        st.session_state.job_id = job_queue.submit(
+            "multi_target" if multi_target else "analysis",
+            inputs,
+            options
+        )
+
+    if st.session_state.get("job_id"):
+        job = job_queue.get(st.session_state.job_id)
+        input_type = job["inputs"]["input_type"]
+        target_input = job["inputs"]["target_input"]
+        multi_target = job["kind"] == "multi_target"
+
+        progress_bar = st.progress(0)
+        status_text = st.empty()
+        if job["state"] not in job_queue.FINISHED and st.button("🛑 Cancel analysis"):
+            job_queue.cancel(job["id"])
+    
+        try:
+            progress_bar.progress(25)
+            status_text.text("📨 Analysis submitted to the job queue...")
         
-        progress_bar.progress(50)
-        status_text.text("🤖 AI agents are analyzing your profile...")
+            st.info(f"🎯 **Analysis Target**: {input_type} - {target_input[:100]}{'...' if len(target_input) > 100 else ''}")
         
-        result = crew_to_use.kickoff(inputs=inputs)
+            finished_tasks = st.container()
+            live_output = st.empty()
         
-        progress_bar.progress(100)
-        status_text.text("✅ Analysis complete!")
-        st.success("🎉 Career Analysis Complete!")
-        st.markdown(f"### 📋 Analysis Results for: {input_type}")
-        if input_type == "Job Role/Title":
-            st.markdown(f"**Target Role**: {target_input}")
-        elif input_type == "Job Description":
-            st.markdown(f"**Job Description Analysis** (First 200 chars): {target_input[:200]}...")
-        else:
-            st.markdown(f"**Target Keywords**: {target_input}")
-        tab1, tab2, tab3, tab4, tab5 = st.tabs([
-            "📊 Complete Analysis", 
-            "🎯 Skills Gap", 
-            "💼 Experience Review", 
-            "👨‍💼 Recruiter Feedback",
-            "📈 Action Plan"
-        ])
+            buffer = ""
+            throttle = streaming.Throttle()
+            watch_throttle = streaming.Throttle(WATCH_SECONDS)
+            completed = 0
+            last_event = 0
+            while True:
+                job = job_queue.get(job["id"])
+                if watch_throttle.ready():
+                    job_queue.watch(job["id"])
+                for last_event, kind, data in job_queue.events(job["id"], last_event):
+                    if kind == "chunk":
+                        buffer += data
+                        if throttle.ready():
+                            live_output.markdown(buffer)
+                    elif kind == "task":
+                        completed += 1
+                        buffer = ""
+                        live_output.empty()
+                        with finished_tasks.expander(f"✅ {data['agent']}", expanded=False):
+                            st.markdown(data["raw"])
+                        progress_bar.progress(min(50 + completed * 8, 95))
+                    elif kind == "stage":
+                        status_text.text(f"🤖 {data['name'].replace('_', ' ').title()} stage: {data['state']}...")
+                if job["state"] == job_queue.DONE:
+                    break
+                if job["state"] == job_queue.FAILED:
+                    raise RuntimeError(job["error"])
+                if job["state"] == job_queue.CANCELLED:
+                    raise cancellation.Cancelled(job["error"])
+                if job["state"] == job_queue.QUEUED:
+                    status_text.text("⏳ Queued, waiting for an analysis worker...")
+                time.sleep(0.5)
+            live_output.empty()
+            result = (MultiTargetResult if multi_target else AnalysisResult)(**job["result"])
         
-        with tab1:
-            st.markdown("### 📋 Complete Analysis Summary")
-            if hasattr(result, 'raw'):
-                st.write(result.raw)
+            progress_bar.progress(100)
+            status_text.text("✅ Analysis complete!")
+            st.success("🎉 Career Analysis Complete!")
+            st.caption("🗂️ Stages: " + ", ".join(f"{stage} ({state})" for stage, state in result.stages.items()) + f" · Profile fingerprint: {result.fingerprint[:12]}")
+            if result.degraded:
+                st.warning(
+                    "🔌 Degraded mode: analyzed without "
+                    + ", ".join(f"{source.replace('_url', '')} ({reason})" for source, reason in result.degraded.items())
+                    + ". Run again once the provider recovers for a complete analysis."
+                )
+            if result.budget.get("partial"):
+                used = result.budget["used"]
+                st.warning(
+                    f"💸 Stopped early ({result.budget['exhausted'] or 'an agent reached its budget'}) after "
+                    f"{used['calls']} LLM calls, {used['tokens']:,} tokens and {used['seconds']:.0f}s. "
+                    "Showing partial results; they are not cached."
+                )
+            if multi_target:
+                st.markdown(f"### 🧮 Fit Comparison across {len(result.targets)} targets")
+                st.dataframe(
+                    result.matrix,
+                    hide_index=True,
+                    column_order=["rank", "target", "input_type", "skills_fit", "experience_fit", "overall_fit"]
+                )
+                for row in result.matrix:
+                    target = result.targets[row["index"]]
+                    with st.expander(f"#{row['rank']} {row['target']}"):
+                        st.markdown("#### 🎯 Skills Gap")
+                        st.markdown(target["skills"])
+                        st.markdown("#### 💼 Experience Review")
+                        st.markdown(target["experience"])
             else:
-                st.write(str(result))
+                st.markdown(f"### 📋 Analysis Results for: {input_type}")
+                if input_type == "Job Role/Title":
+                    st.markdown(f"**Target Role**: {target_input}")
+                elif input_type == "Job Description":
+                    st.markdown(f"**Job Description Analysis** (First 200 chars): {target_input[:200]}...")
+                else:
+                    st.markdown(f"**Target Keywords**: {target_input}")
+                tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs([
+                    "📊 Complete Analysis", 
+                    "🎯 Skills Gap", 
+                    "💼 Experience Review", 
+                    "👨‍💼 Recruiter Feedback",
+                    "📈 Action Plan",
+                    "✉️ Cover Letter",
+                    "💰 Salary Insights",
+                    "🧭 Job Opportunities"
+                ], key=f"tabs_{job['id']}", on_change="rerun")
+                sections = history.parse_sections(result.raw)
         
-        with tab2:
-            st.markdown("### 🎯 Skills Gap Analysis")
-            st.info("🔍 **Skills analysis based on your target requirements**")
-            pattern = r'(.*\s*3\..*?\n)(.*?)(\n.*\s*4\..*)'
+                with tab1:
+                    st.markdown("### 📋 Complete Analysis Summary")
+                    if hasattr(result, 'raw'):
+                        st.write(result.raw)
+                    else:
+                        st.write(str(result))
         
-            match = re.search(pattern, result.raw, re.S)
-            
-
-            if match:
-                print('this is tab2')
-                points_inside_3 = match.group(2).strip()
-                print("\nPoints inside 3:\n", points_inside_3)
-                st.write(points_inside_3)
-            
-            st.markdown("*Skills gap analysis extracted from the complete analysis above.*")
+                with tab2:
+                    st.markdown("### 🎯 Skills Gap Analysis")
+                    st.info("🔍 **Skills analysis based on your target requirements**")
+                    if report_section(sections, "3"):
+                        st.write(report_section(sections, "3"))
+                    st.markdown("*Skills gap analysis extracted from the complete analysis above.*")
         
-        with tab3:
-            st.markdown("### 📈 Experience Evaluation")
-            st.info("💼 **Professional experience assessment**")
-            pattern = r'(.*\s*2\..*?\n)(.*?)(\n.*\s*3\..*)'
-    
-            match = re.search(pattern, result.raw, re.S)
-            if match:
-                print("this is tab3")
-                points_inside_2 = match.group(2).strip()
-                print("\nPoints inside 2:\n", points_inside_2)
-                st.write(points_inside_2)
-            st.markdown("*Experience evaluation extracted from the complete analysis above.*")
+                with tab3:
+                    st.markdown("### 📈 Experience Evaluation")
+                    st.info("💼 **Professional experience assessment**")
+                    if report_section(sections, "2"):
+                        st.write(report_section(sections, "2"))
+                    st.markdown("*Experience evaluation extracted from the complete analysis above.*")
         
-        with tab4:
-            st.markdown("### 💡 Recruiter Insights")
-            st.info("👨‍💼 **Recruiter perspective and recommendations**")
-            pattern = r'(.*\s*6\..*?\n)(.*?)(\n.*\s*7\..*)'
-            match = re.search(pattern, result.raw, re.S)
-
-            if match:
-                points_inside_6 = match.group(2).strip()
-                print("\nPoints inside 6:\n", points_inside_6)
-                st.write(points_inside_6)
-            st.markdown("*Recruiter feedback extracted from the complete analysis above.*")
+                # The remaining heavy sections are only generated once opened
+                with tab4:
+                    st.markdown("### 💡 Recruiter Insights")
+                    st.info("👨‍💼 **Recruiter perspective and recommendations**")
+                    if tab4.open:
+                        show_report_section(job, "6")
             
-        with tab5:
-            pattern = r'(.*\s*7\..*?\n)(.*?)(\n.*\s*8\..*)'
-            match = re.search(pattern, result.raw, re.S)
-            if match:
-                points_inside_7 = match.group(2).strip()
-                print("\nPoints inside 7:\n", points_inside_7)
-                st.write(points_inside_7)
+                with tab5:
+                    if report_section(sections, "7"):
+                        st.write(report_section(sections, "7"))
+
+                with tab6:
+                    st.markdown("### ✉️ Customized Cover Letter Template")
+                    if tab6.open:
+                        show_report_section(job, "4")
+
+                with tab7:
+                    st.markdown("### 💰 Salary Negotiation Insights")
+                    if tab7.open:
+                        show_report_section(job, "8")
 
-        if 'uploaded_file_path' in inputs and os.path.exists(inputs['uploaded_file_path']):
-            os.unlink(inputs['uploaded_file_path'])
+                with tab8:
+                    st.markdown("### 🧭 Relevant Job Opportunities")
+                    if tab8.open:
+                        show_report_section(job, "9")
             
-    except Exception as e:
-        progress_bar.empty()
-        status_text.empty()
-        st.error(f"❌ An error occurred during analysis: {str(e)}")
+        except cancellation.Cancelled as e:
+            progress_bar.empty()
+            status_text.empty()
+            live_output.empty()
+            st.warning(f"🛑 Analysis cancelled: {e}")
+        except Exception as e:
+            progress_bar.empty()
+            status_text.empty()
+            st.error(f"❌ An error occurred during analysis: {str(e)}")
         
-        with st.expander("🔍 Error Details (for debugging)"):
-            st.code(str(e))
-        
-        if 'uploaded_file_path' in inputs and os.path.exists(inputs['uploaded_file_path']):
-            os.unlink(inputs['uploaded_file_path'])
+            with st.expander("🔍 Error Details (for debugging)"):
+                st.code(str(e))
 
-st.markdown("---")
-st.markdown("### 💡 Tips for Better Results:")
+    st.markdown("---")
+    st.markdown("### 💡 Tips for Better Results:")
 
-tip_col1, tip_col2 = st.columns(2)
+    tip_col1, tip_col2 = st.columns(2)
 
-with tip_col1:
-    st.markdown("""
-    **For Job Role Analysis:**
-    - Be specific (e.g., "Senior Frontend Developer" vs "Developer")
-    - Include seniority level
-    - Mention specific technologies if relevant
+    with tip_col1:
+        st.markdown("""
+        **For Job Role Analysis:**
+        - Be specific (e.g., "Senior Frontend Developer" vs "Developer")
+        - Include seniority level
+        - Mention specific technologies if relevant
     
-    **For GitHub Analysis:**
-    - Ensure your profile is public
-    - Pin your best repositories
-    - Add detailed README files
-    """)
+        **For GitHub Analysis:**
+        - Ensure your profile is public
+        - Pin your best repositories
+        - Add detailed README files
+        """)
 
-with tip_col2:
-    st.markdown("""
-    **For Job Description Analysis:**
-    - Copy the complete job posting
-    - Include requirements and nice-to-haves
-    - Don't edit or summarize the JD
+    with tip_col2:
+        st.markdown("""
+        **For Job Description Analysis:**
+        - Copy the complete job posting
+        - Include requirements and nice-to-haves
+        - Don't edit or summarize the JD
     
-    **For LinkedIn Analysis:**
-    - Keep your profile updated
-    - Add detailed experience descriptions
-    - Include relevant skills and endorsements
-    """)
-with st.expander("🔧 Advanced Settings & Features"):
-    st.markdown("### 🚀 Coming Soon:")
+        **For LinkedIn Analysis:**
+        - Keep your profile updated
+        - Add detailed experience descriptions
+        - Include relevant skills and endorsements
+        """)
+    with st.expander("🔧 Advanced Settings & Features"):
+        st.markdown("### 🚀 Coming Soon:")
     
-    feature_col1, feature_col2 = st.columns(2)
+        feature_col1, feature_col2 = st.columns(2)
     
-    with feature_col1:
-        st.markdown("""
-        **Analysis Enhancements:**
-        - Industry-specific analysis
-        - Company culture fit assessment
-        - Salary benchmarking
-        - ATS compatibility check
-        """)
+        with feature_col1:
+            st.markdown("""
+            **Analysis Enhancements:**
+            - Industry-specific analysis
+            - Company culture fit assessment
+            - Salary benchmarking
+            - ATS compatibility check
+            """)
     
-    with feature_col2:
+        with feature_col2:
+            st.markdown("""
+            **Career Tools:**
+            - Interview question preparation
+            - Mock interview practice
+            - Portfolio optimization
+            - Career path visualization
+            """)
+    
+        st.markdown("### 🎯 Current Analysis Capabilities:")
         st.markdown("""
-        **Career Tools:**
-        - Interview question preparation
-        - Mock interview practice
-        - Portfolio optimization
-        - Career path visualization
+        - ✅ Multi-format target input (Role/JD/Keywords)
+        - ✅ Comprehensive profile data collection
+        - ✅ AI-powered skills gap analysis
+        - ✅ Professional experience evaluation
+        - ✅ Expert recruiter feedback
+        - ✅ Personalized action planning
         """)
-    
-    st.markdown("### 🎯 Current Analysis Capabilities:")
-    st.markdown("""
-    - ✅ Multi-format target input (Role/JD/Keywords)
-    - ✅ Comprehensive profile data collection
-    - ✅ AI-powered skills gap analysis
-    - ✅ Professional experience evaluation
-    - ✅ Expert recruiter feedback
-    - ✅ Personalized action planning
-    """)
\ No newline at end of file
+
+with history_tab:
+    st.markdown("### 📚 Past Analyses")
+    st.caption(f"{history.store.count()} analyses stored")
+    search_query = st.text_input("Search reports", placeholder="e.g. kubernetes migration, leadership, data engineer")
+    hist_col1, hist_col2, hist_col3, hist_col4 = st.columns(4)
+    with hist_col1:
+        candidate_filter = st.text_input("Candidate", placeholder="GitHub/LinkedIn handle or file name")
+    with hist_col2:
+        role_filter = st.text_input("Role / target", placeholder="e.g. Backend Engineer")
+    with hist_col3:
+        skill_filter = st.text_input("Skill", placeholder="e.g. Python")
+    with hist_col4:
+        date_range = st.date_input("Date range", value=(date.today() - timedelta(days=90), date.today()))
+
+    since, until = (date_range + (None, None))[:2] if isinstance(date_range, tuple) else (date_range, None)
+    search_started = time.perf_counter()
+    matches = history.store.search(search_query, candidate_filter, role_filter, skill_filter, since, until, limit=200)
+    st.caption(f"{len(matches)} matches in {(time.perf_counter() - search_started) * 1000:.0f} ms")
+
+    if matches:
+        st.dataframe(
+            [
+                {
+                    "id": m["id"],
+                    "date": time.strftime("%Y-%m-%d %H:%M", time.localtime(m["created"])),
+                    "candidate": m["candidate"],
+                    "target": (m["target_input"] or "")[:80],
+                    "input_type": m["input_type"],
+                    "kind": m["kind"],
+                    "tokens": m["usage"].get("total_tokens", 0),
+                    "run_seconds": m["timings"].get("run_seconds"),
+                }
+                for m in matches
+            ],
+            hide_index=True
+        )
+        selected = st.selectbox(
+            "Open analysis",
+            [m["id"] for m in matches],
+            format_func=lambda analysis_id: next(
+                f"#{m['id']} · {m['candidate']} · {(m['target_input'] or '')[:60]}" for m in matches if m["id"] == analysis_id
+            )
+        )
+        record = history.store.get(selected)
+        if record:
+            st.markdown(f"**Candidate**: {record['candidate']} · **{record['input_type']}**: {(record['target_input'] or '')[:200]}")
+            if record["skills"]:
+                st.caption("Skills: " + ", ".join(record["skills"].split(", ")))
+            section_titles = list(record["sections"] or {})
+            if section_titles:
+                for title, section_tab in zip(section_titles, st.tabs(section_titles)):
+                    with section_tab:
+                        st.markdown(record["sections"][title])
+            else:
+                st.markdown(record["report"])
+            with st.expander("Inputs, timings and token usage"):
+                st.json({"inputs": record["inputs"], "timings": record["timings"], "usage": record["usage"],
+                         "budget": (record["result"] or {}).get("budget", {})})
+    else:
+        st.info("No stored analyses match these filters.")
@@ -0,0 +1,105 @@
+import os
+import time
+
+from crewai.llms.base_llm import BaseLLM
+from crewai.tools import BaseTool
+
+# Local stand-ins for the LLM and the external data providers, so the API,
+# the workers and the UI can be exercised and load-tested without network
+# calls or spend. Enabled in Main_Server with STUB_LLM=1 and STUB_FETCHERS=1.
+
+STUB_LLM_LATENCY = float(os.getenv("STUB_LLM_LATENCY", "0.5"))
+STUB_FETCH_LATENCY = float(os.getenv("STUB_FETCH_LATENCY", "0.2"))
+
+STUB_REPORT = """
+1. EXECUTIVE SUMMARY
+- Overall candidacy strength: 7/10
+2. DETAILED ANALYSIS
+- Strong Python and API experience; limited cloud exposure
+3. RESUME OPTIMIZATION GUIDE
+- Add Kubernetes and AWS keywords; quantify achievements
+4. CUSTOMIZED COVER LETTER TEMPLATE
+- [Company] [Role] summary block
+5. INTERVIEW PREPARATION STRATEGY
+- System design and STAR stories
+6. RECRUITER SIMULATION FEEDBACK
+- Pass initial screen; probe cloud depth
+7. PRIORITIZED ACTION PLAN
+- High: AWS certification; Medium: portfolio; Low: blog
+8. SALARY NEGOTIATION INSIGHTS
+- Mid-market positioning
+9. RELEVANT JOB OPPORTUNITIES
+- Backend Engineer at Example Corp [APPLY NOW](https://example.com/jobs/1)
+10. IMMEDIATE ACTION ITEMS
+- Apply to two roles this week
+FIT SCORE: 72
+"""
+
+
+class StubLLM(BaseLLM):
+    latency: float = STUB_LLM_LATENCY
+
+    def call(self, messages, tools=None, callbacks=None, available_functions=None,
+             from_task=None, from_agent=None, response_model=None):
+        time.sleep(self.latency)
+        if self.stream:
+            for line in STUB_REPORT.splitlines(keepends=True):
+                self._emit_stream_chunk_event(chunk=line, from_task=from_task, from_agent=from_agent)
+        return "Thought: I now know the final answer\nFinal Answer: " + STUB_REPORT
+
+    def supports_function_calling(self):
+        return False
+
+
+class StubResumeFetcherTool(BaseTool):
+    name: str = "resume_fetcher"
+    description: str = "Fetch resume text from a PDF URL or Google Drive link."
+
+    def _run(self, url: str) -> str:
+        time.sleep(STUB_FETCH_LATENCY)
+        return "Jane Doe\nBackend Engineer, 5 years\nSkills: Python, Django, PostgreSQL, Docker"
+
+
+class StubGithubFetcherTool(BaseTool):
+    name: str = "github_fetcher"
+    description: str = "Fetch public GitHub profile and repositories from a GitHub profile URL."
+
+    def _run(self, github_url: str) -> dict:
+        time.sleep(STUB_FETCH_LATENCY)
+        return {
+            "profile": {"login": github_url.strip("/").split("/")[-1], "public_repos": 2},
+            "repos": [
+                {"name": "api-service", "description": "REST API", "language": "Python", "stars": 12},
+                {"name": "dashboard", "description": "Admin UI", "language": "TypeScript", "stars": 3},
+            ],
+            "top_repos": [
+                {"name": "api-service", "stars": 12, "pushed_at": "2024-05-01T00:00:00Z",
+                 "languages": {"Python": 48000, "Dockerfile": 600}, "readme": "REST API built with FastAPI and PostgreSQL."},
+            ],
+            "language_weights": {"Python": 0.72, "TypeScript": 0.27, "Dockerfile": 0.01},
+        }
+
+
+class StubLinkedInFetcherTool(BaseTool):
+    name: str = "linkedin_data_fetcher"
+    description: str = "Fetch public LinkedIn profile data."
+
+    def _run(self, linkedin_url: str) -> dict:
+        time.sleep(STUB_FETCH_LATENCY)
+        return {"name": "Jane Doe", "position": "Backend Engineer", "experience": [{"title": "Backend Engineer", "company": "Acme"}]}
+
+
+class StubJobSearchTool(BaseTool):
+    name: str = "Search the internet with Serper"
+    description: str = "Search the internet for job postings."
+
+    def _run(self, search_query: str = "") -> str:
+        time.sleep(STUB_FETCH_LATENCY)
+        return "Backend Engineer at Example Corp - https://example.com/jobs/1"
+
+
+STUB_FETCH_TOOLS = {
+    "resume_url": StubResumeFetcherTool,
+    "github_url": StubGithubFetcherTool,
+    "linkedin_url": StubLinkedInFetcherTool,
+}
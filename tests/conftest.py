@@ -0,0 +1,16 @@
+import os
+import sys
+import tempfile
+
+# Stores opened at import time live in a scratch directory, never in db/
+_scratch = tempfile.mkdtemp(prefix="tests-")
+for variable, name in (
+    ("ROLE_KB_PATH", "roles.sqlite3"),
+    ("JD_CACHE_PATH", "job_descriptions.sqlite3"),
+    ("STAGE_CACHE_PATH", "stage_cache.sqlite3"),
+    ("GITHUB_REPO_CACHE_PATH", "github_repos.sqlite3"),
+    ("LLM_LATENCY_LOG", "llm_latency.jsonl"),
+):
+    os.environ.setdefault(variable, os.path.join(_scratch, name))
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+import pytest
+
+import cancellation
+import streaming
+from http_client import HttpClient
+from llm_gateway import LLMGateway
+from stubs import StubLLM
+
+
+class _SlowBody(BaseHTTPRequestHandler):
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header("Content-Length", str(100 * 1024))
+        self.end_headers()
+        try:
+            for _ in range(100):
+                self.wfile.write(b"x" * 1024)
+                self.wfile.flush()
+                time.sleep(0.05)
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def slow_server():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowBody)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/"
+    server.shutdown()
+
+
+def test_cancelled_download_frees_its_host_slot(slow_server):
+    client = HttpClient(max_retries=0)
+    token = cancellation.CancelToken()
+    threading.Timer(0.3, token.cancel).start()
+    with cancellation.scope(token), pytest.raises(cancellation.Cancelled):
+        client.get(slow_server)
+    # The helper thread stops at its next chunk rather than after ~5s
+    deadline = time.monotonic() + 2
+    host = urlsplit(slow_server).netloc
+    while client.metrics()[host]["in_flight"]:
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+
+
+def test_cancelled_stream_stops_the_completion_and_frees_gateway_slots():
+    gateway = LLMGateway()
+    llm = StubLLM(model="stub", stream=True, latency=0)
+    token = cancellation.CancelToken()
+    sink = streaming.StreamSink()
+    sink.chunk = lambda text: token.cancel("user cancelled")
+
+    with cancellation.scope(token), streaming.stream_to(sink), pytest.raises(cancellation.Cancelled):
+        gateway.call("stub", None, lambda: llm.call([{"role": "user", "content": "hi"}]))
+
+    assert token.cancelled
+    assert gateway.metrics()["stub"]["in_flight"] == 0
@@ -0,0 +1,103 @@
+import threading
+import time
+
+import cancellation
+from llm_gateway import LLMGateway, wrap
+from stubs import StubLLM
+
+
+def _run(results, name, fn, token=None):
+    def target():
+        try:
+            if token is None:
+                results[name] = fn()
+            else:
+                with cancellation.scope(token):
+                    results[name] = fn()
+        except BaseException as e:
+            results[name] = e
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    return thread
+
+
+def _wait_for(condition, seconds=5):
+    deadline = time.monotonic() + seconds
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.01)
+
+
+def test_cancelled_leader_hands_the_call_to_a_follower():
+    gateway = LLMGateway(max_concurrency=4, default_model_limit=1)
+    release = threading.Event()
+    calls = []
+
+    def answer():
+        calls.append(1)
+        return "answer"
+
+    results = {}
+    # Keep the only model slot busy so the leader queues behind it
+    blocker = _run(results, "blocker", lambda: gateway.call("m", "other", release.wait))
+    _wait_for(lambda: gateway.metrics()["m"]["in_flight"] == 1)
+
+    token = cancellation.CancelToken()
+    leader = _run(results, "cancelled", lambda: gateway.call("m", "same", answer), token)
+    _wait_for(lambda: gateway.metrics()["m"]["waiting"] == 1)
+    follower = _run(results, "other run", lambda: gateway.call("m", "same", answer))
+    time.sleep(0.1)
+
+    token.cancel("user cancelled")
+    release.set()
+    for thread in (blocker, leader, follower):
+        thread.join(5)
+
+    assert isinstance(results["cancelled"], cancellation.Cancelled)
+    assert results["other run"] == ("answer", False)
+    assert len(calls) == 1
+
+
+def test_followers_share_the_leaders_provider_error():
+    gateway = LLMGateway(max_concurrency=4, default_model_limit=1)
+    release = threading.Event()
+
+    def failing():
+        release.wait()
+        raise RuntimeError("provider error")
+
+    results = {}
+    leader = _run(results, "leader", lambda: gateway.call("m", "same", failing))
+    _wait_for(lambda: gateway.metrics()["m"]["in_flight"] == 1)
+    follower = _run(results, "follower", lambda: gateway.call("m", "same", failing))
+    time.sleep(0.1)
+    release.set()
+    for thread in (leader, follower):
+        thread.join(5)
+
+    assert isinstance(results["leader"], RuntimeError)
+    assert isinstance(results["follower"], RuntimeError)
+
+
+def test_budget_applies_to_the_last_model():
+    primary = StubLLM(model="slow-primary", latency=0.5)
+    fallback = StubLLM(model="slow-fallback", latency=0.5)
+    llm = wrap(primary, fallbacks=[fallback], budget=0.1, agent="tester")
+    llm.gateway = LLMGateway()
+
+    answer = llm.call([{"role": "user", "content": "hi"}])
+
+    assert "Stopped early: slow-fallback exceeded the 0.1s call budget" in answer
+
+
+def test_fallback_answers_within_budget():
+    primary = StubLLM(model="slow-primary", latency=0.5)
+    fallback = StubLLM(model="fast-fallback", latency=0.0)
+    llm = wrap(primary, fallbacks=[fallback], budget=0.1, agent="tester")
+    llm.gateway = LLMGateway()
+
+    answer = llm.call([{"role": "user", "content": "hi"}])
+
+    assert "Final Answer" in answer
+    assert "Stopped early" not in answer
@@ -0,0 +1,32 @@
+import pytest
+
+from role_requirements import RoleKnowledgeBase
+
+
+@pytest.fixture
+def knowledge_base(tmp_path):
+    return RoleKnowledgeBase(path=str(tmp_path / "roles.sqlite3"))
+
+
+@pytest.mark.parametrize("title, role, seniority", [
+    ("Sr. Backend Developer", "backend engineer", "senior"),
+    ("Backend Engineer, Payments Platform", "backend engineer", None),
+    ("Backnd Engineer", "backend engineer", None),
+    ("DevOps", "devops engineer", None),
+    ("AWS Engineer", "cloud engineer", None),
+    ("Build Engineer", "devops engineer", None),
+    ("Tech Lead", "engineering manager", "lead"),
+])
+def test_match(knowledge_base, title, role, seniority):
+    assert knowledge_base.match(title) == (role, seniority)
+
+
+@pytest.mark.parametrize("title", [
+    "Sales Engineer",
+    "Audio Engineer",
+    "Field Engineer",
+    "Tech Support Engineer",
+    "Engineer",
+])
+def test_titles_sharing_only_a_role_noun_do_not_match(knowledge_base, title):
+    assert knowledge_base.match(title) == (None, None)
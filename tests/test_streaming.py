@@ -0,0 +1,43 @@
+import threading
+
+from crewai.events import LLMStreamChunkEvent, crewai_event_bus
+
+import streaming
+from streaming import StreamSink
+
+
+def _chunks(sink):
+    events = []
+    while not sink.events.empty():
+        events.append(sink.events.get())
+    return [event[1] for event in events if event[0] == "chunk"]
+
+
+def test_chunks_from_a_thread_without_a_sink_reach_no_other_job():
+    sink = StreamSink()
+    registered, release = threading.Event(), threading.Event()
+
+    def job():
+        with streaming.stream_to(sink):
+            registered.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=job, daemon=True)
+    thread.start()
+    registered.wait(5)
+    try:
+        crewai_event_bus.emit(None, LLMStreamChunkEvent(chunk="other job's token", call_id="test"))
+    finally:
+        release.set()
+        thread.join(5)
+    assert _chunks(sink) == []
+
+
+def test_bind_carries_the_sink_to_a_helper_thread():
+    sink = StreamSink()
+    with streaming.stream_to(sink):
+        bound = streaming.bind(lambda: streaming._current_sink().chunk("token"))
+    thread = threading.Thread(target=bound)
+    thread.start()
+    thread.join(5)
+    assert _chunks(sink) == ["token"]
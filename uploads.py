@@ -0,0 +1,81 @@
+import hashlib
+import os
+from contextlib import contextmanager
+from dataclasses import dataclass
+from multiprocessing import resource_tracker, shared_memory
+
+# Uploaded resumes stay in memory from the Streamlit uploader to text
+# extraction. Within a process they travel as a memoryview over the upload
+# buffer; worker processes receive a shared-memory handle instead of a copy.
+# A segment outlives the processes that create or attach it (a queued job
+# survives a UI restart, a crashed worker's job is retried), so Python's
+# resource tracker, which unlinks segments at process exit, does not track
+# them; release() frees a segment once its job is finished.
+
+
+@dataclass
+class UploadedResume:
+    name: str
+    data: memoryview
+
+    def __post_init__(self):
+        if not isinstance(self.data, memoryview):
+            self.data = memoryview(self.data)
+
+    @property
+    def extension(self):
+        return os.path.splitext(self.name)[1].lower()
+
+    @property
+    def size(self):
+        return self.data.nbytes
+
+    def digest(self):
+        return hashlib.sha256(self.data).hexdigest()
+
+
+@dataclass
+class SharedUpload:
+    # Picklable handle to an upload copied once into a shared-memory segment
+    name: str
+    segment: str
+    size: int
+
+
+def _untracked(**kwargs):
+    try:
+        return shared_memory.SharedMemory(track=False, **kwargs)
+    except TypeError:
+        # Python < 3.13 always registers the segment with the tracker
+        segment = shared_memory.SharedMemory(**kwargs)
+        resource_tracker.unregister(segment._name, "shared_memory")
+        return segment
+
+
+def share(upload):
+    segment = _untracked(create=True, size=max(upload.size, 1))
+    segment.buf[:upload.size] = upload.data
+    handle = SharedUpload(upload.name, segment.name, upload.size)
+    segment.close()
+    return handle
+
+
+@contextmanager
+def attach(handle):
+    segment = _untracked(name=handle.segment)
+    view = segment.buf[:handle.size]
+    try:
+        yield UploadedResume(handle.name, view)
+    finally:
+        view.release()
+        segment.close()
+
+
+def release(handle):
+    # Attaching tracked and unlinking leaves the tracker balanced
+    try:
+        segment = shared_memory.SharedMemory(name=handle.segment)
+    except FileNotFoundError:
+        return
+    segment.close()
+    segment.unlink()
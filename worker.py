@@ -0,0 +1,195 @@
+import argparse
+import multiprocessing
+import os
+import socket
+import threading
+import time
+import traceback
+from dataclasses import asdict
+
+import cancellation
+import history
+import job_queue
+import streaming
+import uploads
+
+# Analysis worker: claims jobs from the SQLite queue and runs the crews
+# outside the Streamlit process. Scale horizontally by starting more
+# processes, on this machine or any other sharing the queue file (jobs with
+# an uploaded resume need a worker on the submitting host, since uploads are
+# handed over in shared memory):
+#
+#     python worker.py --processes 4
+
+POLL_SECONDS = float(os.getenv("WORKER_POLL_SECONDS", "1"))
+# How often a running job's cancel flag and viewer are checked
+CANCEL_POLL_SECONDS = float(os.getenv("WORKER_CANCEL_POLL_SECONDS", "1"))
+FLUSH_SECONDS = 0.5
+
+
+class JobEventSink(streaming.StreamSink):
+    # Writes progress to job_events; stream chunks are batched so every token
+    # does not become a SQLite write.
+    def __init__(self, job_id):
+        super().__init__()
+        self.job_id = job_id
+        self._buffer = []
+        self._last_flush = time.monotonic()
+        self._lock = threading.Lock()
+
+    def chunk(self, text):
+        if not text:
+            return
+        with self._lock:
+            self._buffer.append(text)
+            due = time.monotonic() - self._last_flush >= FLUSH_SECONDS
+        if due:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            text = "".join(self._buffer)
+            self._buffer = []
+            self._last_flush = time.monotonic()
+        if text:
+            job_queue.add_event(self.job_id, "chunk", text)
+
+    def task(self, agent, raw):
+        self.flush()
+        job_queue.add_event(self.job_id, "task", {"agent": str(agent), "raw": raw})
+
+    def stage(self, name, state):
+        self.flush()
+        job_queue.add_event(self.job_id, "stage", {"name": name, "state": state})
+
+    def finish(self, result=None, error=None):
+        self.flush()
+
+
+def _heartbeat(job_id, worker_id, stop):
+    while not stop.wait(job_queue.LEASE_SECONDS / 3):
+        if not job_queue.heartbeat(job_id, worker_id):
+            print(f"⚠️ {worker_id} lost the lease on job {job_id}")
+            return
+
+
+def _watch_cancellation(job, token, stop):
+    abandon_after = job["options"].get("abandon_after")
+    while not stop.wait(CANCEL_POLL_SECONDS):
+        reason, watched = job_queue.cancel_requested(job["id"])
+        if reason is None and abandon_after and watched and time.time() - watched > abandon_after:
+            reason = f"abandoned: no viewer for {abandon_after:g}s"
+        if reason:
+            token.cancel(reason)
+            return
+
+
+def run_job(job, sink):
+    if job.get("upload") is None:
+        return _run(job, job["inputs"], sink)
+    # The upload stays in shared memory; it is only viewed for the run
+    with uploads.attach(job["upload"]) as upload:
+        return _run(job, {**job["inputs"], "uploaded_file": upload}, sink)
+
+
+def _run(job, inputs, sink):
+    from Main_Server import run_analysis, run_multi_target, run_report_section
+
+    options = job["options"]
+    common = {
+        "use_cache": options.get("use_cache", True),
+        "force": options.get("force", False),
+        "sink": sink,
+    }
+    if job["kind"] == "multi_target":
+        result = run_multi_target(inputs, options["targets"], **common)
+    elif job["kind"] == "report_section":
+        result = run_report_section(inputs, options["tasks_output"], options["section"], **common)
+    else:
+        result = run_analysis(inputs, **common)
+    return asdict(result)
+
+
+def _record_history(job, result, run_seconds):
+    inputs = {k: v for k, v in job["inputs"].items() if k not in ("uploaded_file", "prefetched")}
+    if job["upload_name"]:
+        inputs["upload_name"] = job["upload_name"]
+    timings = {
+        "queued_seconds": round(job["started"] - job["created"], 3),
+        "run_seconds": round(run_seconds, 3),
+        "stages": result.get("stages", {}),
+    }
+    try:
+        history.store.record(job["kind"], inputs, result, timings, job_id=job["id"])
+    except Exception as e:
+        print(f"⚠️ Could not save job {job['id']} to history: {e}")
+
+
+def work_loop(worker_id, once=False):
+    import Main_Server  # noqa: F401  warm the crews before claiming work
+
+    print(f"👷 {worker_id} waiting for jobs")
+    while True:
+        job = job_queue.claim(worker_id)
+        if job is None:
+            if once:
+                return
+            time.sleep(POLL_SECONDS)
+            continue
+
+        print(f"▶️ {worker_id} running {job['kind']} job {job['id']} (attempt {job['attempts'] + 1})")
+        stop = threading.Event()
+        token = cancellation.CancelToken()
+        threading.Thread(target=_heartbeat, args=(job["id"], worker_id, stop), daemon=True).start()
+        threading.Thread(target=_watch_cancellation, args=(job, token, stop), daemon=True).start()
+        sink = JobEventSink(job["id"])
+        job["started"] = job["started"] or time.time()
+        start = time.monotonic()
+        try:
+            with cancellation.scope(token):
+                result = run_job(job, sink)
+        except cancellation.Cancelled as e:
+            sink.finish()
+            job_queue.cancelled(job["id"], worker_id, e)
+            print(f"🛑 {worker_id} job {job['id']} cancelled after {time.monotonic() - start:.1f}s: {e}")
+        except Exception as e:
+            traceback.print_exc()
+            sink.finish()
+            job_queue.fail(job["id"], worker_id, e)
+            print(f"❌ {worker_id} job {job['id']} failed: {e}")
+        else:
+            sink.finish()
+            # Report sections belong to an analysis already in the history
+            if job_queue.complete(job["id"], worker_id, result) and job["kind"] != "report_section":
+                _record_history(job, result, time.monotonic() - start)
+            print(f"✅ {worker_id} job {job['id']} done")
+        finally:
+            stop.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run analysis workers against the SQLite job queue")
+    parser.add_argument("--processes", type=int, default=int(os.getenv("WORKER_PROCESSES", "1")))
+    args = parser.parse_args()
+
+    host = socket.gethostname()
+    if args.processes == 1:
+        work_loop(f"{host}-{os.getpid()}")
+        return
+
+    processes = [
+        multiprocessing.Process(target=work_loop, args=(f"{host}-{os.getpid()}-{i}",), daemon=True)
+        for i in range(args.processes)
+    ]
+    for process in processes:
+        process.start()
+    try:
+        for process in processes:
+            process.join()
+    except KeyboardInterrupt:
+        for process in processes:
+            process.terminate()
+
+
+if __name__ == "__main__":
+    main()